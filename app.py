@@ -1,15 +1,24 @@
-from flask import Flask, request, jsonify, g, send_from_directory
-import uuid
+from flask import Flask, Response, request, jsonify, g, send_from_directory
 import os
+import json
+import atexit
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
 
 from werkzeug.utils import secure_filename
-from module.db import Database
-from module.yolo import YOLODetector
+from module.db import ConnectionPool
+from module.yolo import YOLODetector, create_tile_pool
 from module.cnn import CNNDetector
+from module.vision import VisionPipeline
+from module.annotations import AnnotationStore, MODES as ANNOTATION_MODES
+from module.ingest import UploadWriter, load_working_image, sniff_image_format
+from module.storage import StorageManager
+from module.result_cache import ResultCache, content_hash, perceptual_hash
 from module.rag import RAGChatbot
+from module.semantic_cache import SemanticAnswerCache
+from module.summary import ConversationSummarizer
+from module.history_cache import HistoryCache
 
 import logging
 log = logging.getLogger('werkzeug')
@@ -25,106 +34,361 @@ app = Flask(__name__)
 UPLOAD_FOLDER = "uploads"
 PROCESSED_FOLDER = "processed"
 ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp'}
-
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(PROCESSED_FOLDER, exist_ok=True)
+# Batas ukuran request upload; lebih besar dari ini ditolak Flask dengan 413
+MAX_UPLOAD_BYTES = 16 * 1024 * 1024
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+# Kuota disk (byte); file yang paling lama tidak dipakai dihapus oleh sweeper latar.
+# Hasil render di PROCESSED_FOLDER dibuat ulang saat diminta, file asli tidak.
+UPLOAD_MAX_BYTES = 2 * 1024 ** 3
+PROCESSED_MAX_BYTES = 512 * 1024 ** 2
+STORAGE_SWEEP_INTERVAL = 60
 
 CNN_MODEL_PATH = "model/best_fusion_model(light)_(2025-11-06_18-17).h5"
+# Backend CNN: "keras" (.h5), "tflite" atau "onnx" (hasil python -m module.cnn_export)
+CNN_BACKEND = "keras"
 YOLO_MODEL_PATH = "model/yolo.pt"
+# Micro-batching CNN: upload konkuren digabung dalam satu forward pass
+CNN_MAX_BATCH_SIZE = 16
+CNN_MAX_WAIT_MS = 5
+# Tiling YOLO untuk foto resolusi tinggi (None = nonaktif, gambar di-downsample ultralytics)
+YOLO_TILE_SIZE = None
+YOLO_TILE_OVERLAP = 0.2
+YOLO_TILE_WORKERS = 0
+# Sisi terpanjang gambar yang masih di-tile dengan piksel aslinya (di atas ini diperkecil)
+YOLO_TILE_MAX_SIDE = 4096
+# Sisi terpanjang salinan kerja hasil decode (CNN hanya butuh 224x224, YOLO 640).
+# Dengan tiling, salinan kerja harus beresolusi (mendekati) asli agar tile berisi detail penuh.
+WORKING_MAX_SIDE = YOLO_TILE_MAX_SIDE if YOLO_TILE_SIZE else 1280
+# Cache hasil CNN/YOLO per isi gambar; isi threshold (jarak dHash, mis. 4) untuk near-duplicate
+RESULT_CACHE_MAX_ENTRIES = 5000
+RESULT_CACHE_PHASH_THRESHOLD = None
+# Jalankan YOLO spekulatif paralel dengan CNN (dibatalkan/dibuang jika CNN menolak gambar)
+VISION_SPECULATIVE_YOLO = True
 
 DATABASE_FILE = 'database.db'
+# Riwayat di prompt = ringkasan bergulir + pesan yang belum diringkas; pesan di luar
+# anggaran token terakhir ini dilipat ke ringkasan di latar
+HISTORY_TAIL_TOKENS = 1500
+SUMMARY_MIN_CHUNK_TOKENS = 400
+# Batas memori cache riwayat terformat per room (LRU)
+HISTORY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Write-behind: save_message diantre lalu ditulis berkelompok oleh thread latar
+DB_WRITE_BEHIND = True
+DB_BATCH_SIZE = 64
+DB_MAX_DELAY = 0.05
 LLM_NAME = "gemini-2.5-flash"
 VECTOR_STORE_DIR = "vectorstore_chroma_db1"
+# "chroma" atau "numpy": VectorIndex mmap hasil `python -m module.vector_index` (VECTOR_STORE_DIR = direktori ekspor)
+VECTOR_BACKEND = "chroma"
+# Cache jawaban semantik: pertanyaan mirip (cosine embedding IndoBERT) memakai jawaban lama
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_TTL_SECONDS = 7 * 24 * 3600
+SEMANTIC_CACHE_MAX_ENTRIES = 2000
+# Cache LRU embedding query IndoBERT (+ SQLite agar tetap hangat setelah restart)
+EMBEDDING_CACHE_SIZE = 4096
+EMBEDDING_CACHE_PATH = "embedding_cache.db"
+# Backend embedding IndoBERT: "torch" (sentence-transformers) atau "onnx" (ONNX Runtime int8,
+# ekspor dulu: python -m module.onnx_embeddings --output model/indobert_onnx_int8 --quantize int8)
+EMBEDDING_BACKEND = "torch"
+EMBEDDING_ONNX_DIR = "model/indobert_onnx_int8"
+EMBEDDING_THREADS = None
+# Micro-batching embed_query lintas request: jendela (ms) dan ukuran batch maksimal (1 = nonaktif)
+EMBEDDING_BATCH_WAIT_MS = 5
+EMBEDDING_BATCH_SIZE = 16
+# Hybrid retrieval (dense IndoBERT + BM25 paralel): "rrf" atau "blend" (skor min-max berbobot)
+HYBRID_METHOD = "rrf"
+HYBRID_WEIGHTS = (0.8, 0.2)
+HYBRID_K = None  # None = semua dokumen unik dari kedua sumber
+# Muat IndoBERT/Chroma/BM25 di thread latar saat startup (lihat endpoint /ready)
+RAG_EAGER_WARMUP = True
+
+# Worker tiling YOLO di-fork paling awal, sebelum thread (sweeper, writer) dan model lain dibuat
+yolo_tile_pool = None
+if YOLO_TILE_SIZE and YOLO_TILE_WORKERS > 0:
+    yolo_tile_pool = create_tile_pool(YOLO_MODEL_PATH, YOLO_TILE_WORKERS)
+
+upload_storage = StorageManager(UPLOAD_FOLDER, max_bytes=UPLOAD_MAX_BYTES, sweep_interval=STORAGE_SWEEP_INTERVAL)
+processed_storage = StorageManager(PROCESSED_FOLDER, max_bytes=PROCESSED_MAX_BYTES, sweep_interval=STORAGE_SWEEP_INTERVAL)
+
+# File asli disimpan di thread latar; dipakai sebagai sumber render anotasi /processed
+upload_writer = UploadWriter(upload_storage)
+atexit.register(upload_writer.shutdown)
+atexit.register(upload_storage.stop)
+atexit.register(processed_storage.stop)
 
 # ===== INISIASI MODEL DETEKSI =========
-cnn_detector = CNNDetector(CNN_MODEL_PATH)
-yolo_detector = YOLODetector(model_path="model/yolo.pt", output_dir=PROCESSED_FOLDER)
+cnn_detector = CNNDetector(
+    CNN_MODEL_PATH,
+    max_batch_size=CNN_MAX_BATCH_SIZE,
+    max_wait_ms=CNN_MAX_WAIT_MS,
+    backend=CNN_BACKEND
+)
+yolo_detector = YOLODetector(
+    model_path=YOLO_MODEL_PATH,
+    output_dir=PROCESSED_FOLDER,
+    tile_size=YOLO_TILE_SIZE,
+    tile_overlap=YOLO_TILE_OVERLAP,
+    tile_workers=YOLO_TILE_WORKERS,
+    tile_pool=yolo_tile_pool
+)
+atexit.register(yolo_detector.shutdown)
+vision_pipeline = VisionPipeline(cnn_detector, yolo_detector, speculative=VISION_SPECULATIVE_YOLO)
+atexit.register(vision_pipeline.shutdown)
+# Box YOLO disimpan saat upload; gambar anotasi dirender saat pertama kali dibuka
+annotation_store = AnnotationStore(DATABASE_FILE, upload_storage, processed_storage, source_writer=upload_writer)
+
+result_cache = ResultCache(
+    DATABASE_FILE,
+    max_entries=RESULT_CACHE_MAX_ENTRIES,
+    phash_threshold=RESULT_CACHE_PHASH_THRESHOLD,
+    writer=upload_writer
+)
+
+def forget_evicted_upload(path):
+    """Gambar asli dievict sweeper: buang deteksi dan hasil cache yang merujuknya."""
+    annotation_store.forget(os.path.basename(path))
+    result_cache.forget_path(path)
+
+upload_storage.on_evict = forget_evicted_upload
 
 # ===== INISIASI CHATBOT =========
 chatbot_model = ChatGoogleGenerativeAI(
     model=LLM_NAME,
     google_api_key=os.environ["GOOGLE_API_KEY"]
 )
-rag_chatbot = RAGChatbot(chatbot_model, VECTOR_STORE_DIR)
+answer_cache = None
+if SEMANTIC_CACHE_ENABLED:
+    answer_cache = SemanticAnswerCache(
+        DATABASE_FILE,
+        threshold=SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds=SEMANTIC_CACHE_TTL_SECONDS,
+        max_entries=SEMANTIC_CACHE_MAX_ENTRIES
+    )
+rag_chatbot = RAGChatbot(
+    chatbot_model,
+    VECTOR_STORE_DIR,
+    answer_cache=answer_cache,
+    embedding_cache_size=EMBEDDING_CACHE_SIZE,
+    embedding_cache_path=EMBEDDING_CACHE_PATH,
+    hybrid_method=HYBRID_METHOD,
+    hybrid_weights=HYBRID_WEIGHTS,
+    hybrid_k=HYBRID_K,
+    vector_backend=VECTOR_BACKEND,
+    embedding_backend=EMBEDDING_BACKEND,
+    embedding_onnx_dir=EMBEDDING_ONNX_DIR,
+    embedding_threads=EMBEDDING_THREADS,
+    embedding_batch_size=EMBEDDING_BATCH_SIZE,
+    embedding_batch_wait_ms=EMBEDDING_BATCH_WAIT_MS
+)
+atexit.register(rag_chatbot.shutdown)
+if RAG_EAGER_WARMUP:
+    rag_chatbot.start_warm_up()
+
+# ===== INISIASI DATABASE =========
+# Skema dibuat sekali di sini, koneksi (WAL) dipakai ulang antar request
+db_pool = ConnectionPool(
+    DATABASE_FILE,
+    write_behind=DB_WRITE_BEHIND,
+    batch_size=DB_BATCH_SIZE,
+    max_delay=DB_MAX_DELAY
+)
+atexit.register(db_pool.close_all)
+
+history_cache = HistoryCache(max_bytes=HISTORY_CACHE_MAX_BYTES)
+summarizer = ConversationSummarizer(
+    chatbot_model,
+    db_pool,
+    tail_tokens=HISTORY_TAIL_TOKENS,
+    min_chunk_tokens=SUMMARY_MIN_CHUNK_TOKENS,
+    history_cache=history_cache
+)
+atexit.register(summarizer.shutdown)
 
 def get_db():
     """
-    Membuka koneksi database baru jika belum ada untuk request saat ini.
+    Mengambil koneksi database dari pool untuk request saat ini.
     """
     if 'db' not in g:
-        g.db = Database(DATABASE_FILE)
-        g.db.init_db() # Pastikan tabel ada
+        g.db = db_pool.acquire()
     return g.db
 
 @app.teardown_appcontext
 def close_db(e=None):
     """
-    Menutup koneksi database secara otomatis setelah request selesai.
+    Mengembalikan koneksi ke pool secara otomatis setelah request selesai.
     """
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        db_pool.release(db)
 
 def allowed_file(filename):
     """Cek apakah ekstensi file diizinkan."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+@app.errorhandler(413)
+def upload_too_large(e):
+    return jsonify({'error': f'File too large. Maximum size is {MAX_UPLOAD_BYTES // (1024 * 1024)} MB'}), 413
+
 @app.route("/")
 def index():
     return "Selamat datang di Chatbot API!"
 
-@app.route("/upload_img", methods=['POST'])
-def upload_image():
-    db_conn = get_db()
-    
+@app.route("/ready")
+def ready():
+    """
+    Readiness probe untuk load balancer: 503 selama warm-up RAG masih berjalan.
+    """
+    if not rag_chatbot.is_ready():
+        return jsonify({'status': 'warming_up'}), 503
+    return jsonify({'status': 'ready', 'rag_available': rag_chatbot.is_available()}), 200
+
+@app.route("/cache_stats")
+def cache_stats():
+    """Statistik hit rate cache jawaban, hasil gambar dan riwayat, serta batching embedding query."""
+    return jsonify({
+        'semantic_answer_cache': answer_cache.stats() if answer_cache is not None else None,
+        'image_result_cache': result_cache.stats(),
+        'history_cache': history_cache.stats(),
+        'query_embedding_cache': rag_chatbot.embedding_cache_stats(),
+        'query_embedding_batches': rag_chatbot.embedding_batch_stats(),
+    }), 200
+
+NOT_RECOGNIZED_RESPONSE = {
+    "response": "Gambar tidak dikenali sebagai penyakit tanaman.",
+    "image_url": None,
+    "ai_response": "Mohon unggah gambar yang jelas dari daun tanaman yang menunjukkan gejala penyakit untuk analisis lebih lanjut."
+}
+
+def parse_upload_request():
+    """
+    Validasi form upload gambar.
+    :return: ((image_file, session_id, room_id), None) atau (None, response error)
+    """
     # Periksa apakah ada file di request
     if 'image' not in request.files:
-        return jsonify({'error': 'No image file provided'}), 400
+        return None, (jsonify({'error': 'No image file provided'}), 400)
 
     image_file = request.files['image']
     session_id = request.form.get('session_id') # Ambil session_id dari form data
     room_id = request.form.get('room_id') # Ambil room_id dari form data
     
     if image_file.filename == '':
-       return jsonify({'error': 'No filename provided'}), 400
+       return None, (jsonify({'error': 'No filename provided'}), 400)
 
     if not session_id or not room_id or image_file.filename == '':
-        return jsonify({'error': 'Session ID or filename is missing'}), 400
+        return None, (jsonify({'error': 'Session ID or filename is missing'}), 400)
     
     if not allowed_file(image_file.filename):
-        return jsonify({'error': 'Invalid file type. Allowed types: jpg, jpeg, png, webp'}), 400
+        return None, (jsonify({'error': 'Invalid file type. Allowed types: jpg, jpeg, png, webp'}), 400)
+
+    return (image_file, session_id, room_id), None
+
+def classify_upload(image_bytes):
+    """
+    Pipeline visi untuk bytes upload: cache hasil, decode, CNN + YOLO.
+    :return: (class_name, confidence, processed_path)
+    :raises ValueError: jika file bukan gambar yang valid
+    """
+    # Tolak file yang bukan gambar dari header, sebelum hashing dan decode
+    image_format = sniff_image_format(image_bytes[:16])
+    if image_format is None:
+        raise ValueError('Uploaded file is not a valid image')
+
+    # Foto yang sama diunggah ulang: pakai hasil CNN/YOLO sebelumnya tanpa inferensi
+    image_key = content_hash(image_bytes)
+    cached = result_cache.get(image_key)
+    if cached is None:
+        # Decode sekali ke salinan kerja yang sudah diperkecil, dipakai CNN dan YOLO
+        image, downscaled = load_working_image(image_bytes, WORKING_MAX_SIDE)
+        image_phash = perceptual_hash(image)
+        cached = result_cache.get_similar(image_phash)
+
+    if cached is not None:
+        return cached["class_name"], cached["confidence"], cached["processed_path"]
+
+    # Nama file berbasis isi (content-addressed): upload yang sama disimpan sekali.
+    # Jika diperkecil, salinan kerja yang disimpan agar box cocok saat render anotasi.
+    if downscaled:
+        filename = f"{image_key}.jpg"
+        upload_writer.save_image(filename, image)
+    else:
+        filename = f"{image_key}.{'jpg' if image_format == 'jpeg' else image_format}"
+        upload_writer.save(filename, image_bytes)
+    class_name, confidence, detections = vision_pipeline.run(image)
+    processed_path = None
+    if confidence > 0.45:
+        annotation_store.save(filename, detections)
+        processed_path = upload_storage.path_for(filename)
+    result_cache.put(image_key, image_phash, class_name, confidence, detections, processed_path)
+    return class_name, confidence, processed_path
+
+def sse_event(event, data):
+    """Format satu event server-sent events (data berupa JSON)."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def stream_ai_response(tokens, session_id, room_id, first_event=None):
+    """
+    Kirim jawaban LLM sebagai SSE (event token per potongan teks), lalu simpan
+    jawaban lengkap ke database saat stream selesai (event done).
+    :param tokens: iterator potongan teks dari RAGChatbot (retrieval sudah selesai)
+    :param first_event: event SSE yang dikirim sebelum token pertama (opsional)
+    """
+    def generate():
+        if first_event is not None:
+            yield first_event
+        parts = []
+        try:
+            for token in tokens:
+                parts.append(token)
+                yield sse_event("token", {"token": token})
+
+            ai_response_text = "".join(parts)
+            # Koneksi request sudah dikembalikan ke pool saat generator ini berjalan
+            db_conn = db_pool.acquire()
+            try:
+                db_conn.save_message(session_id, room_id, 'ai', ai_response_text)
+            finally:
+                db_pool.release(db_conn)
+            summarizer.schedule(session_id, room_id)
+            yield sse_event("done", {"response": ai_response_text})
+        except Exception as e:
+            print(f"An error occurred during response streaming: {e}")
+            yield sse_event("error", {"error": "An internal server error occurred"})
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route("/upload_img", methods=['POST'])
+def upload_image():
+    db_conn = get_db()
+
+    upload, error = parse_upload_request()
+    if error is not None:
+        return error
+    image_file, session_id, room_id = upload
 
     try:
-         # Bersihkan nama file (hapus spasi dan karakter aneh)
-        clean_name = secure_filename(image_file.filename)
-        clean_name = clean_name.replace(" ", "_")  # Ganti spasi dengan underscore
-        
-        filename = f"{uuid.uuid4().hex}_{clean_name}"
-        upload_path = os.path.join(UPLOAD_FOLDER, filename)
-        image_file.save(upload_path)
+        try:
+            class_name, confidence, processed_path = classify_upload(image_file.read())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        class_name, confidence = cnn_detector.detect_objects(upload_path)
         if confidence > 0.45:
-        # 🔥 Jalankan deteksi YOLO
+        # 🔥 Hasil deteksi YOLO
             user_message = f"Gambar telah diproses menggunakan CNN dengan hasil prediksi kelas: {class_name} dengan confidence: {confidence:.2f}."
             db_conn.save_message(session_id, room_id, 'user', user_message)
-            processed_path = yolo_detector.detect_objects(upload_path, filename_prefix="detected")
             
-            chat_history_from_db = db_conn.get_history(session_id, room_id)
-
-            # 3. Format history dan prompt (tidak ada perubahan di sini)
-            formatted_history = []
-            for role, msg in chat_history_from_db:
-                if role == 'user':
-                    formatted_history.append(f"Human: {msg}")
-                elif role == 'ai':
-                    formatted_history.append(f"Assistant: {msg}")
-
-            rag_context = "\n".join(formatted_history)
+            # Ringkasan percakapan + pesan terakhir sebagai riwayat prompt
+            rag_context = summarizer.build_context(db_conn, session_id, room_id)
             # Buat URL hasil
             processed_url = f"http://{request.host}/processed/{os.path.basename(processed_path)}"
             ai_response_text = rag_chatbot.generate_response_img(class_name, rag_context)
             db_conn.save_message(session_id, room_id, 'ai', ai_response_text)
+            summarizer.schedule(session_id, room_id)
             
             return jsonify({
                 "response": f"Gambar telah diproses menggunakan YOLO dan CNN dengan kelas: {class_name} dengan confidence: {confidence:.2f}.",
@@ -132,13 +396,46 @@ def upload_image():
                 "ai_response": ai_response_text
             }), 200
         else:
-            return jsonify({
-                "response": f"Gambar tidak dikenali sebagai penyakit tanaman.",
-                "image_url": None,
-                "ai_response": "Mohon unggah gambar yang jelas dari daun tanaman yang menunjukkan gejala penyakit untuk analisis lebih lanjut."
-            }), 200
-        
-        # Simpan balasan AI ke database
+            return jsonify(NOT_RECOGNIZED_RESPONSE), 200
+
+    except Exception as e:
+        print(f"An error occurred during image upload: {e}")
+        return jsonify({'error': 'An internal server error occurred'}), 500
+
+@app.route("/upload_img/stream", methods=['POST'])
+def upload_image_stream():
+    """
+    Sama seperti /upload_img, tetapi analisis AI dikirim sebagai SSE:
+    event result (kelas, confidence, image_url), event token berulang, lalu event done.
+    """
+    db_conn = get_db()
+
+    upload, error = parse_upload_request()
+    if error is not None:
+        return error
+    image_file, session_id, room_id = upload
+
+    try:
+        try:
+            class_name, confidence, processed_path = classify_upload(image_file.read())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if confidence <= 0.45:
+            return jsonify(NOT_RECOGNIZED_RESPONSE), 200
+
+        user_message = f"Gambar telah diproses menggunakan CNN dengan hasil prediksi kelas: {class_name} dengan confidence: {confidence:.2f}."
+        db_conn.save_message(session_id, room_id, 'user', user_message)
+        rag_context = summarizer.build_context(db_conn, session_id, room_id)
+        processed_url = f"http://{request.host}/processed/{os.path.basename(processed_path)}"
+
+        # Retrieval selesai di sini, sebelum byte pertama dikirim
+        tokens = rag_chatbot.stream_response_img(class_name, rag_context)
+        result_event = sse_event("result", {
+            "response": f"Gambar telah diproses menggunakan YOLO dan CNN dengan kelas: {class_name} dengan confidence: {confidence:.2f}.",
+            "image_url": processed_url
+        })
+        return stream_ai_response(tokens, session_id, room_id, first_event=result_event)
 
     except Exception as e:
         print(f"An error occurred during image upload: {e}")
@@ -161,23 +458,14 @@ def chat():
         # 1. Simpan pesan pengguna menggunakan koneksi saat ini
         db_conn.save_message(session_id, room_id, 'user', user_message)
 
-        # 2. Ambil riwayat percakapan
-        chat_history_from_db = db_conn.get_history(session_id, room_id)
-
-        # 3. Format history dan prompt (tidak ada perubahan di sini)
-        formatted_history = []
-        for role, msg in chat_history_from_db:
-            if role == 'user':
-                formatted_history.append(f"Human: {msg}")
-            elif role == 'ai':
-                formatted_history.append(f"Assistant: {msg}")
-
-        rag_context = "\n".join(formatted_history)
+        # 2. Ambil riwayat percakapan (ringkasan + pesan terakhir)
+        rag_context = summarizer.build_context(db_conn, session_id, room_id)
         
         ai_response_text = rag_chatbot.hybrid_search(user_message,rag_context)
 
         # 5. Simpan balasan AI
         db_conn.save_message(session_id, room_id, 'ai', ai_response_text)
+        summarizer.schedule(session_id, room_id)
 
         # 6. Kirim balasan
         return jsonify({'response': ai_response_text})
@@ -186,9 +474,57 @@ def chat():
         print(f"An error occurred during chat processing: {e}")
         return jsonify({'error': 'An internal server error occurred'}), 500
 
+@app.route("/chat/stream", methods=['POST'])
+def chat_stream():
+    """
+    Sama seperti /chat, tetapi jawaban dikirim sebagai SSE: event token untuk
+    tiap potongan teks lalu event done berisi jawaban lengkap.
+    """
+    db_conn = get_db()
+
+    data = request.json
+    session_id = data.get('session_id')
+    room_id = data.get('room_id')
+    user_message = data.get('message')
+
+    if not session_id or not user_message or not room_id:
+        return jsonify({'error': 'session_id and message are required'}), 400
+
+    try:
+        db_conn.save_message(session_id, room_id, 'user', user_message)
+        rag_context = summarizer.build_context(db_conn, session_id, room_id)
+
+        # Retrieval selesai di sini, sebelum byte pertama dikirim
+        tokens = rag_chatbot.stream_search(user_message, rag_context)
+        return stream_ai_response(tokens, session_id, room_id)
+
+    except Exception as e:
+        print(f"An error occurred during chat processing: {e}")
+        return jsonify({'error': 'An internal server error occurred'}), 500
+
 @app.route('/processed/<filename>')
 def serve_uploaded_image(filename):
-    return send_from_directory('processed', filename)
+    """
+    Gambar hasil deteksi, dirender saat pertama kali diminta lalu di-cache di PROCESSED_FOLDER.
+    Query: mode=bbox|heatmap (default bbox), size=sisi terpanjang dalam piksel (opsional).
+    """
+    filename = secure_filename(filename)
+    mode = request.args.get('mode', 'bbox')
+    if mode not in ANNOTATION_MODES:
+        return jsonify({'error': f'Invalid mode. Allowed modes: {", ".join(ANNOTATION_MODES)}'}), 400
+    try:
+        size = annotation_store.parse_size(request.args.get('size'))
+    except ValueError:
+        return jsonify({'error': 'size must be an integer'}), 400
+
+    processed_path = annotation_store.render(filename, mode, size)
+    if processed_path is None:
+        if annotation_store.is_evicted(filename):
+            # Gambar asli sudah dihapus karena kuota disk, anotasi tidak bisa dibuat ulang
+            return jsonify({'error': 'Image is no longer available'}), 410
+        # Hasil lama yang sudah dirender saat upload masih disajikan langsung
+        return send_from_directory(PROCESSED_FOLDER, filename)
+    return send_from_directory(PROCESSED_FOLDER, os.path.relpath(processed_path, PROCESSED_FOLDER))
 
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5002, debug=True)
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+Benchmark BM25: bm25_index.pkl (BM25Retriever LangChain + rank_bm25, di-unpickle)
+vs BM25Index (postings NumPy yang di-memory-map). Index baru dibangun di direktori
+sementara dari dokumen dan parameter pickle (read_retriever_pickle: k1, b, IDF rank_bm25).
+Mengukur waktu load, latensi query (p50/p95) dan overlap top-k.
+
+Waktu load diukur di subprocess terpisah agar cache modul/halaman tidak ikut terhitung.
+
+Jalankan dari root project:
+    python -m benchmark.bm25_index
+    python -m benchmark.bm25_index --pickle bm25_index.pkl --k 5 --repeat 50
+"""
+
+import argparse
+import pickle
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from module.bm25_index import BM25Index, read_retriever_pickle
+
+QUESTIONS = [
+    "Apa gejala penyakit black rot pada anggur?",
+    "Bagaimana cara mencegah penyakit downy mildew pada tanaman anggur?",
+    "Kapan waktu terbaik untuk pemupukan tanaman anggur?",
+    "Apa penyebab daun anggur menguning?",
+    "Bagaimana cara mengidentifikasi penyakit powdery mildew pada anggur?",
+    "Apa yang harus dilakukan jika tanaman anggur terkena penyakit leaf blight?",
+    "Bagaimana cara merawat tanaman anggur yang sehat?",
+    "Apa saja hama yang sering menyerang tanaman anggur?",
+]
+
+LOAD_SCRIPT = {
+    "pickle": "import pickle, time\n"
+              "from langchain_community.retrievers import BM25Retriever\n"
+              "start = time.perf_counter()\n"
+              "with open({path!r}, 'rb') as f:\n"
+              "    pickle.load(f)\n"
+              "print(time.perf_counter() - start)\n",
+    "mmap": "import time\n"
+            "from module.bm25_index import BM25Index\n"
+            "start = time.perf_counter()\n"
+            "BM25Index({path!r})\n"
+            "print(time.perf_counter() - start)\n",
+}
+
+
+def load_time(kind, path):
+    output = subprocess.run(
+        [sys.executable, "-c", LOAD_SCRIPT[kind].format(path=path)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def query_latencies(search, repeat):
+    latencies, results = [], {}
+    for _ in range(repeat):
+        for question in QUESTIONS:
+            start = time.perf_counter()
+            docs = search(question)
+            latencies.append(time.perf_counter() - start)
+            results[question] = [doc.page_content for doc in docs]
+    return latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pickle", default="bm25_index.pkl")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.pickle, "rb") as f:
+        retriever = pickle.load(f)
+    retriever.k = args.k
+    documents, params = read_retriever_pickle(args.pickle)
+    params["k"] = args.k
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = BM25Index.create(index_dir, documents, **params)
+
+        rows = []
+        for name, kind, path, search in (
+            ("pickle", "pickle", args.pickle, retriever.invoke),
+            ("mmap", "mmap", index_dir, lambda q: index.search(q, args.k)[0]),
+        ):
+            load = statistics.median(load_time(kind, path) for _ in range(3))
+            latencies, results = query_latencies(search, args.repeat)
+            rows.append((name, load, latencies, results))
+
+        reference = rows[0][3]
+        print(f"{'index':>8} | {'load (ms)':>9} | {'query p50 (ms)':>14} | {'query p95 (ms)':>14} | {'top-k overlap':>13}")
+        print("-" * 72)
+        for name, load, latencies, results in rows:
+            overlap = statistics.mean(
+                len(set(results[q]) & set(reference[q])) / max(len(reference[q]), 1) for q in QUESTIONS
+            )
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(f"{name:>8} | {load * 1000:>9.1f} | {statistics.median(latencies) * 1000:>14.3f} | "
+                  f"{p95 * 1000:>14.3f} | {overlap:>12.0%}")
+        print(f"\n{len(index)} dokumen, {index.num_terms} term")
+
+
+if __name__ == "__main__":
+    main()
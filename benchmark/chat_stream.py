@@ -0,0 +1,79 @@
+"""
+Time-to-first-token: /chat (jawaban utuh) vs /chat/stream (SSE) pada server yang sedang berjalan.
+Untuk /chat, byte pertama baru datang setelah seluruh jawaban selesai dibuat, jadi
+TTFT = total. Untuk /chat/stream, TTFT = waktu sampai event token pertama.
+
+Jalankan server (python app.py) lalu dari root project:
+    python -m benchmark.chat_stream --url http://localhost:5002 --requests 10
+"""
+
+import argparse
+import json
+import statistics
+import time
+import urllib.request
+
+QUESTIONS = [
+    "Apa gejala penyakit black rot pada daun anggur?",
+    "Bagaimana cara mencegah penyakit esca?",
+    "Apa penyebab daun anggur menguning?",
+    "Bagaimana penanganan awal leaf blight pada anggur?",
+]
+
+
+def post(url, payload):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    return urllib.request.urlopen(request, timeout=300)
+
+
+def measure_blocking(base_url, payload):
+    start = time.perf_counter()
+    with post(f"{base_url}/chat", payload) as response:
+        response.read()
+    total = time.perf_counter() - start
+    return total, total
+
+
+def measure_stream(base_url, payload):
+    start = time.perf_counter()
+    first_token = None
+    with post(f"{base_url}/chat/stream", payload) as response:
+        for line in response:
+            if first_token is None and line.startswith(b"event: token"):
+                first_token = time.perf_counter() - start
+            if line.startswith(b"event: done") or line.startswith(b"event: error"):
+                break
+    total = time.perf_counter() - start
+    return first_token if first_token is not None else total, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5002")
+    parser.add_argument("--requests", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':>12} | {'TTFT p50 (s)':>12} | {'TTFT p95 (s)':>12} | {'total p50 (s)':>13}")
+    print("-" * 60)
+    for label, measure in (("/chat", measure_blocking), ("/chat/stream", measure_stream)):
+        ttft, totals = [], []
+        for i in range(args.requests):
+            payload = {
+                "session_id": "benchmark",
+                "room_id": f"benchmark-{label}-{i}",
+                "message": QUESTIONS[i % len(QUESTIONS)],
+            }
+            first, total = measure(args.url, payload)
+            ttft.append(first)
+            totals.append(total)
+        p95 = statistics.quantiles(ttft, n=20)[-1] if len(ttft) > 1 else ttft[0]
+        print(f"{label:>12} | {statistics.median(ttft):>12.2f} | {p95:>12.2f} | {statistics.median(totals):>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
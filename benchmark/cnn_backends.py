@@ -0,0 +1,96 @@
+"""
+Perbandingan backend CNN (Keras / TFLite / ONNX Runtime): latensi, memori dan
+kesamaan prediksi terhadap Keras pada gambar contoh di folder cnn/.
+
+Setiap backend dijalankan di subprocess terpisah agar RSS dan waktu import terukur
+sendiri-sendiri. Ekspor model dulu dengan module/cnn_export.py, lalu:
+    python -m benchmark.cnn_backends \\
+        --backend keras="model/best_fusion_model(light)_(2025-11-06_18-17).h5" \\
+        --backend tflite=model/cnn_fp16.tflite \\
+        --backend tflite=model/cnn_int8.tflite \\
+        --backend onnx=model/cnn.onnx
+Backend pertama dipakai sebagai acuan akurasi.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def worker(backend, model_path, image_dir, repeat, num_threads):
+    start = time.perf_counter()
+    from module.cnn import CNNDetector
+    from module.cnn_export import calibration_images
+
+    detector = CNNDetector(model_path, backend=backend, num_threads=num_threads)
+    load_s = time.perf_counter() - start
+    if detector.backend is None:
+        raise SystemExit(f"Failed to load {backend} model from {model_path}")
+
+    images = [detector.preprocess(path) for path in calibration_images(image_dir)]
+    detector.predict_proba(images[:1])  # pemanasan
+
+    latencies = []
+    for _ in range(repeat):
+        for img in images:
+            t = time.perf_counter()
+            detector.predict_proba([img])
+            latencies.append((time.perf_counter() - t) * 1000)
+
+    probs = detector.predict_proba(images)
+    print(json.dumps({
+        "load_s": load_s,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        # ru_maxrss dalam KiB di Linux
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "probs": probs.tolist(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", action="append", default=[], help="nama_backend=path_model")
+    parser.add_argument("--images", default="cnn")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--worker", nargs=2, metavar=("BACKEND", "MODEL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker[0], args.worker[1], args.images, args.repeat, args.threads)
+        return
+    if not args.backend:
+        parser.error("at least one --backend is required")
+
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3")
+    results = []
+    for spec in args.backend:
+        backend, model_path = spec.split("=", 1)
+        cmd = [sys.executable, "-m", "benchmark.cnn_backends", "--worker", backend, model_path,
+               "--images", args.images, "--repeat", str(args.repeat)]
+        if args.threads:
+            cmd += ["--threads", str(args.threads)]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True, env=env).stdout
+        results.append((backend, model_path, json.loads(out.strip().splitlines()[-1])))
+
+    reference = np.asarray(results[0][2]["probs"])
+    print("| backend | model | size (MB) | load (s) | p50 (ms) | p95 (ms) | peak RSS (MB) | top-1 agree | max |dp| |")
+    print("|---|---|---|---|---|---|---|---|---|")
+    for backend, model_path, r in results:
+        probs = np.asarray(r["probs"])
+        agree = float(np.mean(probs.argmax(axis=1) == reference.argmax(axis=1)))
+        max_diff = float(np.max(np.abs(probs - reference)))
+        size_mb = os.path.getsize(model_path) / 1e6
+        print(f"| {backend} | {os.path.basename(model_path)} | {size_mb:.1f} | {r['load_s']:.2f} | "
+              f"{r['p50_ms']:.1f} | {r['p95_ms']:.1f} | {r['rss_mb']:.0f} | {agree:.0%} | {max_diff:.4f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark throughput CNNDetector (gambar/detik) dengan dan tanpa micro-batching
+pada konkurensi 1, 8 dan 32.
+
+Jalankan dari root project:
+    python -m benchmark.cnn_batching --model "model/best_fusion_model(light)_(2025-11-06_18-17).h5"
+"""
+
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+
+from module.cnn import CNNDetector
+
+
+def throughput(detector, images, concurrency, requests):
+    paths = [images[i % len(images)] for i in range(requests)]
+    # Pemanasan agar graph/alokasi TensorFlow tidak ikut terukur
+    detector.detect_objects(images[0])
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(detector.detect_objects, paths))
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="model/best_fusion_model(light)_(2025-11-06_18-17).h5")
+    parser.add_argument("--images", default="cnn")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=128)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    images = sorted(
+        path for ext in ("jpg", "jpeg", "png")
+        for path in glob.glob(os.path.join(args.images, f"*.{ext}"))
+    )
+    baseline = CNNDetector(args.model)
+    batched = CNNDetector(args.model, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+
+    print(f"{'concurrency':>11} | {'batch=1 (img/s)':>15} | {'micro-batch (img/s)':>19}")
+    print("-" * 52)
+    for concurrency in args.concurrency:
+        single = throughput(baseline, images, concurrency, args.requests)
+        multi = throughput(batched, images, concurrency, args.requests)
+        print(f"{concurrency:>11} | {single:>15.1f} | {multi:>19.1f}")
+    batched.batcher.stop()
+
+
+if __name__ == "__main__":
+    main()
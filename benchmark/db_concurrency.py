@@ -0,0 +1,115 @@
+"""
+Benchmark throughput baca chat_history saat ada penulis konkuren.
+
+Membandingkan pola lama (connect + init_db per request, rollback journal)
+dengan ConnectionPool (koneksi dipakai ulang, WAL).
+
+Jalankan dari root project:
+    python -m benchmark.db_concurrency --readers 8 --seconds 5
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from module.db import ConnectionPool, Database
+
+
+def seed(db, rooms, per_room):
+    for r in range(rooms):
+        for i in range(per_room):
+            db.cursor.execute(
+                "INSERT INTO chat_history (session_id, room_id, role, message) VALUES (?, ?, ?, ?)",
+                ("session", f"room-{r}", "user" if i % 2 == 0 else "ai", "Apa penyebab penyakit ESCA?")
+            )
+    db.conn.commit()
+
+
+def run(acquire, release, readers, seconds, rooms):
+    """Jalankan N pembaca + 1 penulis selama `seconds`, kembalikan (reads/s, writes/s)."""
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def reader(idx):
+        n = 0
+        while not stop.is_set():
+            db = acquire()
+            try:
+                db.get_history("session", f"room-{(idx + n) % rooms}", max_messages=50)
+                n += 1
+            except Exception:
+                with lock:
+                    counts["errors"] += 1
+            finally:
+                release(db)
+        with lock:
+            counts["reads"] += n
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            db = acquire()
+            try:
+                db.save_message("session", f"room-{n % rooms}", "user", "Bagaimana cara mencegah downy mildew?")
+                n += 1
+            except Exception:
+                with lock:
+                    counts["errors"] += 1
+            finally:
+                release(db)
+        with lock:
+            counts["writes"] += n
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return counts["reads"] / seconds, counts["writes"] / seconds, counts["errors"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--per-room", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        pooled_path = os.path.join(tmp, "pooled.db")
+        for path in (legacy_path, pooled_path):
+            db = Database(path)
+            db.init_db()
+            seed(db, args.rooms, args.per_room)
+            db.close()
+
+        def legacy_acquire():
+            # Pola lama app.get_db(): koneksi baru + cek skema di setiap request
+            db = Database(legacy_path)
+            db.init_db()
+            return db
+
+        pool = ConnectionPool(pooled_path, max_idle=max(args.readers) + 1)
+
+        print(f"{'readers':>7} | {'mode':>12} | {'reads/s':>10} | {'writes/s':>9} | {'errors':>6}")
+        print("-" * 57)
+        for readers in args.readers:
+            for name, acquire, release in (
+                ("per-request", legacy_acquire, lambda db: db.close()),
+                ("pool+WAL", pool.acquire, pool.release),
+            ):
+                reads, writes, errors = run(acquire, release, readers, args.seconds, args.rooms)
+                print(f"{readers:>7} | {name:>12} | {reads:>10.0f} | {writes:>9.0f} | {errors:>6}")
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
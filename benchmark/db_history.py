@@ -0,0 +1,89 @@
+"""
+Benchmark latensi Database.get_history terhadap ukuran tabel chat_history.
+
+Jalankan dari root project:
+    python -m benchmark.db_history --sizes 10000 100000 1000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from module.db import Database
+
+
+def fill_table(db, target_rows, rooms, batch=50000):
+    """Isi chat_history sampai target_rows baris, pesan tersebar acak di banyak room."""
+    current = db.cursor.execute("SELECT COUNT(*) FROM chat_history").fetchone()[0]
+    while current < target_rows:
+        n = min(batch, target_rows - current)
+        rows = []
+        for _ in range(n):
+            session_id, room_id = random.choice(rooms)
+            role = random.choice(("user", "ai"))
+            rows.append((session_id, room_id, role, "Bagaimana cara mengatasi penyakit black rot pada daun anggur?"))
+        db.cursor.executemany(
+            "INSERT INTO chat_history (session_id, room_id, role, message) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        db.conn.commit()
+        current += n
+
+
+def time_query(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--rooms", type=int, default=20_000)
+    parser.add_argument("--window", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rooms = [(f"session-{i % 2000}", f"room-{i}") for i in range(args.rooms)]
+    target = rooms[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        indexed = Database(os.path.join(tmp, "indexed.db"))
+        indexed.init_db()
+
+        # Tabel tanpa index (skema lama) sebagai pembanding
+        legacy = Database(os.path.join(tmp, "legacy.db"))
+        legacy.cursor.execute('''
+            CREATE TABLE chat_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                room_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                message TEXT NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        print(f"{'rows':>10} | {'legacy full (ms)':>16} | {'indexed full (ms)':>17} | {'indexed last-N (ms)':>19}")
+        print("-" * 72)
+        for size in args.sizes:
+            fill_table(legacy, size, rooms)
+            fill_table(indexed, size, rooms)
+
+            legacy_ms = time_query(lambda: legacy.cursor.execute(
+                "SELECT role, message FROM chat_history WHERE session_id = ? AND room_id = ? ORDER BY timestamp ASC",
+                target
+            ).fetchall(), max(1, args.repeat // 10))
+            full_ms = time_query(lambda: indexed.get_history(*target), args.repeat)
+            window_ms = time_query(lambda: indexed.get_history(*target, max_messages=args.window), args.repeat)
+            print(f"{size:>10} | {legacy_ms:>16.3f} | {full_ms:>17.3f} | {window_ms:>19.3f}")
+
+        legacy.close()
+        indexed.close()
+
+
+if __name__ == "__main__":
+    main()
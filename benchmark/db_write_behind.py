@@ -0,0 +1,67 @@
+"""
+Benchmark throughput giliran chat (turns/s) dengan dan tanpa write-behind.
+
+Satu giliran meniru /chat: save_message(user) -> get_history -> save_message(ai).
+Jalankan dari root project:
+    python -m benchmark.db_write_behind --workers 1 8 32 --seconds 5
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from module.db import ConnectionPool
+
+
+def run(pool, workers, seconds, history_window):
+    stop = threading.Event()
+    turns = []
+
+    def worker(idx):
+        n = 0
+        room = f"room-{idx}"
+        while not stop.is_set():
+            db = pool.acquire()
+            try:
+                db.save_message("session", room, "user", "Apa gejala penyakit leaf blight?")
+                db.get_history("session", room, max_messages=history_window)
+                db.save_message("session", room, "ai", "Leaf blight ditandai bercak coklat pada daun...")
+                n += 1
+            finally:
+                pool.release(db)
+        turns.append(n)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(turns) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--window", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} | {'sync (turns/s)':>14} | {'write-behind (turns/s)':>22}")
+    print("-" * 51)
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            results = []
+            for write_behind in (False, True):
+                path = os.path.join(tmp, f"bench_{workers}_{int(write_behind)}.db")
+                pool = ConnectionPool(path, max_idle=workers + 1, write_behind=write_behind)
+                results.append(run(pool, workers, args.seconds, args.window))
+                pool.close_all()
+            print(f"{workers:>7} | {results[0]:>14.0f} | {results[1]:>22.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark beban embed_query: tanpa batching (setiap request satu forward pass batch 1)
+vs BatchedEmbeddings (query konkuren digabung per jendela waktu). Untuk tiap tingkat
+konkurensi, N thread memanggil embed_query dengan query berbeda selama --duration
+detik; yang dilaporkan embeddings/detik dan latensi p50/p95 per query.
+
+Jalankan dari root project:
+    python -m benchmark.embedding_batching
+    python -m benchmark.embedding_batching --concurrency 1 4 16 --wait-ms 2 5 10 --onnx-dir model/indobert_onnx_int8
+"""
+
+import argparse
+import itertools
+import statistics
+import threading
+import time
+
+from module.rag import BatchedEmbeddings
+
+QUESTIONS = [
+    "Apa gejala penyakit black rot pada anggur?",
+    "Bagaimana cara mencegah penyakit downy mildew pada tanaman anggur?",
+    "Kapan waktu terbaik untuk pemupukan tanaman anggur?",
+    "Apa penyebab daun anggur menguning?",
+    "Bagaimana cara mengidentifikasi penyakit powdery mildew pada anggur?",
+    "Apa yang harus dilakukan jika tanaman anggur terkena penyakit leaf blight?",
+    "Bagaimana cara merawat tanaman anggur yang sehat?",
+    "Apa saja hama yang sering menyerang tanaman anggur?",
+]
+
+
+def load_model(onnx_dir, threads):
+    if onnx_dir:
+        from module.onnx_embeddings import OnnxEmbeddings
+
+        return OnnxEmbeddings(onnx_dir, num_threads=threads)
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name="LazarusNLP/all-indobert-base-v2",
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": True}
+    )
+
+
+def run_load(model, concurrency, duration):
+    # Query unik per panggilan agar tidak ada deduplikasi di dalam batch
+    counter = itertools.count()
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        local = []
+        while time.perf_counter() < deadline:
+            i = next(counter)
+            query = f"{QUESTIONS[i % len(QUESTIONS)]} ({i})"
+            start = time.perf_counter()
+            model.embed_query(query)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+    return len(latencies) / elapsed, statistics.median(latencies), p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--wait-ms", type=float, nargs="+", default=[5])
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--onnx-dir", default=None, help="pakai OnnxEmbeddings (default: PyTorch)")
+    parser.add_argument("--threads", type=int, default=None, help="thread ONNX Runtime")
+    args = parser.parse_args()
+
+    base = load_model(args.onnx_dir, args.threads)
+    base.embed_query(QUESTIONS[0])
+
+    configs = [("unbatched", base, None)]
+    for wait_ms in args.wait_ms:
+        batched = BatchedEmbeddings(base, max_batch_size=args.max_batch, max_wait_ms=wait_ms)
+        configs.append((f"batched {wait_ms:g}ms", batched, batched))
+
+    print(f"{'mode':>16} | {'concurrency':>11} | {'emb/s':>8} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'avg batch':>9}")
+    print("-" * 78)
+    for name, model, batched in configs:
+        for concurrency in args.concurrency:
+            before = batched.stats() if batched else None
+            throughput, p50, p95 = run_load(model, concurrency, args.duration)
+            avg_batch = "-"
+            if batched:
+                after = batched.stats()
+                batches = after["batches"] - before["batches"]
+                avg_batch = f"{(after['queries'] - before['queries']) / batches:.1f}" if batches else "-"
+            print(f"{name:>16} | {concurrency:>11} | {throughput:>8.1f} | {p50 * 1000:>9.1f} | "
+                  f"{p95 * 1000:>9.1f} | {avg_batch:>9}")
+        if batched:
+            batched.stop()
+
+
+if __name__ == "__main__":
+    main()
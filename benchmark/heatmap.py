@@ -0,0 +1,71 @@
+"""
+Benchmark renderer heatmap YOLO: renderer asli (resolusi penuh + GaussianBlur)
+vs render_heatmap (resolusi rendah, separable, blur analitik), plus selisih piksel
+hasil overlay sebagai cek kesamaan visual.
+
+Jalankan dari root project:
+    python -m benchmark.heatmap
+    python -m benchmark.heatmap --sizes 3000x4000 --boxes 1 10 50
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from module.heatmap import render_heatmap, render_heatmap_reference
+
+
+def random_boxes(rng, h, w, n):
+    x1 = rng.uniform(0, w * 0.8, n)
+    y1 = rng.uniform(0, h * 0.8, n)
+    bw = rng.uniform(0.02, 0.2, n) * w
+    bh = rng.uniform(0.02, 0.2, n) * h
+    return np.stack([x1, y1, x1 + bw, y1 + bh], axis=1), rng.uniform(0.25, 1.0, n)
+
+
+def timed(fn, repeat, *args, **kwargs):
+    best, output = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default="cnn/esca.jpg")
+    parser.add_argument("--sizes", nargs="+", default=["480x640", "1500x2000", "3000x4000"],
+                        help="ukuran gambar HxW (gambar --image di-resize)")
+    parser.add_argument("--boxes", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--sigma", type=int, default=50)
+    parser.add_argument("--max-side", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    source = cv2.imread(args.image)
+    if source is None:
+        source = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+
+    print(f"{'size':>10} | {'boxes':>5} | {'asli (ms)':>10} | {'cepat (ms)':>10} | {'speedup':>7} | "
+          f"{'mean |d|':>8} | {'p99 |d|':>7} | {'PSNR (dB)':>9}")
+    print("-" * 90)
+    for size in args.sizes:
+        h, w = map(int, size.lower().split("x"))
+        image = cv2.resize(source, (w, h))
+        for n in args.boxes:
+            boxes, confs = random_boxes(rng, h, w, n)
+            ref_ms, ref = timed(render_heatmap_reference, 1, image, boxes, confs, sigma=args.sigma)
+            fast_ms, fast = timed(render_heatmap, args.repeat, image, boxes, confs,
+                                  sigma=args.sigma, max_side=args.max_side)
+            diff = np.abs(ref.astype(np.int16) - fast.astype(np.int16))
+            psnr = cv2.PSNR(ref, fast)
+            print(f"{size:>10} | {n:>5} | {ref_ms:>10.1f} | {fast_ms:>10.1f} | {ref_ms / fast_ms:>6.0f}x | "
+                  f"{diff.mean():>8.2f} | {np.percentile(diff, 99):>7.0f} | {psnr:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark retrieval hybrid: EnsembleRetriever LangChain (dense lalu BM25 berurutan,
+fusion RRF di Python) vs ParallelHybridRetriever (dense dan BM25 paralel, fusion NumPy).
+Mengukur latensi per query (p50/p95) dan overlap dokumen hasil terhadap EnsembleRetriever.
+
+Cache embedding query dimatikan agar setiap query benar-benar di-encode IndoBERT.
+
+Jalankan dari root project:
+    python -m benchmark.hybrid_retrieval
+    python -m benchmark.hybrid_retrieval --vector-dir vectorstore_chroma_db1 --repeat 5
+"""
+
+import argparse
+import statistics
+import time
+
+from langchain.retrievers import EnsembleRetriever
+from langchain_community.retrievers import BM25Retriever
+
+from module.hybrid import ChromaSearcher, ParallelHybridRetriever
+from module.rag import RAGChatbot
+
+QUESTIONS = [
+    "Apa gejala penyakit black rot pada anggur?",
+    "Bagaimana cara mencegah penyakit downy mildew pada tanaman anggur?",
+    "Kapan waktu terbaik untuk pemupukan tanaman anggur?",
+    "Apa penyebab daun anggur menguning?",
+    "Bagaimana cara mengidentifikasi penyakit powdery mildew pada anggur?",
+    "Apa yang harus dilakukan jika tanaman anggur terkena penyakit leaf blight?",
+    "Bagaimana cara merawat tanaman anggur yang sehat?",
+    "Apa saja hama yang sering menyerang tanaman anggur?",
+]
+
+
+def measure(retriever, repeat):
+    latencies, results = [], {}
+    for _ in range(repeat):
+        for question in QUESTIONS:
+            start = time.perf_counter()
+            docs = retriever.invoke(question)
+            latencies.append(time.perf_counter() - start)
+            results[question] = [doc.page_content for doc in docs]
+    return latencies, results
+
+
+def overlap(results, reference):
+    ratios = []
+    for question, expected in reference.items():
+        expected = set(expected)
+        if expected:
+            ratios.append(len(expected & set(results[question])) / len(expected))
+    return statistics.mean(ratios) if ratios else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-dir", default="vectorstore_chroma_db1")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--weights", type=float, nargs=2, default=(0.8, 0.2))
+    args = parser.parse_args()
+
+    chatbot = RAGChatbot(None, args.vector_dir, embedding_cache_size=0)
+    chatbot._ensure_initialized()
+    if chatbot.vector_store is None or chatbot.bm25_index is None:
+        print("Vector store atau index BM25 tidak tersedia, benchmark dibatalkan.")
+        return
+
+    # Baseline: BM25Retriever (rank_bm25) di atas dokumen yang sama dengan index BM25
+    bm25_retriever = BM25Retriever.from_documents(chatbot.bm25_index.documents(), k=5)
+    vector_retriever = chatbot.vector_store.as_retriever(search_kwargs={"k": 5})
+    retrievers = [
+        ("ensemble", EnsembleRetriever(
+            retrievers=[vector_retriever, bm25_retriever],
+            weights=list(args.weights)
+        )),
+    ]
+    for method in ("rrf", "blend"):
+        retrievers.append((f"parallel-{method}", ParallelHybridRetriever(
+            ChromaSearcher(chatbot.vector_store),
+            chatbot.bm25_index,
+            method=method,
+            weights=args.weights,
+            dense_k=5,
+            sparse_k=5
+        )))
+
+    # Pemanasan (load model ke cache CPU, koneksi Chroma)
+    for _, retriever in retrievers:
+        retriever.invoke(QUESTIONS[0])
+
+    print(f"{'retriever':>15} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'overlap vs ensemble':>19}")
+    print("-" * 62)
+    reference = None
+    for name, retriever in retrievers:
+        latencies, results = measure(retriever, args.repeat)
+        if reference is None:
+            reference = results
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+        print(f"{name:>15} | {statistics.median(latencies) * 1000:>9.1f} | {p95 * 1000:>9.1f} | "
+              f"{overlap(results, reference):>18.0%}")
+        if isinstance(retriever, ParallelHybridRetriever):
+            retriever.shutdown()
+
+
+if __name__ == "__main__":
+    main()
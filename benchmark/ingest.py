@@ -0,0 +1,105 @@
+"""
+Benchmark decode upload: decode penuh (cv2.imdecode, cara lama) vs salinan kerja
+load_working_image (draft mode JPEG + satu downscale). Mengukur waktu decode dan
+memori per upload (ukuran array hasil + kenaikan RSS puncak di subprocess terpisah).
+
+Gambar contoh di cnn/ di-upscale dan di-encode ulang ke --sizes untuk meniru foto ponsel.
+
+Jalankan dari root project:
+    python -m benchmark.ingest
+    python -m benchmark.ingest --sizes 4000x3000 --max-side 1024
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from module.ingest import load_working_image
+
+METHODS = ("full", "working")
+
+
+def decode_image(data):
+    """Decode penuh ke array BGR di memori (cara lama, sebelum load_working_image)."""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Uploaded file is not a valid image")
+    return image
+
+
+def make_upload(source, size, fmt):
+    w, h = map(int, size.lower().split("x"))
+    image = cv2.resize(cv2.imread(source), (w, h), interpolation=cv2.INTER_CUBIC)
+    return cv2.imencode(f".{fmt}", image)[1].tobytes()
+
+
+def decode(method, data, max_side):
+    if method == "full":
+        return decode_image(data)
+    return load_working_image(data, max_side)[0]
+
+
+def worker(method, data_path, max_side, repeat):
+    with open(data_path, "rb") as f:
+        data = f.read()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    image = decode(method, data, max_side)
+    # ru_maxrss dalam KiB di Linux
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(method, data, max_side)
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(json.dumps({
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "array_mb": image.nbytes / 1e6,
+        "shape": list(image.shape),
+        "rss_peak_mb": rss_peak / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default="cnn/test.jpg")
+    parser.add_argument("--sizes", nargs="+", default=["1280x960", "3000x2250", "4000x3000"])
+    parser.add_argument("--formats", nargs="+", default=["jpg", "png"])
+    parser.add_argument("--max-side", type=int, default=1280)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--worker", nargs=2, metavar=("METHOD", "DATA"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker[0], args.worker[1], args.max_side, args.repeat)
+        return
+
+    print(f"{'upload':>14} | {'method':>7} | {'decode p50 (ms)':>15} | {'array (MB)':>10} | "
+          f"{'RSS peak (MB)':>13} | shape")
+    print("-" * 86)
+    tmp_path = f".ingest-bench-{os.getpid()}"
+    try:
+        for fmt in args.formats:
+            for size in args.sizes:
+                with open(tmp_path, "wb") as f:
+                    f.write(make_upload(args.image, size, fmt))
+                for method in METHODS:
+                    cmd = [sys.executable, "-m", "benchmark.ingest", "--worker", method, tmp_path,
+                           "--max-side", str(args.max_side), "--repeat", str(args.repeat)]
+                    result = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+                    print(f"{f'{size} {fmt}':>14} | {method:>7} | {result['p50_ms']:>15.1f} | "
+                          f"{result['array_mb']:>10.1f} | {result['rss_peak_mb']:>13.1f} | {result['shape']}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark embedding IndoBERT: HuggingFaceEmbeddings (PyTorch, sentence-transformers)
+vs OnnxEmbeddings (ONNX Runtime, hasil `python -m module.onnx_embeddings`).
+
+1. Parity: cosine similarity embedding PyTorch vs ONNX untuk pertanyaan contoh dan
+   paragraf knowledge base; keluar dengan kode 1 jika minimum < --min-cosine.
+2. Throughput: embed_query satu per satu (query/detik) dan embed_documents bulk
+   (dokumen/detik) untuk tiap jumlah thread ONNX.
+
+Jalankan dari root project:
+    python -m benchmark.onnx_embeddings --onnx-dir model/indobert_onnx_int8
+    python -m benchmark.onnx_embeddings --onnx-dir model/indobert_onnx --threads 1 2 4 --docs 256
+"""
+
+import argparse
+import re
+import sys
+import time
+
+import numpy as np
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from module.onnx_embeddings import DEFAULT_MODEL_NAME, OnnxEmbeddings
+
+QUESTIONS = [
+    "Apa gejala penyakit black rot pada anggur?",
+    "Bagaimana cara mencegah penyakit downy mildew pada tanaman anggur?",
+    "Kapan waktu terbaik untuk pemupukan tanaman anggur?",
+    "Apa penyebab daun anggur menguning?",
+    "Bagaimana cara mengidentifikasi penyakit powdery mildew pada anggur?",
+    "Apa yang harus dilakukan jika tanaman anggur terkena penyakit leaf blight?",
+    "Bagaimana cara merawat tanaman anggur yang sehat?",
+    "Apa saja hama yang sering menyerang tanaman anggur?",
+]
+
+
+def load_paragraphs(paths, limit):
+    paragraphs = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for block in re.split(r"\n\s*\n", f.read()):
+                block = block.strip()
+                if len(block) >= 80:
+                    paragraphs.append(block)
+    return paragraphs[:limit]
+
+
+def queries_per_second(model, questions, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for question in questions:
+            model.embed_query(question)
+    return repeat * len(questions) / (time.perf_counter() - start)
+
+
+def documents_per_second(model, documents):
+    start = time.perf_counter()
+    model.embed_documents(documents)
+    return len(documents) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--onnx-dir", default="model/indobert_onnx_int8")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--docs", type=int, default=128)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    documents = load_paragraphs(["leaf_diseases.md", "plants.md"], args.docs)
+    torch_model = HuggingFaceEmbeddings(
+        model_name=DEFAULT_MODEL_NAME,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": True}
+    )
+
+    # 1. Parity
+    onnx_model = OnnxEmbeddings(args.onnx_dir, num_threads=args.threads[-1])
+    texts = QUESTIONS + documents
+    reference = np.asarray(torch_model.embed_documents(texts), dtype=np.float32)
+    candidate = onnx_model.encode(texts)
+    cosine = (reference * candidate).sum(axis=1)
+    query_cosine = np.asarray([
+        np.dot(torch_model.embed_query(q), onnx_model.embed_query(q)) for q in QUESTIONS
+    ])
+    print(f"Parity ({onnx_model.model_name}, {len(texts)} teks): "
+          f"cosine min {cosine.min():.5f}, mean {cosine.mean():.5f}; embed_query min {query_cosine.min():.5f}")
+
+    # 2. Throughput
+    print(f"\n{'backend':>14} | {'threads':>7} | {'query/s':>8} | {'docs/s':>8}")
+    print("-" * 48)
+    print(f"{'torch':>14} | {'-':>7} | {queries_per_second(torch_model, QUESTIONS, args.repeat):>8.1f} | "
+          f"{documents_per_second(torch_model, documents):>8.1f}")
+    for threads in args.threads:
+        model = OnnxEmbeddings(args.onnx_dir, num_threads=threads)
+        model.embed_query(QUESTIONS[0])
+        print(f"{'onnx':>14} | {threads:>7} | {queries_per_second(model, QUESTIONS, args.repeat):>8.1f} | "
+              f"{documents_per_second(model, documents):>8.1f}")
+
+    if min(cosine.min(), query_cosine.min()) < args.min_cosine:
+        print(f"\nFAIL: cosine parity di bawah {args.min_cosine}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
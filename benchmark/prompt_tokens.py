@@ -0,0 +1,75 @@
+"""
+Benchmark ukuran {chat_history} di prompt terhadap jumlah giliran percakapan:
+riwayat penuh vs ringkasan bergulir + tail dengan anggaran token.
+
+LLM diganti peringkas tiruan (tanpa panggilan Gemini) yang memotong teks
+sepanjang max_words, jadi angka yang keluar adalah batas atas ukuran prompt.
+Jalankan dari root project:
+    python -m benchmark.prompt_tokens --turns 200 --tail-tokens 1500
+"""
+
+import argparse
+import os
+import tempfile
+
+from module.db import ConnectionPool, estimate_tokens
+from module.summary import ConversationSummarizer, format_messages
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeSummaryLLM:
+    def __init__(self, max_words):
+        self.max_words = max_words
+
+    def invoke(self, prompt):
+        words = prompt.split("=== PESAN BARU ===", 1)[-1].split()
+        return _Response(" ".join(words[-self.max_words:]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--tail-tokens", type=int, default=1500)
+    parser.add_argument("--min-chunk-tokens", type=int, default=400)
+    parser.add_argument("--max-words", type=int, default=200)
+    parser.add_argument("--every", type=int, default=20, help="cetak setiap N giliran")
+    args = parser.parse_args()
+
+    question = "Bagaimana cara mengendalikan penyakit downy mildew pada daun anggur saat musim hujan?"
+    answer = ("Downy mildew disebabkan oleh Plasmopara viticola. Pangkas daun yang terinfeksi, "
+              "perbaiki sirkulasi udara, hindari penyiraman dari atas dan gunakan fungisida berbahan "
+              "tembaga sesuai dosis anjuran. ") * 3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(os.path.join(tmp, "bench.db"))
+        summarizer = ConversationSummarizer(
+            FakeSummaryLLM(args.max_words), pool,
+            tail_tokens=args.tail_tokens,
+            min_chunk_tokens=args.min_chunk_tokens,
+            max_words=args.max_words
+        )
+        db = pool.acquire()
+
+        print(f"{'turn':>5} | {'full history (tokens)':>21} | {'summary + tail (tokens)':>23}")
+        print("-" * 56)
+        for turn in range(1, args.turns + 1):
+            db.save_message("session", "room", "user", question)
+            full = estimate_tokens(format_messages(db.get_history("session", "room")))
+            compact = estimate_tokens(summarizer.build_context(db, "session", "room"))
+            db.save_message("session", "room", "ai", answer)
+            # Sinkron agar hasil deterministik (di aplikasi dijalankan lewat schedule())
+            summarizer._update("session", "room")
+            if turn == 1 or turn % args.every == 0:
+                print(f"{turn:>5} | {full:>21} | {compact:>23}")
+
+        pool.release(db)
+        summarizer.shutdown()
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
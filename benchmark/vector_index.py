@@ -0,0 +1,116 @@
+"""
+Benchmark vector store dense: Chroma (client + SQLite + HNSW) vs VectorIndex
+(array mmap float32/float16/int8, top-k exact lewat satu matvec; opsional HNSW).
+Index diekspor dari direktori Chroma ke direktori sementara, query di-embed sekali
+dengan IndoBERT, lalu yang diukur hanya pencarian by-vector: latensi p50/p95,
+recall@k terhadap pencarian exact float32, dan ukuran index di disk.
+
+Jalankan dari root project:
+    python -m benchmark.vector_index
+    python -m benchmark.vector_index --chroma-dir rag-final/chroma_db1 --k 5 --repeat 50
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from module.vector_index import VectorIndex, export_chroma
+
+EMBEDDING_NAME = "LazarusNLP/all-indobert-base-v2"
+QUESTIONS = [
+    "Apa gejala penyakit black rot pada anggur?",
+    "Bagaimana cara mencegah penyakit downy mildew pada tanaman anggur?",
+    "Kapan waktu terbaik untuk pemupukan tanaman anggur?",
+    "Apa penyebab daun anggur menguning?",
+    "Bagaimana cara mengidentifikasi penyakit powdery mildew pada anggur?",
+    "Apa yang harus dilakukan jika tanaman anggur terkena penyakit leaf blight?",
+    "Bagaimana cara merawat tanaman anggur yang sehat?",
+    "Apa saja hama yang sering menyerang tanaman anggur?",
+]
+
+
+def directory_size(path):
+    return sum(
+        os.path.getsize(os.path.join(dirpath, name))
+        for dirpath, _, filenames in os.walk(path)
+        for name in filenames
+    )
+
+
+def measure(search, queries, repeat):
+    latencies, results = [], []
+    for _ in range(repeat):
+        results = []
+        for query in queries:
+            start = time.perf_counter()
+            texts = search(query)
+            latencies.append(time.perf_counter() - start)
+            results.append(texts)
+    return latencies, results
+
+
+def recall(results, reference):
+    return statistics.mean(
+        len(set(found) & set(expected)) / max(len(expected), 1)
+        for found, expected in zip(results, reference)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chroma-dir", default="rag-final/chroma_db2")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    embeddings = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_NAME,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": True}
+    )
+    queries = [np.asarray(vector, dtype=np.float32) for vector in embeddings.embed_documents(QUESTIONS)]
+
+    client = chromadb.PersistentClient(path=args.chroma_dir)
+    collection = client.get_collection(client.list_collections()[0].name)
+
+    def chroma_search(query):
+        return collection.query(query_embeddings=[query.tolist()], n_results=args.k, include=["documents"])["documents"][0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [("chroma", chroma_search, directory_size(args.chroma_dir))]
+        variants = [("float32", None), ("float16", None), ("int8", None), ("float16", 0)]
+        for dtype, hnsw_threshold in variants:
+            name = f"numpy-{dtype}" + ("-hnsw" if hnsw_threshold is not None else "")
+            output = os.path.join(tmp, name)
+            try:
+                export_chroma(args.chroma_dir, output, dtype=dtype, hnsw_threshold=hnsw_threshold)
+            except ImportError:
+                print(f"Lewati {name}: hnswlib tidak terpasang")
+                continue
+            index = VectorIndex(output)
+
+            def search(query, index=index):
+                return [doc.page_content for doc, _ in index.similarity_search_by_vector_with_score(query, args.k)]
+
+            backends.append((name, search, directory_size(output)))
+
+        # Referensi recall: exact float32
+        reference = measure(backends[1][1], queries, 1)[1]
+        print(f"{'backend':>20} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {f'recall@{args.k}':>9} | {'disk (MB)':>9}")
+        print("-" * 70)
+        for name, search, size in backends:
+            search(queries[0])
+            latencies, results = measure(search, queries, args.repeat)
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(f"{name:>20} | {statistics.median(latencies) * 1000:>9.3f} | {p95 * 1000:>9.3f} | "
+                  f"{recall(results, reference):>9.0%} | {size / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark latensi pipeline visi upload: CNN lalu YOLO berurutan vs YOLO spekulatif
+paralel dengan CNN (VisionPipeline). Mencetak p50/p95 per gambar untuk kedua mode.
+
+Jalankan dari root project:
+    python -m benchmark.vision_pipeline
+    python -m benchmark.vision_pipeline --cnn-backend onnx --cnn-model model/cnn.onnx
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+
+from module.cnn import CNNDetector
+from module.ingest import load_working_image
+from module.vision import VisionPipeline
+from module.yolo import YOLODetector
+
+
+def latencies(pipeline, images, rounds):
+    # Pemanasan agar graph TensorFlow / PyTorch tidak ikut terukur
+    pipeline.run(images[0][1])
+    samples = []
+    for _ in range(rounds):
+        for _, image in images:
+            start = time.perf_counter()
+            pipeline.run(image)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(samples, q):
+    return statistics.quantiles(samples, n=100)[q - 1] if len(samples) > 1 else samples[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cnn-model", default="model/best_fusion_model(light)_(2025-11-06_18-17).h5")
+    parser.add_argument("--cnn-backend", default="keras")
+    parser.add_argument("--yolo-model", default="model/yolo.pt")
+    parser.add_argument("--images", default="cnn")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = sorted(
+        path for ext in ("jpg", "jpeg", "png")
+        for path in glob.glob(os.path.join(args.images, f"*.{ext}"))
+    )
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append((os.path.basename(path), load_working_image(f.read())[0]))
+
+    cnn = CNNDetector(args.cnn_model, backend=args.cnn_backend)
+    output_dir = tempfile.mkdtemp(prefix="vision-bench-")
+    yolo = YOLODetector(model_path=args.yolo_model, output_dir=output_dir)
+
+    print(f"{'mode':>12} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'mean (ms)':>9}")
+    print("-" * 50)
+    for label, speculative in (("sequential", False), ("speculative", True)):
+        pipeline = VisionPipeline(cnn, yolo, speculative=speculative)
+        samples = latencies(pipeline, images, args.rounds)
+        print(f"{label:>12} | {percentile(samples, 50):>9.1f} | {percentile(samples, 95):>9.1f} | "
+              f"{statistics.mean(samples):>9.1f}")
+        if speculative:
+            print(f"YOLO spekulatif dibatalkan: {pipeline.cancelled}, dibuang: {pipeline.discarded}")
+        pipeline.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark latensi vs recall deteksi YOLO untuk foto resolusi tinggi:
+prediksi standar (di-downsample ultralytics) vs mode tiling dengan beberapa
+ukuran tile/overlap, dengan dan tanpa process pool.
+
+Tidak ada label ground truth, jadi acuan recall adalah prediksi satu kali pada
+resolusi asli (imgsz = sisi terpanjang, sangat lambat di CPU). Gambar di cnn/
+kecil, sehingga di-upscale dulu ke --long-side untuk meniru foto ponsel.
+
+Jalankan dari root project:
+    python -m benchmark.yolo_tiling
+    python -m benchmark.yolo_tiling --tiles 640:0.2 512:0.25 --workers 0 4
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from module.tiling import box_iou
+from module.yolo import YOLODetector, result_to_detections
+
+
+def as_array(detections):
+    return np.array([(d["x1"], d["y1"], d["x2"], d["y2"]) for d in detections], dtype=np.float64).reshape(-1, 4)
+
+
+def recall(reference, detections, iou_threshold=0.5):
+    """Fraksi box acuan yang punya pasangan (IoU >= threshold) di detections."""
+    if not reference:
+        return 1.0
+    predicted = as_array(detections)
+    if not len(predicted):
+        return 0.0
+    matched = sum(box_iou(box, predicted).max() >= iou_threshold for box in as_array(reference))
+    return matched / len(reference)
+
+
+def run(fn, images):
+    # Pemanasan agar inisialisasi PyTorch tidak ikut terukur
+    fn(images[0])
+    outputs, elapsed = [], []
+    for image in images:
+        start = time.perf_counter()
+        outputs.append(fn(image))
+        elapsed.append((time.perf_counter() - start) * 1000)
+    return outputs, float(np.mean(elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="model/yolo.pt")
+    parser.add_argument("--images", default="cnn")
+    parser.add_argument("--long-side", type=int, default=4000)
+    parser.add_argument("--tiles", nargs="+", default=["640:0.2", "640:0.1", "960:0.2"],
+                        help="konfigurasi tile_size:overlap")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 4])
+    parser.add_argument("--reference-imgsz", type=int, default=None,
+                        help="imgsz prediksi acuan (default: --long-side)")
+    args = parser.parse_args()
+
+    images = []
+    for path in sorted(
+        path for ext in ("jpg", "jpeg", "png")
+        for path in glob.glob(os.path.join(args.images, f"*.{ext}"))
+    ):
+        image = cv2.imread(path)
+        scale = args.long_side / max(image.shape[:2])
+        images.append(cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC))
+
+    output_dir = tempfile.mkdtemp(prefix="yolo-tiling-bench-")
+    base = YOLODetector(model_path=args.model, output_dir=output_dir)
+    reference_imgsz = args.reference_imgsz or args.long_side
+
+    def reference_fn(image):
+        result = base.model.predict(source=image, conf=0.25, device='cpu', imgsz=reference_imgsz,
+                                    save=False, verbose=False)[0]
+        return result_to_detections(result)
+
+    reference, reference_ms = run(reference_fn, images)
+
+    print(f"{'mode':>28} | {'latency (ms)':>12} | {'boxes':>5} | {'recall':>6}")
+    print("-" * 62)
+    print(f"{f'full-res imgsz={reference_imgsz}':>28} | {reference_ms:>12.1f} | "
+          f"{sum(map(len, reference)):>5} | {'1.00':>6}")
+
+    outputs, ms = run(base.detect, images)
+    mean_recall = np.mean([recall(r, o) for r, o in zip(reference, outputs)])
+    print(f"{'standard (downsampled)':>28} | {ms:>12.1f} | {sum(map(len, outputs)):>5} | {mean_recall:>6.2f}")
+
+    for spec in args.tiles:
+        tile_size, overlap = spec.split(":")
+        for workers in args.workers:
+            detector = YOLODetector(model_path=args.model, output_dir=output_dir, tile_size=int(tile_size),
+                                    tile_overlap=float(overlap), tile_workers=workers)
+            outputs, ms = run(detector.detect, images)
+            mean_recall = np.mean([recall(r, o) for r, o in zip(reference, outputs)])
+            label = f"tile {tile_size}/{overlap} w={workers}"
+            print(f"{label:>28} | {ms:>12.1f} | {sum(map(len, outputs)):>5} | {mean_recall:>6.2f}")
+            detector.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ File ini siap dijalankan untuk project Anda
 """
 
 import os
+import argparse
 from ragas import evaluate
 from ragas.metrics import faithfulness, answer_relevancy, context_recall, context_precision
 from ragas.llms import LangchainLLMWrapper
@@ -24,6 +25,11 @@ VECTOR_STORE_PATH = "./chroma_db"
 # Model Gemini yang digunakan
 GEMINI_MODEL = "gemini-2.5-flash"  # atau "gemini-2.5-pro"
 
+# Backend embedding query IndoBERT untuk retrieval: "torch" atau "onnx"
+# (bisa diganti lewat --embedding-backend/--onnx-dir; embedding metrik RAGAS tetap PyTorch)
+EMBEDDING_BACKEND = "torch"
+EMBEDDING_ONNX_DIR = "model/indobert_onnx_int8"
+
 # ==================== IMPORT RAG CHATBOT ====================
 
 from module.rag import RAGChatbot  # Sesuaikan dengan nama file Anda
@@ -250,6 +256,11 @@ GROUND_TRUTHS = [
 
 def main():
     """Main function untuk menjalankan evaluasi"""
+    parser = argparse.ArgumentParser(description="Evaluasi RAG dengan RAGAS")
+    parser.add_argument("--embedding-backend", choices=("torch", "onnx"), default=EMBEDDING_BACKEND)
+    parser.add_argument("--onnx-dir", default=EMBEDDING_ONNX_DIR,
+                        help="hasil python -m module.onnx_embeddings (backend onnx)")
+    args = parser.parse_args()
     
     print("\n" + "="*70)
     print("RAG EVALUATION SYSTEM")
@@ -268,8 +279,13 @@ def main():
         google_api_key=GOOGLE_API_KEY
     )
     
-    rag_chatbot = RAGChatbot(llm_model, vector_dir=VECTOR_STORE_PATH)
-    print("✓ RAG Chatbot initialized\n")
+    rag_chatbot = RAGChatbot(
+        llm_model,
+        vector_dir=VECTOR_STORE_PATH,
+        embedding_backend=args.embedding_backend,
+        embedding_onnx_dir=args.onnx_dir
+    )
+    print(f"✓ RAG Chatbot initialized (embedding backend: {args.embedding_backend})\n")
     
     results, dataset = evaluate_rag_with_gemini(
         rag_chatbot=rag_chatbot,
@@ -0,0 +1,198 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from module.db import configure_connection
+from module.heatmap import render_heatmap
+
+MODES = ("bbox", "heatmap")
+# Berapa lama (detik) gambar yang sudah dievict masih dijawab 410 sebelum tercatat dilupakan
+EVICTED_TTL_SECONDS = 30 * 24 * 3600
+
+
+def annotate_image(image, detections, mode="bbox", sigma=50, alpha=0.6):
+    """
+    Gambar hasil deteksi di atas gambar.
+    :param image: array BGR (tidak diubah, hasil berupa array baru)
+    :param detections: list dict box (x1, y1, x2, y2, confidence)
+    :param mode: "bbox" (kotak hijau) atau "heatmap"
+    :return: array BGR hasil anotasi
+    """
+    if mode == "heatmap":
+        boxes = [(d["x1"], d["y1"], d["x2"], d["y2"]) for d in detections]
+        confs = [d["confidence"] for d in detections]
+        return render_heatmap(image, boxes, confs, sigma=sigma, alpha=alpha)
+
+    image = image.copy()
+    for d in detections:
+        x1, y1, x2, y2 = map(int, (d["x1"], d["y1"], d["x2"], d["y2"]))
+        cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    return image
+
+
+def scale_detections(detections, factor):
+    return [
+        {**d, "x1": d["x1"] * factor, "y1": d["y1"] * factor,
+         "x2": d["x2"] * factor, "y2": d["y2"] * factor}
+        for d in detections
+    ]
+
+
+class AnnotationStore:
+    def __init__(self, db_file, source_storage, output_storage, min_size=64, max_size=4096, lock_stripes=64,
+                 evicted_ttl=EVICTED_TTL_SECONDS, source_writer=None):
+        """
+        Simpan hasil deteksi terstruktur saat upload, render gambar anotasi hanya
+        saat /processed/<filename> pertama kali diminta lalu cache file hasilnya.
+        :param db_file: path file database SQLite
+        :param source_storage: StorageManager gambar asli (uploads)
+        :param output_storage: StorageManager cache gambar hasil render (processed);
+                               file yang dievict dirender ulang saat diminta lagi
+        :param min_size: batas bawah parameter size (sisi terpanjang, piksel)
+        :param max_size: batas atas parameter size
+        :param lock_stripes: jumlah lock render (file yang sama tidak dirender dua kali bersamaan)
+        :param evicted_ttl: detik penanda gambar asli yang sudah dievict disimpan (lihat is_evicted)
+        :param source_writer: UploadWriter yang menyimpan gambar asli di latar; render menunggu
+                              penulisannya selesai sebelum menganggap gambar asli tidak ada
+        """
+        self.source_storage = source_storage
+        self.output_storage = output_storage
+        self.min_size = min_size
+        self.max_size = max_size
+        self.evicted_ttl = evicted_ttl
+        self.source_writer = source_writer
+        self.conn = configure_connection(sqlite3.connect(db_file, check_same_thread=False))
+        self._lock = threading.Lock()
+        self._render_locks = [threading.Lock() for _ in range(lock_stripes)]
+        self.renders = 0
+
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS image_detections (
+                image_name TEXT PRIMARY KEY,
+                detections TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        ''')
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(image_detections)")]
+        if "evicted_at" not in columns:
+            # Penanda gambar asli yang sudah dievict (detections dikosongkan)
+            self.conn.execute("ALTER TABLE image_detections ADD COLUMN evicted_at REAL")
+        self.conn.commit()
+
+    def save(self, image_name, detections):
+        """
+        Simpan box hasil YOLO untuk gambar upload (tanpa menggambar apa pun).
+        :param image_name: nama file gambar asli di source_storage
+        :param detections: list dict box (x1, y1, x2, y2, confidence)
+        """
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO image_detections (image_name, detections, created_at) VALUES (?, ?, ?)",
+                (image_name, json.dumps(detections), time.time())
+            )
+            self.conn.commit()
+
+    def get(self, image_name):
+        """:return: list detections atau None jika gambar tidak dikenal"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT detections FROM image_detections WHERE image_name = ? AND evicted_at IS NULL",
+                (image_name,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def forget(self, image_name):
+        """
+        Buang deteksi gambar yang file aslinya sudah dievict (callback StorageManager);
+        yang tersisa hanya penanda untuk is_evicted() sampai evicted_ttl habis.
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "UPDATE image_detections SET detections = '[]', evicted_at = ? "
+                "WHERE image_name = ? AND evicted_at IS NULL",
+                (now, image_name)
+            )
+            self.conn.execute(
+                "DELETE FROM image_detections WHERE evicted_at < ?",
+                (now - self.evicted_ttl,)
+            )
+            self.conn.commit()
+
+    def is_evicted(self, image_name):
+        """:return: True jika gambar pernah ada tetapi file aslinya sudah dievict"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM image_detections WHERE image_name = ? AND evicted_at IS NOT NULL",
+                (image_name,)
+            ).fetchone()
+        return row is not None
+
+    def parse_size(self, size):
+        """
+        Validasi parameter size dari query string.
+        :return: int (dibatasi min_size..max_size) atau None untuk ukuran asli
+        """
+        if size in (None, ""):
+            return None
+        size = int(size)
+        return max(self.min_size, min(self.max_size, size))
+
+    def render(self, image_name, mode="bbox", size=None):
+        """
+        Path gambar anotasi, dirender dan disimpan ke output_storage jika belum ada.
+        :param image_name: nama file gambar asli
+        :param mode: "bbox" atau "heatmap"
+        :param size: sisi terpanjang hasil (piksel) atau None untuk ukuran asli
+        :return: path file hasil render, atau None jika gambar/deteksi tidak ditemukan
+                 atau gambar asli sudah dievict (bedakan dengan is_evicted())
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown annotation mode '{mode}', expected one of {MODES}")
+        output_name = f"{mode}_{size or 'full'}_{image_name}"
+        output_path = self.output_storage.lookup(output_name)
+        if output_path is not None:
+            return output_path
+
+        with self._render_locks[hash(output_name) % len(self._render_locks)]:
+            output_path = self.output_storage.lookup(output_name)
+            if output_path is not None:
+                return output_path
+            detections = self.get(image_name)
+            if detections is None:
+                return None
+            if self.source_writer is not None:
+                self.source_writer.wait(self.source_storage.path_for(image_name))
+            source_path = self.source_storage.lookup(image_name)
+            if source_path is None:
+                # Gambar asli sudah dievict, anotasi tidak bisa dibuat ulang
+                self.forget(image_name)
+                return None
+            image = cv2.imread(source_path)
+            if image is None:
+                return None
+
+            if size is not None:
+                factor = size / max(image.shape[:2])
+                if factor < 1:
+                    # Perkecil dulu baru digambar: lebih murah daripada render penuh lalu resize
+                    image = cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+                    detections = scale_detections(detections, factor)
+            annotated = annotate_image(image, detections, mode)
+
+            ext = os.path.splitext(image_name)[1] or ".jpg"
+            ok, encoded = cv2.imencode(ext, annotated)
+            if not ok:
+                return None
+            output_path = self.output_storage.write(output_name, np.asarray(encoded).tobytes())
+            self.renders += 1
+            return output_path
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
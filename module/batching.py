@@ -0,0 +1,85 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    def __init__(self, batch_fn, max_batch_size=16, max_wait_ms=5, name="micro-batcher"):
+        """
+        Kumpulkan permintaan konkuren selama beberapa milidetik lalu proses sekaligus.
+        :param batch_fn: fungsi list input -> list output (urutan sama)
+        :param max_batch_size: jumlah input maksimal per batch
+        :param max_wait_ms: waktu tunggu maksimal sejak input pertama masuk antrean
+        :param name: nama thread worker
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = []
+        self._cond = threading.Condition()
+        self._stopped = False
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """
+        Masukkan satu input ke antrean.
+        :return: Future yang berisi output untuk input ini
+        """
+        future = Future()
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("MicroBatcher sudah dihentikan")
+            self._queue.append((item, future))
+            self._cond.notify()
+        return future
+
+    def __call__(self, item):
+        """Versi blocking dari submit()."""
+        return self.submit(item).result()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopped:
+                    self._cond.wait()
+                if not self._queue and self._stopped:
+                    return
+                # Tunggu input lain sampai batch penuh atau max_wait habis
+                deadline = time.monotonic() + self.max_wait
+                while len(self._queue) < self.max_batch_size and not self._stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:self.max_batch_size]
+                del self._queue[:self.max_batch_size]
+
+            items = [item for item, _ in batch]
+            try:
+                outputs = self.batch_fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            if len(outputs) != len(batch):
+                # Jangan biarkan pemanggil menunggu selamanya tanpa hasil
+                error = RuntimeError(
+                    f"batch_fn returned {len(outputs)} outputs for {len(batch)} inputs"
+                )
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), output in zip(batch, outputs):
+                future.set_result(output)
+
+    def stop(self):
+        """Hentikan worker setelah antrean yang tersisa selesai diproses."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join()
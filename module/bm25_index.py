@@ -0,0 +1,513 @@
+"""
+Index BM25 on-disk (pengganti bm25_index.pkl): vocabulary, postings berbasis array
+NumPy yang di-memory-map, IDF dan norma panjang dokumen yang sudah dihitung.
+Query hanya membaca postings term yang ada di query; dokumen baru ditambahkan
+sebagai segmen baru tanpa membangun ulang segmen lama. Tidak ada pickle.
+
+Struktur direktori:
+    meta.json            parameter (k1, b, k, rumus IDF), jumlah dokumen, daftar segmen (ditulis terakhir)
+    vocab.json           list term, indeks = term id
+    df.npy, idf.npy      document frequency dan IDF per term
+    doc_len.npy          panjang dokumen (jumlah token)
+    norm.npy             k1 * (1 - b + b * dl / avgdl) per dokumen
+    documents.jsonl      isi + metadata dokumen, satu JSON per baris
+    doc_offsets.npy      offset byte tiap baris documents.jsonl
+    seg-XXXXX/           offsets.npy (per term), doc_ids.npy, tf.npy
+
+Migrasi satu kali dari bm25_index.pkl (dokumen, k, k1, b dan epsilon pickle dipertahankan;
+IDF tetap rumus rank_bm25/BM25Okapi). Ini build yang dipakai di produksi:
+    python -m module.bm25_index --from-pickle bm25_index.pkl --output bm25_index
+
+Bangun dari vector store Chroma (dari root project):
+    python -m module.bm25_index --vector-dir vectorstore_chroma_db1 --output bm25_index
+
+Perbedaan dengan pickle: tokenisasi memakai tokenize() di bawah (pickle hanya split spasi,
+tanpa huruf kecil), sehingga skor tidak identik walau dokumen dan parameter sama. Index yang
+dibangun dari vector store memakai IDF ala Lucene (idf="lucene", selalu positif).
+"""
+
+import argparse
+import json
+import mmap
+import os
+import pickle
+import re
+import shutil
+import tempfile
+import threading
+import unicodedata
+from collections import Counter
+
+import numpy as np
+from langchain_core.documents import Document
+
+FORMAT_VERSION = 1
+TOKENIZER_VERSION = 1
+DEFAULT_K = 5
+IDF_MODES = ("lucene", "okapi")
+
+# Satu-satunya objek yang boleh ada di bm25_index.pkl (BM25Retriever LangChain + rank_bm25)
+PICKLE_GLOBALS = {
+    ("langchain_community.retrievers.bm25", "BM25Retriever"),
+    ("langchain_community.retrievers.bm25", "default_preprocessing_func"),
+    ("rank_bm25", "BM25Okapi"),
+    ("langchain_core.documents.base", "Document"),
+}
+
+STOPWORDS = {
+    "ada", "adalah", "agar", "akan", "aku", "anda", "apa", "atau", "bagi", "bahwa",
+    "dalam", "dan", "dapat", "dari", "dengan", "di", "hal", "harus", "ia", "ini",
+    "itu", "jika", "juga", "ke", "kami", "kita", "lebih", "maka", "masih", "mereka",
+    "namun", "oleh", "pada", "para", "saat", "saja", "sangat", "sebagai", "sehingga",
+    "serta", "sudah", "tersebut", "untuk", "yaitu", "yang",
+}
+# Partikel/posesif yang aman dipotong: -nya (daunnya -> daun), -pun (apapun -> apa)
+SUFFIXES = ("nya", "pun")
+MIN_STEM_LENGTH = 3
+
+
+def tokenize(text):
+    """
+    Tokenisasi Bahasa Indonesia: Unicode dinormalisasi dan aksen dibuang, huruf kecil,
+    kata ulang digabung (daun-daun -> daun), stopword dibuang, akhiran -nya/-pun dipotong.
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    # Kata ulang: "daun-daun" / "daun2" -> "daun"
+    text = re.sub(r"\b(\w+)-\1\b", r"\1", text)
+    text = re.sub(r"\b([a-z]+)2\b", r"\1", text)
+
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", text):
+        if token in STOPWORDS:
+            continue
+        for suffix in SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+                token = token[:-len(suffix)]
+                break
+        tokens.append(token)
+    return tokens
+
+
+def _save_array(path, array):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _save_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _load_array(path):
+    return np.load(path, mmap_mode="r", allow_pickle=False)
+
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class _FileLock:
+    """Lock eksklusif antar proses (flock); tanpa fcntl (Windows) hanya lock antar thread."""
+
+    _thread_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if fcntl is not None:
+            self._file = open(self.path, "a")
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+
+class _Snapshot:
+    """Keadaan index yang konsisten; diganti utuh setelah append (pembaca tidak perlu lock)."""
+
+    def __init__(self, root, meta):
+        self.meta = meta
+        self.num_docs = meta["num_docs"]
+        with open(os.path.join(root, "vocab.json"), "r", encoding="utf-8") as f:
+            self.terms = json.load(f)
+        self.vocab = {term: term_id for term_id, term in enumerate(self.terms)}
+        self.idf = _load_array(os.path.join(root, "idf.npy"))
+        self.df = _load_array(os.path.join(root, "df.npy"))
+        self.doc_len = _load_array(os.path.join(root, "doc_len.npy"))[:self.num_docs]
+        self.norm = _load_array(os.path.join(root, "norm.npy"))[:self.num_docs]
+        self.doc_offsets = _load_array(os.path.join(root, "doc_offsets.npy"))[:self.num_docs + 1]
+        self.segments = [
+            (
+                _load_array(os.path.join(root, segment["name"], "offsets.npy")),
+                _load_array(os.path.join(root, segment["name"], "doc_ids.npy")),
+                _load_array(os.path.join(root, segment["name"], "tf.npy")),
+            )
+            for segment in meta["segments"]
+        ]
+        self.documents = None
+        if self.num_docs:
+            with open(os.path.join(root, "documents.jsonl"), "rb") as f:
+                self.documents = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class BM25Index:
+    def __init__(self, root):
+        """
+        Buka index yang sudah ada (memory-mapped, tanpa membaca postings ke memori).
+        Pakai BM25Index.create() untuk index baru.
+        :param root: direktori index
+        """
+        self.root = root
+        self._lock = threading.Lock()
+        self._load(self._read_meta())
+
+    def _read_meta(self):
+        with open(os.path.join(self.root, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported BM25 index version {meta.get('version')} in {self.root}")
+        if meta.get("tokenizer") != TOKENIZER_VERSION:
+            raise ValueError(f"BM25 index {self.root} was built with another tokenizer, rebuild it")
+        return meta
+
+    def _load(self, meta):
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        # Index lama (sebelum k/idf disimpan di meta) memakai default ini
+        self.k = meta.get("k", DEFAULT_K)
+        self.idf_mode = meta.get("idf", "lucene")
+        self.epsilon = meta.get("epsilon", 0.25)
+        self._snapshot = _Snapshot(self.root, meta)
+
+    @classmethod
+    def create(cls, root, documents=(), k1=1.5, b=0.75, k=DEFAULT_K, idf="lucene", epsilon=0.25):
+        """
+        Buat index kosong lalu tambahkan dokumen (menimpa index di root di tempat;
+        pakai build() jika proses lain bisa sedang membaca atau membangun index yang sama).
+        :param documents: iterable Document LangChain (page_content + metadata)
+        :param k: jumlah hasil default search()
+        :param idf: "lucene" (log(1 + (N - df + 0.5) / (df + 0.5))) atau "okapi" (rank_bm25)
+        :param epsilon: hanya untuk idf="okapi", IDF negatif diganti epsilon * rata-rata IDF
+        """
+        if idf not in IDF_MODES:
+            raise ValueError(f"Unknown BM25 IDF '{idf}', expected one of {IDF_MODES}")
+        os.makedirs(root, exist_ok=True)
+        for name in os.listdir(root):
+            if name.startswith("seg-"):
+                shutil.rmtree(os.path.join(root, name))
+        _save_json(os.path.join(root, "vocab.json"), [])
+        for name, dtype in (("df", np.int32), ("idf", np.float32), ("doc_len", np.int32), ("norm", np.float32)):
+            _save_array(os.path.join(root, f"{name}.npy"), np.zeros(0, dtype=dtype))
+        _save_array(os.path.join(root, "doc_offsets.npy"), np.zeros(1, dtype=np.int64))
+        open(os.path.join(root, "documents.jsonl"), "wb").close()
+        _save_json(os.path.join(root, "meta.json"), {
+            "version": FORMAT_VERSION,
+            "tokenizer": TOKENIZER_VERSION,
+            "k1": k1,
+            "b": b,
+            "k": k,
+            "idf": idf,
+            "epsilon": epsilon,
+            "num_docs": 0,
+            "total_len": 0,
+            "segments": [],
+        })
+        index = cls(root)
+        documents = list(documents)
+        if documents:
+            # Tanpa file lock: build() sudah memegangnya, create() langsung menulis di tempat
+            index._append(documents)
+        return index
+
+    @classmethod
+    def build(cls, root, documents, overwrite=False, **params):
+        """
+        Bangun index lengkap di direktori sementara lalu pindahkan ke root dengan os.replace,
+        di bawah file lock root + ".lock": beberapa proses (worker) yang start bersamaan tidak
+        membangun berbarengan, dan pembaca tidak pernah melihat index setengah jadi.
+        :param documents: list Document, atau fungsi tanpa argumen yang mengembalikannya
+            (hanya dipanggil jika index memang perlu dibangun)
+        :param overwrite: False = jika index sudah ada (dibangun proses lain), buka saja
+        :param params: diteruskan ke create() (k1, b, k, idf, epsilon)
+        """
+        root = os.path.normpath(root)
+        parent = os.path.dirname(os.path.abspath(root))
+        os.makedirs(parent, exist_ok=True)
+        with _FileLock(f"{root}.lock"):
+            if not overwrite and os.path.exists(os.path.join(root, "meta.json")):
+                return cls(root)
+            if callable(documents):
+                documents = documents()
+            tmp_root = tempfile.mkdtemp(prefix=f".{os.path.basename(root)}-", dir=parent)
+            old_root = None
+            try:
+                cls.create(tmp_root, documents, **params)
+                # mkdtemp membuat direktori 0700; index harus bisa dibaca user service lain
+                os.chmod(tmp_root, 0o755)
+                if os.path.exists(root):
+                    # os.replace tidak bisa menimpa direktori yang berisi: pindahkan yang lama dulu
+                    old_root = f"{tmp_root}-old"
+                    os.replace(root, old_root)
+                os.replace(tmp_root, root)
+            except BaseException:
+                shutil.rmtree(tmp_root, ignore_errors=True)
+                if old_root is not None and not os.path.exists(root):
+                    os.replace(old_root, root)
+                    old_root = None
+                raise
+            finally:
+                if old_root is not None:
+                    # File yang masih di-mmap proses lain tetap valid sampai ditutup
+                    shutil.rmtree(old_root, ignore_errors=True)
+        return cls(root)
+
+    def __len__(self):
+        return self._snapshot.num_docs
+
+    @property
+    def num_terms(self):
+        return len(self._snapshot.terms)
+
+    def append(self, documents):
+        """
+        Tambahkan dokumen sebagai segmen baru. Statistik global (df, IDF, norma panjang)
+        dihitung ulang, postings segmen lama tidak disentuh. meta.json ditulis terakhir
+        sehingga pembaca lain tidak melihat segmen yang belum lengkap. Memakai file lock
+        yang sama dengan build(), lalu membaca ulang meta.json agar append atau build dari
+        proses lain sejak index dibuka tidak tertimpa.
+        :param documents: list Document LangChain
+        """
+        documents = list(documents)
+        if not documents:
+            return
+        with _FileLock(f"{os.path.normpath(self.root)}.lock"):
+            meta = self._read_meta()
+            with self._lock:
+                if meta != self._snapshot.meta:
+                    self._load(meta)
+            self._append(documents)
+
+    def _append(self, documents):
+        with self._lock:
+            old = self._snapshot
+            meta = dict(old.meta)
+            terms = list(old.terms)
+            vocab = dict(old.vocab)
+            df = np.array(old.df, dtype=np.int32)
+            doc_start = old.num_docs
+
+            # Postings segmen baru: term id -> (doc id global, tf)
+            postings = {}
+            lengths = []
+            for i, doc in enumerate(documents):
+                counts = Counter(tokenize(doc.page_content))
+                lengths.append(sum(counts.values()))
+                for term, tf in counts.items():
+                    term_id = vocab.get(term)
+                    if term_id is None:
+                        term_id = vocab[term] = len(terms)
+                        terms.append(term)
+                    postings.setdefault(term_id, []).append((doc_start + i, tf))
+
+            df = np.concatenate([df, np.zeros(len(terms) - len(df), dtype=np.int32)])
+            offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+            for term_id, entries in postings.items():
+                offsets[term_id + 1] = len(entries)
+                df[term_id] += len(entries)
+            offsets = np.cumsum(offsets)
+            doc_ids = np.empty(offsets[-1], dtype=np.int32)
+            tf = np.empty(offsets[-1], dtype=np.uint16)
+            for term_id, entries in postings.items():
+                start = offsets[term_id]
+                doc_ids[start:start + len(entries)] = [doc_id for doc_id, _ in entries]
+                tf[start:start + len(entries)] = np.minimum([count for _, count in entries], np.iinfo(np.uint16).max)
+
+            segment_name = f"seg-{len(meta['segments']):05d}"
+            segment_dir = os.path.join(self.root, segment_name)
+            os.makedirs(segment_dir, exist_ok=True)
+            _save_array(os.path.join(segment_dir, "offsets.npy"), offsets)
+            _save_array(os.path.join(segment_dir, "doc_ids.npy"), doc_ids)
+            _save_array(os.path.join(segment_dir, "tf.npy"), tf)
+
+            documents_path = os.path.join(self.root, "documents.jsonl")
+            doc_offsets = list(old.doc_offsets)
+            with open(documents_path, "ab") as f:
+                # Sisa append yang gagal (setelah offset terakhir) ditimpa
+                f.truncate(doc_offsets[-1])
+                f.seek(doc_offsets[-1])
+                for doc in documents:
+                    line = json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False)
+                    f.write(line.encode("utf-8") + b"\n")
+                    doc_offsets.append(f.tell())
+
+            num_docs = doc_start + len(documents)
+            doc_len = np.concatenate([np.asarray(old.doc_len, dtype=np.int32), np.array(lengths, dtype=np.int32)])
+            total_len = meta["total_len"] + sum(lengths)
+            avgdl = total_len / num_docs if num_docs else 1.0
+            idf = self._idf(df, num_docs)
+            norm = (self.k1 * (1 - self.b + self.b * doc_len / max(avgdl, 1e-9))).astype(np.float32)
+
+            _save_json(os.path.join(self.root, "vocab.json"), terms)
+            _save_array(os.path.join(self.root, "df.npy"), df)
+            _save_array(os.path.join(self.root, "idf.npy"), idf)
+            _save_array(os.path.join(self.root, "doc_len.npy"), doc_len)
+            _save_array(os.path.join(self.root, "norm.npy"), norm)
+            _save_array(os.path.join(self.root, "doc_offsets.npy"), np.array(doc_offsets, dtype=np.int64))
+            meta["num_docs"] = num_docs
+            meta["total_len"] = total_len
+            meta["segments"] = meta["segments"] + [{"name": segment_name, "doc_start": doc_start, "num_docs": len(documents)}]
+            _save_json(os.path.join(self.root, "meta.json"), meta)
+
+            self._snapshot = _Snapshot(self.root, meta)
+
+    def _idf(self, df, num_docs):
+        if self.idf_mode == "okapi":
+            # rank_bm25.BM25Okapi: IDF negatif (term di > separuh dokumen) diganti epsilon * rata-rata IDF
+            idf = np.log(num_docs - df + 0.5) - np.log(df + 0.5)
+            if len(idf):
+                idf = np.where(idf < 0, self.epsilon * idf.mean(), idf)
+            return idf.astype(np.float32)
+        # IDF ala Lucene: selalu positif, tidak perlu epsilon
+        return np.log1p((num_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    def document(self, doc_id):
+        """Document LangChain untuk doc id (dibaca dari documents.jsonl yang di-mmap)."""
+        snapshot = self._snapshot
+        start, end = int(snapshot.doc_offsets[doc_id]), int(snapshot.doc_offsets[doc_id + 1])
+        data = json.loads(snapshot.documents[start:end])
+        return Document(page_content=data["page_content"], metadata=data["metadata"])
+
+    def documents(self):
+        return [self.document(doc_id) for doc_id in range(len(self))]
+
+    def get_scores(self, query):
+        """
+        Skor BM25 untuk dokumen yang memuat minimal satu term query.
+        :return: (array doc id, array skor)
+        """
+        snapshot = self._snapshot
+        query_terms = Counter(
+            snapshot.vocab[token] for token in tokenize(query) if token in snapshot.vocab
+        )
+        doc_ids, contributions = [], []
+        for term_id, query_tf in query_terms.items():
+            weight = float(snapshot.idf[term_id]) * query_tf
+            for offsets, segment_docs, segment_tf in snapshot.segments:
+                # Term yang muncul setelah segmen ini dibuat tidak punya postings di segmen itu
+                if term_id + 1 >= len(offsets):
+                    continue
+                start, end = offsets[term_id], offsets[term_id + 1]
+                if start == end:
+                    continue
+                docs = segment_docs[start:end]
+                tf = segment_tf[start:end].astype(np.float32)
+                doc_ids.append(docs)
+                contributions.append(weight * tf * (self.k1 + 1) / (tf + snapshot.norm[docs]))
+        if not doc_ids:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        candidates, inverse = np.unique(np.concatenate(doc_ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contributions), minlength=len(candidates))
+        return candidates, scores
+
+    def search(self, query, k=None):
+        """
+        :param k: jumlah hasil (None = k yang disimpan di meta index)
+        :return: (list Document, array skor) urut dari yang paling relevan
+        """
+        candidates, scores = self.get_scores(query)
+        k = min(self.k if k is None else k, len(candidates))
+        if k == 0:
+            return [], np.empty(0)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [self.document(int(candidates[i])) for i in top], scores[top]
+
+
+def documents_from_vector_store(vector_store):
+    """Semua dokumen (isi + metadata) dari vector store Chroma LangChain."""
+    data = vector_store.get(include=["documents", "metadatas"])
+    return [
+        Document(page_content=text, metadata=metadata or {})
+        for text, metadata in zip(data["documents"], data["metadatas"])
+    ]
+
+
+class _PickledObject:
+    """Pengganti kelas di bm25_index.pkl: hanya menyimpan atribut, tanpa mengimpor langchain/rank_bm25."""
+
+    def __setstate__(self, state):
+        # Model pydantic (BM25Retriever, Document) menyimpan field di state["__dict__"]
+        if isinstance(state, dict):
+            self.__dict__.update(state.get("__dict__", state))
+
+
+class _RetrieverUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if (module, name) not in PICKLE_GLOBALS:
+            raise pickle.UnpicklingError(f"Unexpected object {module}.{name} in BM25 pickle")
+        return _PickledObject
+
+
+def read_retriever_pickle(path):
+    """
+    Baca bm25_index.pkl (BM25Retriever LangChain) tanpa langchain_community/rank_bm25.
+    Hanya kelas di PICKLE_GLOBALS yang boleh muncul; tetap hanya untuk file tepercaya.
+    :return: (list Document, dict parameter untuk BM25Index.create/build)
+    """
+    with open(path, "rb") as f:
+        retriever = _RetrieverUnpickler(f).load()
+    vectorizer = retriever.vectorizer
+    documents = [
+        Document(page_content=doc.page_content, metadata=doc.metadata or {})
+        for doc in retriever.docs
+    ]
+    params = {
+        "k": retriever.k,
+        "k1": vectorizer.k1,
+        "b": vectorizer.b,
+        "idf": "okapi",
+        "epsilon": vectorizer.epsilon,
+    }
+    return documents, params
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-pickle", default=None, help="migrasi dari bm25_index.pkl (dokumen + parameter)")
+    parser.add_argument("--vector-dir", default="vectorstore_chroma_db1")
+    parser.add_argument("--output", default="bm25_index")
+    parser.add_argument("--k1", type=float, default=1.5)
+    parser.add_argument("--b", type=float, default=0.75)
+    parser.add_argument("--k", type=int, default=DEFAULT_K)
+    args = parser.parse_args()
+
+    if args.from_pickle:
+        documents, params = read_retriever_pickle(args.from_pickle)
+    else:
+        from langchain_chroma import Chroma
+
+        documents = documents_from_vector_store(Chroma(persist_directory=args.vector_dir))
+        params = {"k1": args.k1, "b": args.b, "k": args.k}
+    index = BM25Index.build(args.output, documents, overwrite=True, **params)
+    print(f"BM25 index at {args.output}: {len(index)} documents, {index.num_terms} terms, "
+          f"k={index.k}, k1={index.k1}, b={index.b}, idf={index.idf_mode}")
+
+
+if __name__ == "__main__":
+    main()
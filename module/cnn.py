@@ -1,44 +1,199 @@
-import tensorflow as tf
 import numpy as np
 import os
 import json
+import threading
+
+from PIL import Image
+
+from module.batching import MicroBatcher
 
 with open('cnn/class_indices.json', 'r') as f:
     class_indices = json.load(f)
 
 CLASS_NAMES = list(class_indices.keys())
+INPUT_SIZE = (224, 224)
 
-class CNNDetector:
+BACKENDS = ("keras", "tflite", "onnx")
+
+
+class _KerasBackend:
     def __init__(self, model_path):
-        
+        # Import TensorFlow hanya jika backend Keras dipakai (import besar, RSS tinggi)
+        import tensorflow as tf
+
+        self.model = tf.keras.models.load_model(
+            model_path,
+            compile=False,
+            safe_mode=False
+        )
+
+    def predict(self, batch):
+        return self.model.predict(batch, verbose=0)
+
+
+class _TFLiteBackend:
+    def __init__(self, model_path, num_threads=None):
         try:
-            self.model = tf.keras.models.load_model(
-                model_path,
-                compile=False,
-                safe_mode=False
-            )
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input_detail = self.interpreter.get_input_details()[0]
+        self.output_detail = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self.input_detail["shape"][0])
+        # Interpreter TFLite tidak thread-safe
+        self._lock = threading.Lock()
+
+    def _quantize(self, batch):
+        dtype = self.input_detail["dtype"]
+        if dtype == np.float32:
+            return batch.astype(np.float32)
+        scale, zero_point = self.input_detail["quantization"]
+        return np.clip(np.round(batch / scale + zero_point), np.iinfo(dtype).min, np.iinfo(dtype).max).astype(dtype)
+
+    def _dequantize(self, output):
+        if output.dtype == np.float32:
+            return output
+        scale, zero_point = self.output_detail["quantization"]
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch):
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self.input_detail["index"], list(batch.shape))
+                self.interpreter.allocate_tensors()
+                self.input_detail = self.interpreter.get_input_details()[0]
+                self.output_detail = self.interpreter.get_output_details()[0]
+                self._batch_size = batch.shape[0]
+            self.interpreter.set_tensor(self.input_detail["index"], self._quantize(batch))
+            self.interpreter.invoke()
+            return self._dequantize(self.interpreter.get_tensor(self.output_detail["index"]))
+
+
+class _OnnxBackend:
+    def __init__(self, model_path, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        return self.session.run(None, {self.input_name: batch.astype(np.float32)})[0]
+
+
+def load_backend(model_path, backend="keras", num_threads=None):
+    """
+    Buat backend inferensi CNN.
+    :param model_path: .h5/.keras (keras), .tflite (tflite) atau .onnx (onnx)
+    :param backend: salah satu dari BACKENDS
+    :param num_threads: jumlah thread CPU untuk tflite/onnx (None = default runtime)
+    """
+    if backend == "keras":
+        return _KerasBackend(model_path)
+    if backend == "tflite":
+        return _TFLiteBackend(model_path, num_threads)
+    if backend == "onnx":
+        return _OnnxBackend(model_path, num_threads)
+    raise ValueError(f"Unknown CNN backend '{backend}', expected one of {BACKENDS}")
+
+
+def load_image_array(img_path):
+    """
+    Baca dan normalisasi gambar ke input model (224x224, skala 0-1).
+    Sama dengan keras load_img (RGB, resize nearest) + img_to_array / 255.
+    :param img_path: path gambar input
+    :return: array float32 (224, 224, 3)
+    """
+    with Image.open(img_path) as img:
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img = img.resize(INPUT_SIZE, Image.NEAREST)
+        img_array = np.asarray(img, dtype=np.float32)
+    return img_array / 255.0
+
+
+def image_to_input(image_bgr):
+    """
+    Ubah array BGR di memori (hasil decode sekali di request) ke input model.
+    Resize nearest lewat PIL agar identik dengan load_image_array.
+    :param image_bgr: array uint8 (H, W, 3) format BGR
+    :return: array float32 (224, 224, 3)
+    """
+    img = Image.fromarray(np.ascontiguousarray(image_bgr[..., ::-1]))
+    img = img.resize(INPUT_SIZE, Image.NEAREST)
+    return np.asarray(img, dtype=np.float32) / 255.0
+
+
+class CNNDetector:
+    def __init__(self, model_path, max_batch_size=1, max_wait_ms=5, backend="keras", num_threads=None):
+        """
+        :param model_path: path ke file model CNN (.h5 / .tflite / .onnx sesuai backend)
+        :param max_batch_size: > 1 untuk mengaktifkan micro-batching antar request
+        :param max_wait_ms: waktu tunggu maksimal pengumpulan batch (micro-batching)
+        :param backend: "keras", "tflite" atau "onnx" (lihat module/cnn_export.py)
+        :param num_threads: jumlah thread CPU untuk backend tflite/onnx
+        """
+        self.backend_name = backend
+        try:
+            self.backend = load_backend(model_path, backend, num_threads)
         except Exception as e:
             print(f"Error loading CNN model: {e}")
-            self.model = None
-
-
-    def detect_objects(self, img_path):
-        """
-        Jalankan deteksi objek dan simpan hasil ke direktori output.
-        :param img_path: path gambar input
-        :param class_names: daftar nama kelas untuk klasifikasi
-        :return: path gambar hasil proses YOLO
-        
-        """
-        # Implementasi deteksi objek menggunakan model CNN
-        img = tf.keras.preprocessing.image.load_img(img_path, target_size=(224, 224))
-        img_array = tf.keras.preprocessing.image.img_to_array(img)
-        img_array = np.expand_dims(img_array, axis=0)
-        img_array = img_array / 255.0
-        predictions = self.model.predict(img_array)
-        # predicted_class = CLASS_NAMES[np.argmax(predictions[0])]
-        predicted_class = np.argmax(predictions, axis=1)[0]
-        predicted_class = CLASS_NAMES[predicted_class]
-        confidence = np.max(predictions)
-        
-        return predicted_class, confidence
\ No newline at end of file
+            self.backend = None
+
+        # Request upload konkuren digabung jadi satu forward pass
+        self.batcher = None
+        if max_batch_size > 1:
+            self.batcher = MicroBatcher(
+                self.predict_batch,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                name="cnn-batcher"
+            )
+
+    def preprocess(self, image):
+        """
+        Baca dan normalisasi gambar ke input model.
+        :param image: path gambar input atau array BGR yang sudah di-decode
+        :return: array (224, 224, 3)
+        """
+        if isinstance(image, np.ndarray):
+            return image_to_input(image)
+        return load_image_array(image)
+
+    def predict_proba(self, img_arrays):
+        """
+        Probabilitas semua kelas untuk beberapa gambar dalam satu forward pass.
+        :param img_arrays: list array hasil preprocess()
+        :return: array (N, jumlah kelas)
+        """
+        return np.asarray(self.backend.predict(np.stack(img_arrays)))
+
+    def predict_batch(self, img_arrays):
+        """
+        Klasifikasi beberapa gambar dalam satu forward pass.
+        :param img_arrays: list array hasil preprocess()
+        :return: list (class_name, confidence) dengan urutan yang sama
+        """
+        predictions = self.predict_proba(img_arrays)
+        indices = np.argmax(predictions, axis=1)
+        return [
+            (CLASS_NAMES[idx], np.max(pred))
+            for idx, pred in zip(indices, predictions)
+        ]
+
+    def detect_objects(self, image):
+        """
+        Klasifikasi penyakit daun pada satu gambar.
+        :param image: path gambar input atau array BGR yang sudah di-decode
+        :return: (class_name, confidence)
+        """
+        img_array = self.preprocess(image)
+        if self.batcher is not None:
+            return self.batcher(img_array)
+        return self.predict_batch([img_array])[0]
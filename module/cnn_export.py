@@ -0,0 +1,119 @@
+"""
+Ekspor model fusion CNN (.h5) ke TFLite atau ONNX untuk backend CPU yang lebih ringan.
+
+Contoh (dari root project):
+    python -m module.cnn_export --format tflite --quantize int8 --output model/cnn_int8.tflite
+    python -m module.cnn_export --format tflite --quantize float16 --output model/cnn_fp16.tflite
+    python -m module.cnn_export --format onnx --output model/cnn.onnx
+    python -m module.cnn_export --format onnx --quantize int8 --output model/cnn_int8.onnx
+"""
+
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from module.cnn import INPUT_SIZE, load_image_array
+
+DEFAULT_MODEL_PATH = "model/best_fusion_model(light)_(2025-11-06_18-17).h5"
+CALIBRATION_DIR = "cnn"
+
+
+def calibration_images(image_dir=CALIBRATION_DIR):
+    """Path gambar contoh untuk kalibrasi kuantisasi dan cek akurasi."""
+    return sorted(
+        path for ext in ("jpg", "jpeg", "png", "webp")
+        for path in glob.glob(os.path.join(image_dir, f"*.{ext}"))
+    )
+
+
+def _load_keras(model_path):
+    import tensorflow as tf
+
+    return tf.keras.models.load_model(model_path, compile=False, safe_mode=False)
+
+
+def export_tflite(model_path, output_path, quantize=None, image_dir=CALIBRATION_DIR):
+    """
+    Konversi ke TFLite.
+    :param quantize: None, "dynamic", "float16" atau "int8" (kalibrasi dengan gambar di image_dir)
+    :return: output_path
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(_load_keras(model_path))
+    if quantize == "dynamic":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif quantize == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == "int8":
+        images = calibration_images(image_dir)
+        if not images:
+            raise ValueError(f"No calibration images found in '{image_dir}'")
+
+        def representative_dataset():
+            for path in images:
+                yield [load_image_array(path)[np.newaxis, ...]]
+
+        # Bobot dan aktivasi int8, input/output tetap float agar preprocessing tidak berubah
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+    elif quantize is not None:
+        raise ValueError(f"Unknown TFLite quantization '{quantize}'")
+
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+    return output_path
+
+
+def export_onnx(model_path, output_path, quantize=None, opset=13):
+    """
+    Konversi ke ONNX lewat tf2onnx.
+    :param quantize: None atau "int8" (kuantisasi dinamis ONNX Runtime)
+    :return: output_path
+    """
+    import tensorflow as tf
+    import tf2onnx
+
+    model = _load_keras(model_path)
+    spec = (tf.TensorSpec((None, *INPUT_SIZE, 3), tf.float32, name="input"),)
+    if quantize is None:
+        tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=output_path)
+        return output_path
+
+    if quantize != "int8":
+        raise ValueError(f"Unknown ONNX quantization '{quantize}'")
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    root, ext = os.path.splitext(output_path)
+    float_path = f"{root}_fp32{ext or '.onnx'}"
+    try:
+        tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=float_path)
+        quantize_dynamic(float_path, output_path, weight_type=QuantType.QInt8)
+    finally:
+        # Model float hanya perantara kuantisasi
+        if os.path.exists(float_path):
+            os.remove(float_path)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--format", choices=("tflite", "onnx"), required=True)
+    parser.add_argument("--quantize", choices=("dynamic", "float16", "int8"), default=None)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--images", default=CALIBRATION_DIR, help="gambar kalibrasi int8 (TFLite)")
+    args = parser.parse_args()
+
+    if args.format == "tflite":
+        path = export_tflite(args.model, args.output, args.quantize, args.images)
+    else:
+        path = export_onnx(args.model, args.output, args.quantize)
+    print(f"Exported {args.format} model to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
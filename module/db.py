@@ -1,10 +1,76 @@
+import queue
 import sqlite3
+import threading
+import time
+
+# Versi skema disimpan di PRAGMA user_version, dinaikkan setiap ada migrasi baru
+SCHEMA_VERSION = 3
+
+
+def estimate_tokens(text):
+    """
+    Perkiraan kasar jumlah token (~4 karakter per token) tanpa tokenizer.
+    :param text: teks pesan
+    :return: perkiraan jumlah token
+    """
+    return len(text) // 4 + 1
+
+
+def configure_connection(conn, cache_size_kb=20000, busy_timeout_ms=5000):
+    """
+    Terapkan PRAGMA untuk akses konkuren: WAL agar pembaca tidak diblokir penulis,
+    synchronous=NORMAL (aman untuk WAL), cache halaman lebih besar dan busy timeout.
+    :param conn: koneksi sqlite3
+    :return: koneksi yang sama
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{int(cache_size_kb)}")
+    conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def apply_window(history, max_messages=None, max_tokens=None):
+    """
+    Potong riwayat (role, message) menjadi N pesan / K token terakhir.
+    :param history: list (role, message) urut dari yang paling lama
+    :return: list (role, message) yang masuk window
+    """
+    window = []
+    used_tokens = 0
+    for role, message in reversed(history):
+        if max_messages is not None and len(window) >= max_messages:
+            break
+        cost = estimate_tokens(message)
+        if max_tokens is not None and window and used_tokens + cost > max_tokens:
+            break
+        window.append((role, message))
+        used_tokens += cost
+    return list(reversed(window))
+
+
+def touch_room(cursor, session_id, room_id, last_message_id=0):
+    """
+    Naikkan versi room (dalam transaksi pemanggil) setelah pesan/ringkasan berubah.
+    :param last_message_id: id pesan terbaru yang baru ditulis, 0 jika tidak ada
+    """
+    cursor.execute('''
+        INSERT INTO chat_room (session_id, room_id, version, last_message_id)
+        VALUES (?, ?, 1, ?)
+        ON CONFLICT (session_id, room_id) DO UPDATE SET
+            version = version + 1,
+            last_message_id = MAX(last_message_id, excluded.last_message_id)
+    ''', (session_id, room_id, last_message_id))
+
 
 class Database:
-    def __init__(self, db_file):
-        self.conn = sqlite3.connect(db_file)
+    def __init__(self, db_file, conn=None, writer=None):
+        self.conn = conn if conn is not None else sqlite3.connect(db_file)
         self.cursor = self.conn.cursor()
-    
+        # Jika diisi (WriteBehindWriter), save_message hanya mengantre pesan
+        self.writer = writer
+
     def init_db(self):
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS chat_history (
@@ -17,24 +83,411 @@ class Database:
             )
         ''')
         self.conn.commit()
-    
-    def get_history(self, session_id, room_id):
-        self.cursor.execute(
-            "SELECT role, message FROM chat_history WHERE session_id = ? AND room_id = ? ORDER BY timestamp ASC", 
-            (session_id, room_id)
-        )
-        history = self.cursor.fetchall()
-        # JANGAN tutup koneksi di sini!
-        return history
+        self.migrate()
+
+    def migrate(self):
+        """
+        Jalankan migrasi skema yang belum diterapkan (aman dipanggil berulang).
+        :return: versi skema setelah migrasi
+        """
+        version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+
+        if version < 1:
+            # Index komposit agar riwayat per room tidak perlu full table scan
+            self.cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_chat_history_room
+                ON chat_history (session_id, room_id, id)
+            ''')
+            version = 1
+
+        if version < 2:
+            # Ringkasan bergulir per room untuk membatasi ukuran prompt
+            self.cursor.execute('''
+                CREATE TABLE IF NOT EXISTS chat_summary (
+                    session_id TEXT NOT NULL,
+                    room_id TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    last_message_id INTEGER NOT NULL,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (session_id, room_id)
+                )
+            ''')
+            version = 2
+
+        if version < 3:
+            # Versi per room: dinaikkan setiap ada perubahan pesan/ringkasan,
+            # dipakai cache riwayat untuk invalidasi antar proses worker
+            self.cursor.execute('''
+                CREATE TABLE IF NOT EXISTS chat_room (
+                    session_id TEXT NOT NULL,
+                    room_id TEXT NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    last_message_id INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (session_id, room_id)
+                )
+            ''')
+            self.cursor.execute('''
+                INSERT OR IGNORE INTO chat_room (session_id, room_id, version, last_message_id)
+                SELECT session_id, room_id, 1, MAX(id) FROM chat_history GROUP BY session_id, room_id
+            ''')
+            version = 3
+
+        self.cursor.execute(f"PRAGMA user_version = {version}")
+        self.conn.commit()
+        return version
+
+    def get_history(self, session_id, room_id, max_messages=None, max_tokens=None, after_id=0):
+        """
+        Ambil riwayat percakapan sebuah room, urut dari yang paling lama.
+        :param max_messages: jika diisi, hanya N pesan terakhir
+        :param max_tokens: jika diisi, pesan terakhir yang muat dalam K token
+        :param after_id: hanya pesan dengan id > after_id (mis. yang belum masuk ringkasan)
+        :return: list (role, message)
+        """
+        if self.writer is None:
+            return self._read_history(session_id, room_id, max_messages, max_tokens, after_id)
+
+        # Read-your-writes: gabungkan isi tabel dengan pesan room ini yang masih antre.
+        # Jika ada flush yang selesai di tengah pembacaan, baca ulang agar tidak dobel/hilang.
+        while True:
+            generation, pending = self.writer.snapshot_room(session_id, room_id)
+            history = self._read_history(session_id, room_id, max_messages, max_tokens, after_id)
+            if self.writer.generation == generation:
+                break
+        if not pending:
+            return history
+        return apply_window(history + pending, max_messages, max_tokens)
+
+    def _read_history(self, session_id, room_id, max_messages=None, max_tokens=None, after_id=0):
+        if max_messages is None and max_tokens is None:
+            self.cursor.execute(
+                "SELECT role, message FROM chat_history WHERE session_id = ? AND room_id = ? AND id > ? "
+                "ORDER BY id ASC",
+                (session_id, room_id, after_id)
+            )
+            history = self.cursor.fetchall()
+            # JANGAN tutup koneksi di sini!
+            return history
+
+        # Mode window: baca mundur dari pesan terbaru lewat index, berhenti saat batas tercapai
+        window = []
+        used_tokens = 0
+        before_id = None
+        page_size = max_messages if max_messages is not None else 50
+        while True:
+            page = self._fetch_page(session_id, room_id, before_id=before_id, limit=page_size)
+            if not page:
+                break
+            for msg_id, role, message in reversed(page):
+                if msg_id <= after_id:
+                    return list(reversed(window))
+                if max_messages is not None and len(window) >= max_messages:
+                    return list(reversed(window))
+                cost = estimate_tokens(message)
+                if max_tokens is not None and window and used_tokens + cost > max_tokens:
+                    return list(reversed(window))
+                window.append((role, message))
+                used_tokens += cost
+            before_id = page[0][0]
+        return list(reversed(window))
+
+    def get_history_page(self, session_id, room_id, before_id=None, after_id=None, limit=50,
+                         include_pending=True):
+        """
+        Paginasi keyset riwayat percakapan berdasarkan id pesan.
+        :param before_id: ambil pesan dengan id < before_id (halaman sebelumnya)
+        :param after_id: ambil pesan dengan id > after_id (halaman berikutnya)
+        :param limit: jumlah pesan maksimal per halaman
+        :param include_pending: jika False, hanya pesan yang sudah di-commit (antrean tidak di-flush)
+        :return: list (id, role, message) urut naik berdasarkan id
+        """
+        # Pesan yang masih antre belum punya id, jadi ditulis dulu sebelum paginasi
+        if include_pending and self.writer is not None and self.writer.has_pending(session_id, room_id):
+            self.writer.flush()
+        return self._fetch_page(session_id, room_id, before_id, after_id, limit)
+
+    def _fetch_page(self, session_id, room_id, before_id=None, after_id=None, limit=50):
+        if after_id is not None:
+            self.cursor.execute(
+                "SELECT id, role, message FROM chat_history "
+                "WHERE session_id = ? AND room_id = ? AND id > ? ORDER BY id ASC LIMIT ?",
+                (session_id, room_id, after_id, limit)
+            )
+            return self.cursor.fetchall()
+
+        if before_id is not None:
+            self.cursor.execute(
+                "SELECT id, role, message FROM chat_history "
+                "WHERE session_id = ? AND room_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (session_id, room_id, before_id, limit)
+            )
+        else:
+            self.cursor.execute(
+                "SELECT id, role, message FROM chat_history "
+                "WHERE session_id = ? AND room_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, room_id, limit)
+            )
+        return list(reversed(self.cursor.fetchall()))
 
     def save_message(self, session_id, room_id, role, message):
+        if self.writer is not None:
+            self.writer.enqueue(session_id, room_id, role, message)
+            return
         self.cursor.execute('''
             INSERT INTO chat_history (session_id, room_id, role, message)
             VALUES (?, ?, ?, ?)
         ''', (session_id, room_id, role, message))
+        touch_room(self.cursor, session_id, room_id, self.cursor.lastrowid)
         self.conn.commit()
         # JANGAN tutup koneksi di sini!
-    
+
+    def get_room_state(self, session_id, room_id):
+        """
+        Versi dan id pesan terakhir sebuah room (lookup primary key, murah).
+        :return: (version, last_message_id), (0, 0) jika room belum ada
+        """
+        row = self.cursor.execute(
+            "SELECT version, last_message_id FROM chat_room WHERE session_id = ? AND room_id = ?",
+            (session_id, room_id)
+        ).fetchone()
+        return row if row is not None else (0, 0)
+
+    def get_summary(self, session_id, room_id):
+        """
+        Ambil ringkasan percakapan sebuah room.
+        :return: (summary, last_message_id), ("", 0) jika belum ada ringkasan
+        """
+        row = self.cursor.execute(
+            "SELECT summary, last_message_id FROM chat_summary WHERE session_id = ? AND room_id = ?",
+            (session_id, room_id)
+        ).fetchone()
+        return row if row is not None else ("", 0)
+
+    def save_summary(self, session_id, room_id, summary, last_message_id):
+        """
+        Simpan ringkasan yang mencakup semua pesan sampai last_message_id.
+        """
+        self.cursor.execute('''
+            INSERT INTO chat_summary (session_id, room_id, summary, last_message_id)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (session_id, room_id) DO UPDATE SET
+                summary = excluded.summary,
+                last_message_id = excluded.last_message_id,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (session_id, room_id, summary, last_message_id))
+        touch_room(self.cursor, session_id, room_id)
+        self.conn.commit()
+
     def close(self):
         """Method untuk menutup koneksi ketika sudah selesai"""
-        self.conn.close()
\ No newline at end of file
+        self.conn.close()
+
+
+class WriteBehindWriter:
+    def __init__(self, db_file, batch_size=64, max_delay=0.05):
+        """
+        Penulisan pesan tertunda: pesan diantre lalu ditulis dalam satu transaksi
+        per kelompok, saat antrean mencapai batch_size atau setelah max_delay detik.
+        :param db_file: path file database SQLite
+        :param batch_size: jumlah pesan yang memicu flush
+        :param max_delay: waktu tunggu maksimal (detik) sebelum flush
+        """
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.conn = configure_connection(sqlite3.connect(db_file, check_same_thread=False))
+        self._pending = []
+        self._room_pending = {}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        # Ganjil = flush sedang berjalan, genap = stabil (dipakai get_history)
+        self.generation = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, session_id, room_id, role, message):
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("WriteBehindWriter sudah ditutup")
+            self._pending.append((session_id, room_id, role, message))
+            key = (session_id, room_id)
+            self._room_pending[key] = self._room_pending.get(key, 0) + 1
+            # Pesan pertama memulai hitungan max_delay; notify_all karena snapshot_room
+            # juga menunggu di condition yang sama
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+    def has_pending(self, session_id, room_id):
+        with self._cond:
+            return (session_id, room_id) in self._room_pending
+
+    def snapshot_room(self, session_id, room_id):
+        """
+        Salinan pesan antre untuk satu room, diambil saat tidak ada flush berjalan.
+        :return: (generation, list (role, message))
+        """
+        with self._cond:
+            while self.generation % 2 == 1:
+                self._cond.wait()
+            if (session_id, room_id) not in self._room_pending:
+                return self.generation, []
+            pending = [
+                (role, message) for s_id, r_id, role, message in self._pending
+                if s_id == session_id and r_id == room_id
+            ]
+            return self.generation, pending
+
+    def flush(self):
+        """
+        Tulis semua pesan yang sedang antre dalam satu transaksi (sinkron).
+        :return: jumlah pesan yang ditulis
+        """
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._pending)
+                if not batch:
+                    return 0
+                self.generation += 1
+            try:
+                cursor = self.conn.cursor()
+                cursor.executemany('''
+                    INSERT INTO chat_history (session_id, room_id, role, message)
+                    VALUES (?, ?, ?, ?)
+                ''', batch)
+                for session_id, room_id in {(s_id, r_id) for s_id, r_id, _, _ in batch}:
+                    last_id = cursor.execute(
+                        "SELECT MAX(id) FROM chat_history WHERE session_id = ? AND room_id = ?",
+                        (session_id, room_id)
+                    ).fetchone()[0]
+                    touch_room(cursor, session_id, room_id, last_id)
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                with self._cond:
+                    self.generation += 1
+                    self._cond.notify_all()
+                raise
+            with self._cond:
+                # Hanya flush yang menghapus dari depan antrean, enqueue selalu di belakang
+                del self._pending[:len(batch)]
+                for session_id, room_id, _, _ in batch:
+                    key = (session_id, room_id)
+                    self._room_pending[key] -= 1
+                    if self._room_pending[key] == 0:
+                        del self._room_pending[key]
+                self.generation += 1
+                self._cond.notify_all()
+            return len(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                # Beri waktu pesan lain ikut masuk ke transaksi yang sama
+                deadline = time.monotonic() + self.max_delay
+                while len(self._pending) < self.batch_size and not self._stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"Error flushing chat messages: {e}")
+                time.sleep(self.max_delay)
+
+    def close(self):
+        """Hentikan thread penulis lalu tulis sisa antrean."""
+        with self._cond:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()
+        self.conn.close()
+
+
+class ConnectionPool:
+    def __init__(self, db_file, max_idle=8, cache_size_kb=20000, busy_timeout_ms=5000,
+                 write_behind=False, batch_size=64, max_delay=0.05):
+        """
+        Pool koneksi SQLite: koneksi yang sudah dikonfigurasi (WAL) dipakai ulang
+        antar request, skema cukup diinisialisasi sekali saat startup.
+        :param db_file: path file database SQLite
+        :param max_idle: jumlah koneksi menganggur maksimal yang disimpan
+        :param cache_size_kb: ukuran cache halaman per koneksi (KiB)
+        :param busy_timeout_ms: waktu tunggu lock sebelum error
+        :param write_behind: jika True, save_message diantre dan ditulis berkelompok
+        :param batch_size: jumlah pesan yang memicu flush (mode write-behind)
+        :param max_delay: waktu tunggu maksimal flush dalam detik (mode write-behind)
+        """
+        self.db_file = db_file
+        self.max_idle = max_idle
+        self.cache_size_kb = cache_size_kb
+        self.busy_timeout_ms = busy_timeout_ms
+        self._idle = queue.LifoQueue()
+        self._closed = False
+        self.writer = None
+
+        # Inisialisasi skema + migrasi sekali saja
+        db = self.acquire()
+        db.init_db()
+        self.release(db)
+
+        self.writer = WriteBehindWriter(db_file, batch_size, max_delay) if write_behind else None
+
+    def _connect(self):
+        # check_same_thread=False: koneksi boleh pindah thread, tapi hanya dipakai satu request
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        configure_connection(conn, self.cache_size_kb, self.busy_timeout_ms)
+        return Database(self.db_file, conn=conn)
+
+    def acquire(self):
+        """
+        Ambil koneksi menganggur dari pool, buat baru jika pool kosong.
+        :return: instance Database yang dipakai eksklusif sampai release()
+        """
+        try:
+            db = self._idle.get_nowait()
+        except queue.Empty:
+            db = self._connect()
+        db.writer = self.writer
+        return db
+
+    def release(self, db):
+        """
+        Kembalikan koneksi ke pool; transaksi yang menggantung di-rollback.
+        :param db: instance Database dari acquire()
+        """
+        if db.conn.in_transaction:
+            db.conn.rollback()
+        if self._closed or self._idle.qsize() >= self.max_idle:
+            db.close()
+            return
+        self._idle.put(db)
+
+    def close_all(self):
+        """Tutup semua koneksi menganggur dan flush antrean (dipanggil saat aplikasi berhenti)"""
+        self._closed = True
+        if self.writer is not None:
+            self.writer.close()
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+if __name__ == "__main__":
+    # Migrasi file database yang sudah ada: python -m module.db database.db
+    import sys
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "database.db"
+    db = Database(db_path)
+    db.init_db()
+    print(f"Database '{db_path}' migrated to schema version {SCHEMA_VERSION}.")
+    db.close()
@@ -0,0 +1,193 @@
+import itertools
+import sys
+import threading
+from collections import OrderedDict, deque
+
+from module.db import estimate_tokens
+from module.summary import format_line
+
+
+class _RoomEntry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = -1
+        self.last_message_id = 0
+        self.summary = ""
+        self.summary_id = 0
+        # (id, role, message, baris terformat): pesan yang sudah di-commit dan belum diringkas
+        self.rows = deque()
+        self.text = None
+        self.text_tokens = None
+        self.size = 0
+
+    def append(self, msg_id, role, message):
+        self.rows.append((msg_id, role, message, format_line(role, message)))
+        self.last_message_id = msg_id
+        self.text = None
+
+    def fold(self, summary, summary_id):
+        """Ganti ringkasan; pesan dengan id <= summary_id sudah tercakup di dalamnya."""
+        self.summary = summary
+        self.summary_id = summary_id
+        while self.rows and self.rows[0][0] <= summary_id:
+            self.rows.popleft()
+            self.text = None
+
+    def formatted(self, tail_tokens=None):
+        """Baris terformat pesan terakhir dalam tail_tokens, disimpan sampai rows berubah."""
+        if self.text is None or self.text_tokens != tail_tokens:
+            self.text = self.tail_text(tail_tokens)
+            self.text_tokens = tail_tokens
+        return self.text
+
+    def tail_text(self, tail_tokens, pending=()):
+        """
+        Sama dengan select_tail + format_messages atas rows + pending, tetapi hanya membaca
+        pesan dari belakang sampai anggaran habis (baris rows sudah terformat).
+        :param pending: list (role, message) antrean write-behind, lebih baru dari rows
+        """
+        newest = itertools.chain(
+            ((message, format_line(role, message)) for role, message in reversed(pending)),
+            ((row[2], row[3]) for row in reversed(self.rows)),
+        )
+        lines = []
+        used_tokens = 0
+        for count, (message, line) in enumerate(newest):
+            cost = estimate_tokens(message)
+            if tail_tokens is not None and count and used_tokens + cost > tail_tokens:
+                break
+            used_tokens += cost
+            if line is not None:
+                lines.append(line)
+        return "\n".join(reversed(lines))
+
+    def measure(self):
+        # Perkiraan kasar: teks pesan + baris terformat + ringkasan + overhead tuple
+        self.size = sys.getsizeof(self.summary) + sum(
+            2 * len(row[2]) + 200 for row in self.rows
+        )
+        return self.size
+
+
+class HistoryCache:
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        """
+        Cache LRU riwayat terformat per (session_id, room_id): ringkasan + pesan yang belum
+        diringkas. Pesan baru ditambahkan secara inkremental (hanya id > last_message_id yang
+        dibaca dari DB), pesan yang sudah dilipat ke ringkasan dibuang, dan versi room di tabel
+        chat_room menjaga cache tetap benar antar proses worker.
+        :param max_bytes: batas perkiraan memori seluruh cache
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def get_context(self, db, session_id, room_id, tail_tokens=None):
+        """
+        Ambil ringkasan dan riwayat terformat untuk prompt.
+        :param db: instance Database milik request saat ini
+        :param tail_tokens: anggaran token pesan terakhir yang disertakan (None = semua)
+        :return: (summary, string riwayat Human:/Assistant:)
+        """
+        if db.writer is None:
+            entry = self._committed(db, session_id, room_id)
+            with entry.lock:
+                return entry.summary, entry.formatted(tail_tokens)
+
+        # Sama seperti Database.get_history: gabungkan pesan yang masih antre write-behind
+        while True:
+            generation, pending = db.writer.snapshot_room(session_id, room_id)
+            entry = self._committed(db, session_id, room_id)
+            with entry.lock:
+                summary = entry.summary
+                # Tanpa antrean: teks dari cache; dengan antrean hanya tail yang dibentuk ulang
+                text = entry.tail_text(tail_tokens, pending) if pending else entry.formatted(tail_tokens)
+            if db.writer.generation == generation:
+                break
+        return summary, text
+
+    def _committed(self, db, session_id, room_id):
+        key = (session_id, room_id)
+        version, last_message_id = db.get_room_state(session_id, room_id)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _RoomEntry()
+                self._entries[key] = entry
+            else:
+                self._entries.move_to_end(key)
+
+        with entry.lock:
+            if entry.version == version:
+                self.hits += 1
+                return entry
+
+            # Ringkasan dibaca sebelum pesan: pesan yang dilipat setelah ini ikut terbaca dan
+            # baru dibuang saat versi room berikutnya (save_summary menaikkan versi)
+            summary, summary_id = db.get_summary(session_id, room_id)
+            if entry.version >= 0 and entry.last_message_id <= last_message_id:
+                # Hanya pesan baru (dari proses ini atau worker lain) yang dibaca
+                self.refreshes += 1
+                after_id = entry.last_message_id
+                while True:
+                    page = db.get_history_page(
+                        session_id, room_id, after_id=after_id, limit=100, include_pending=False
+                    )
+                    if not page:
+                        break
+                    for msg_id, role, message in page:
+                        entry.append(msg_id, role, message)
+                    after_id = page[-1][0]
+            else:
+                # Belum ada di cache (atau riwayat di DB berubah tidak wajar): baca ulang
+                # semua pesan setelah ringkasan
+                self.misses += 1
+                entry.rows.clear()
+                entry.last_message_id = 0
+                after_id = summary_id
+                while True:
+                    page = db.get_history_page(
+                        session_id, room_id, after_id=after_id, limit=100, include_pending=False
+                    )
+                    if not page:
+                        break
+                    for msg_id, role, message in page:
+                        entry.append(msg_id, role, message)
+                    after_id = page[-1][0]
+                entry.last_message_id = max(entry.last_message_id, summary_id)
+
+            entry.fold(summary, summary_id)
+            # Jangan mundur jika thread lain sudah menyegarkan ke versi lebih baru
+            entry.version = max(entry.version, version)
+            old_size = entry.size
+            new_size = entry.measure()
+
+        with self._lock:
+            if self._entries.get(key) is entry:
+                self._bytes += new_size - old_size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+        return entry
+
+    def invalidate(self, session_id, room_id):
+        """Buang cache satu room (mis. setelah riwayat dihapus manual)."""
+        with self._lock:
+            entry = self._entries.pop((session_id, room_id), None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rooms": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+            }
@@ -0,0 +1,158 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+METHODS = ("rrf", "blend")
+
+
+class ChromaSearcher:
+    def __init__(self, vector_store):
+        """Pencarian dense (IndoBERT) di vector store Chroma atau VectorIndex."""
+        self.vector_store = vector_store
+
+    def search(self, query, k):
+        """
+        :return: (list Document, array skor) urut dari yang paling relevan (skor lebih besar = lebih relevan)
+        """
+        results = self.vector_store.similarity_search_with_score(query, k=k)
+        # Chroma mengembalikan jarak (lebih kecil = lebih dekat)
+        return [doc for doc, _ in results], -np.array([distance for _, distance in results], dtype=np.float64)
+
+
+def fuse_scores(ranks, scores, weights, method="rrf", rrf_c=60):
+    """
+    Gabungkan hasil beberapa sumber untuk dokumen unik.
+    :param ranks: array (S, U) peringkat 0-based dokumen per sumber, -1 jika tidak ditemukan
+    :param scores: array (S, U) skor mentah per sumber (diabaikan di posisi rank -1)
+    :param weights: array (S,) bobot sumber
+    :param method: "rrf" (weighted reciprocal rank fusion) atau "blend" (skor min-max dijumlahkan berbobot)
+    :return: array (U,) skor gabungan
+    """
+    found = ranks >= 0
+    weights = np.asarray(weights, dtype=np.float64)[:, None]
+    if method == "rrf":
+        contribution = np.where(found, 1.0 / (rrf_c + ranks + 1), 0.0)
+    elif method == "blend":
+        contribution = np.zeros_like(scores, dtype=np.float64)
+        for s in range(len(ranks)):
+            row = scores[s, found[s]]
+            if row.size:
+                low, high = row.min(), row.max()
+                # Sumber dengan satu skor saja (high == low) dianggap relevan penuh
+                contribution[s, found[s]] = (row - low) / (high - low) if high > low else 1.0
+    else:
+        raise ValueError(f"Unknown fusion method '{method}', expected one of {METHODS}")
+    return (weights * contribution).sum(axis=0)
+
+
+class ParallelHybridRetriever:
+    def __init__(self, dense, sparse=None, method="rrf", weights=(0.8, 0.2), k=None,
+                 dense_k=5, sparse_k=4, rrf_c=60, max_workers=4):
+        """
+        Retriever hybrid: pencarian dense dan BM25 dijalankan bersamaan, skor digabung dengan NumPy.
+        :param dense: searcher dense (ChromaSearcher)
+        :param sparse: searcher BM25 (BM25Index), None = dense saja
+        :param method: "rrf" atau "blend"
+        :param weights: bobot (dense, sparse)
+        :param k: jumlah dokumen hasil gabungan; None = semua dokumen unik (seperti EnsembleRetriever)
+        :param dense_k: jumlah kandidat dari dense
+        :param sparse_k: jumlah kandidat dari BM25
+        :param rrf_c: konstanta RRF
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown fusion method '{method}', expected one of {METHODS}")
+        self.sources = [("dense", dense, dense_k)]
+        self.weights = [weights[0]]
+        if sparse is not None:
+            self.sources.append(("bm25", sparse, sparse_k))
+            self.weights.append(weights[1])
+        self.method = method
+        self.k = k
+        self.rrf_c = rrf_c
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hybrid-retriever")
+
+    def _submit(self, searcher, query, fetch_k):
+        try:
+            return self._executor.submit(searcher.search, query, fetch_k)
+        except RuntimeError:
+            # Sudah di-shutdown (diganti saat index di-refresh) tapi masih dipakai request berjalan
+            future = Future()
+            try:
+                future.set_result(searcher.search(query, fetch_k))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+    def _run_sources(self, query):
+        futures = [
+            (name, self._submit(searcher, query, fetch_k))
+            for name, searcher, fetch_k in self.sources
+        ]
+        results = []
+        for name, future in futures:
+            try:
+                results.append((name,) + tuple(future.result()))
+            except Exception as e:
+                # Satu sumber gagal: tetap jawab dengan sumber lain
+                print(f"Error in {name} retrieval: {e}")
+                results.append((name, [], np.empty(0)))
+        return results
+
+    def search(self, query):
+        """
+        :return: list (Document, skor gabungan, dict skor per sumber) urut dari yang paling relevan
+        """
+        results = self._run_sources(query)
+
+        # Deduplikasi berdasarkan isi dokumen
+        index, unique_docs = {}, []
+        for _, docs, _ in results:
+            for doc in docs:
+                if doc.page_content not in index:
+                    index[doc.page_content] = len(unique_docs)
+                    unique_docs.append(doc)
+        if not unique_docs:
+            return []
+
+        ranks = np.full((len(results), len(unique_docs)), -1, dtype=np.int64)
+        scores = np.zeros((len(results), len(unique_docs)), dtype=np.float64)
+        for s, (_, docs, source_scores) in enumerate(results):
+            positions = np.fromiter((index[doc.page_content] for doc in docs), dtype=np.int64, count=len(docs))
+            # Duplikat di dalam satu sumber: peringkat terbaik yang dipakai
+            first = np.unique(positions, return_index=True)[1]
+            ranks[s, positions[first]] = first
+            scores[s, positions[first]] = source_scores[first]
+
+        fused = fuse_scores(ranks, scores, self.weights, self.method, self.rrf_c)
+        order = np.argsort(-fused, kind="stable")
+        if self.k is not None:
+            order = order[:self.k]
+
+        names = [name for name, _, _ in results]
+        return [
+            (
+                unique_docs[u],
+                float(fused[u]),
+                {name: float(scores[s, u]) for s, name in enumerate(names) if ranks[s, u] >= 0},
+            )
+            for u in order
+        ]
+
+    def invoke(self, query):
+        """
+        Sama seperti retriever LangChain: list Document, dengan skor di metadata
+        (hybrid_score dan <sumber>_score untuk tiap sumber yang menemukan dokumen).
+        """
+        documents = []
+        for doc, fused, source_scores in self.search(query):
+            metadata = dict(doc.metadata)
+            metadata["hybrid_score"] = fused
+            for name, score in source_scores.items():
+                metadata[f"{name}_score"] = score
+            # Salinan, agar Document milik index BM25 tidak ikut berubah
+            documents.append(type(doc)(page_content=doc.page_content, metadata=metadata))
+        return documents
+
+    def shutdown(self):
+        """Hentikan thread pool; pencarian yang sudah berjalan tetap selesai."""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,147 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Sisi terpanjang salinan kerja (dipakai CNN, YOLO dan render anotasi)
+WORKING_MAX_SIDE = 1280
+# Batas jumlah piksel sebelum decode (melindungi dari decompression bomb)
+MAX_PIXELS = 50_000_000
+# Skala decode JPEG yang didukung libjpeg (dicoba dari yang paling kecil)
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def sniff_image_format(data):
+    """
+    Tebak format dari magic bytes header, tanpa decode.
+    :param data: isi file (bytes), cukup beberapa byte pertama
+    :return: "jpeg", "png", "webp" atau None jika bukan gambar yang didukung
+    """
+    if data[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def load_working_image(data, max_side=WORKING_MAX_SIDE, max_pixels=MAX_PIXELS):
+    """
+    Decode bytes upload langsung ke satu salinan kerja yang sudah diperkecil.
+    Ukuran dibaca dari header dulu (tanpa decode); JPEG lalu di-decode dengan skala
+    DCT 1/2, 1/4 atau 1/8 (draft mode libjpeg) sehingga piksel resolusi penuh tidak
+    pernah dibuat, sisanya diperkecil sekali dengan cv2.resize.
+    :param data: isi file gambar (bytes)
+    :param max_side: sisi terpanjang salinan kerja
+    :param max_pixels: jumlah piksel maksimal gambar asli
+    :return: (array uint8 (H, W, 3) format BGR, True jika gambar diperkecil)
+    """
+    image_format = sniff_image_format(data)
+    if image_format is None:
+        raise ValueError("Uploaded file is not a valid image")
+    try:
+        with Image.open(BytesIO(data)) as img:
+            width, height = img.size
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        # DecompressionBombError: ukuran header > 2x Image.MAX_IMAGE_PIXELS
+        raise ValueError("Uploaded file is not a valid image") from e
+    if width * height > max_pixels:
+        raise ValueError(f"Image is too large ({width}x{height})")
+
+    flags = cv2.IMREAD_COLOR
+    if image_format == "jpeg":
+        for reduction, reduced_flag in REDUCED_DECODE_FLAGS:
+            if max(width, height) / reduction >= max_side:
+                flags = reduced_flag
+                break
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+    if image is None:
+        raise ValueError("Uploaded file is not a valid image")
+
+    h, w = image.shape[:2]
+    if max(h, w) > max_side:
+        factor = max_side / max(h, w)
+        # Setelah decode tereduksi sisa faktornya < 2x: linear cukup dan jauh lebih cepat dari INTER_AREA
+        interpolation = cv2.INTER_LINEAR if factor > 0.5 else cv2.INTER_AREA
+        image = cv2.resize(image, (max(1, round(w * factor)), max(1, round(h * factor))),
+                           interpolation=interpolation)
+    return image, max(width, height) > max_side
+
+
+class UploadWriter:
+    def __init__(self, storage, max_workers=2):
+        """
+        Simpan file upload asli di thread latar agar tidak menambah latensi request.
+        Pembaca file (render anotasi, cache hasil) memanggil wait(path) dulu agar file yang
+        masih antre tidak dianggap hilang.
+        :param storage: StorageManager direktori upload
+        :param max_workers: jumlah thread penulis
+        """
+        self.storage = storage
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload-writer")
+        # path -> Future penulisan yang belum selesai
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _submit(self, name, fn, *args):
+        path = self.storage.path_for(name)
+        with self._lock:
+            future = self._executor.submit(fn, name, *args)
+            self._pending[path] = future
+        future.add_done_callback(lambda done: self._finished(path, done))
+        return path
+
+    def _finished(self, path, future):
+        with self._lock:
+            if self._pending.get(path) is future:
+                del self._pending[path]
+
+    def wait(self, path, timeout=None):
+        """
+        Tunggu penulisan file ini jika masih antre (langsung kembali jika tidak ada).
+        :param path: path tujuan dari save()/save_image()
+        """
+        with self._lock:
+            future = self._pending.get(path)
+        if future is not None:
+            future.result(timeout)
+
+    def _write(self, name, data):
+        try:
+            self.storage.write(name, data)
+        except OSError as e:
+            print(f"Error saving upload {name}: {e}")
+
+    def save(self, name, data):
+        """
+        Jadwalkan penyimpanan bytes asli (tanpa encode ulang).
+        :return: path tujuan file
+        """
+        return self._submit(name, self._write, data)
+
+    def _write_image(self, name, image, quality):
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            print(f"Error encoding upload {name}")
+            return
+        self._write(name, encoded.tobytes())
+
+    def save_image(self, name, image, quality=90):
+        """
+        Jadwalkan encode JPEG + penyimpanan salinan kerja (dipakai jika gambar diperkecil,
+        agar render anotasi memakai gambar dan koordinat box yang sama).
+        :return: path tujuan file
+        """
+        return self._submit(name, self._write_image, image, quality)
+
+    def shutdown(self):
+        """Tunggu semua penulisan selesai."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,173 @@
+"""
+Backend embedding IndoBERT di ONNX Runtime (CPU), opsional kuantisasi dinamis int8.
+OnnxEmbeddings adalah pengganti langsung HuggingFaceEmbeddings (Embeddings LangChain):
+tokenisasi, pooling dan normalisasi sama dengan model sentence-transformers aslinya.
+
+Ekspor (dari root project):
+    python -m module.onnx_embeddings --output model/indobert_onnx_int8 --quantize int8
+    python -m module.onnx_embeddings --output model/indobert_onnx
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_MODEL_NAME = "LazarusNLP/all-indobert-base-v2"
+CONFIG_FILE = "embedding_config.json"
+MODEL_FILE = "model.onnx"
+POOLING_MODES = ("mean", "cls", "max")
+
+
+def export_onnx(output_dir, model_name=DEFAULT_MODEL_NAME, quantize=None, opset=14):
+    """
+    Ekspor transformer sentence-transformers ke ONNX (batch dan panjang sequence dinamis)
+    beserta tokenizer dan konfigurasi pooling.
+    :param quantize: None atau "int8" (kuantisasi dinamis ONNX Runtime, bobot QInt8)
+    :return: path model.onnx
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if quantize not in (None, "int8"):
+        raise ValueError(f"Unknown ONNX quantization '{quantize}'")
+
+    os.makedirs(output_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    pooling = st_model[1].get_pooling_mode_str() if len(st_model) > 1 else "mean"
+    if pooling not in POOLING_MODES:
+        raise ValueError(f"Unsupported pooling mode '{pooling}'")
+
+    sample = tokenizer(["contoh kalimat"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    float_path = os.path.join(output_dir, "model_fp32.onnx" if quantize else MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            float_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+
+    output_path = os.path.join(output_dir, MODEL_FILE)
+    if quantize == "int8":
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(float_path, output_path, weight_type=QuantType.QInt8)
+        os.remove(float_path)
+
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model_name": model_name,
+            "pooling": pooling,
+            "max_seq_length": st_model.max_seq_length,
+            "quantize": quantize,
+        }, f, indent=2)
+    return output_path
+
+
+class OnnxEmbeddings(Embeddings):
+    def __init__(self, model_dir, num_threads=None, batch_size=32, normalize=True):
+        """
+        :param model_dir: direktori hasil export_onnx() (model.onnx, tokenizer, embedding_config.json)
+        :param num_threads: jumlah thread intra-op ONNX Runtime (None = default runtime)
+        :param batch_size: ukuran batch untuk embed_documents
+        :param normalize: normalisasi L2 (sama dengan encode_kwargs normalize_embeddings=True)
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.pooling = self.config["pooling"]
+        self.max_seq_length = self.config["max_seq_length"]
+        self.batch_size = batch_size
+        self.normalize = normalize
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    @property
+    def model_name(self):
+        """Nama untuk kunci cache: embedding ONNX int8 tidak identik dengan versi PyTorch."""
+        suffix = f"onnx-{self.config['quantize']}" if self.config.get("quantize") else "onnx"
+        return f"{self.config['model_name']}:{suffix}"
+
+    def _pool(self, hidden, mask):
+        if self.pooling == "cls":
+            return hidden[:, 0]
+        mask = mask[:, :, None].astype(np.float32)
+        if self.pooling == "max":
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def _encode_batch(self, texts):
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+        embeddings = self._pool(hidden, encoded["attention_mask"])
+        if self.normalize:
+            embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings.astype(np.float32)
+
+    def encode(self, texts):
+        """
+        :return: array (N, D) float32, urutan sama dengan texts
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        # Urutkan berdasarkan panjang agar padding per batch minimal (seperti sentence-transformers)
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        batches = [
+            self._encode_batch([texts[i] for i in order[start:start + self.batch_size]])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        embeddings = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.concatenate(batches)
+        return embeddings
+
+    def embed_documents(self, texts):
+        return self.encode(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self._encode_batch([text])[0].tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--quantize", choices=("int8",), default=None)
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+
+    path = export_onnx(args.output, args.model, args.quantize, args.opset)
+    print(f"Exported {args.model} to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,342 @@
 from langchain.prompts import ChatPromptTemplate
-from langchain.retrievers import EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
-import pickle
+from langchain_core.embeddings import Embeddings
+import numpy as np
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
 
 import os
+import json
+import time
+
+from module.batching import MicroBatcher
+from module.db import configure_connection
+from module.cnn import CLASS_NAMES
+from module.bm25_index import BM25Index, documents_from_vector_store, read_retriever_pickle
+from module.hybrid import ChromaSearcher, ParallelHybridRetriever
+from module.onnx_embeddings import OnnxEmbeddings
+from module.vector_index import VectorIndex
+from module.semantic_cache import disease_topic, is_context_free
+
+BM25_INDEX_DIR = "./bm25_index"
+# Sumber migrasi BM25 jika index belum dibangun offline (python -m module.bm25_index --from-pickle ...)
+BM25_PICKLE_PATH = "./bm25_index.pkl"
+# Tabel konteks retrieval per kelas penyakit (dibuat ulang jika index berubah)
+CLASS_CONTEXT_PATH = "./class_context.json"
+# Interval (detik) pengecekan perubahan file vector store / BM25
+INDEX_CHECK_INTERVAL = 30
+
+RAG_UNAVAILABLE_MESSAGE = "Maaf, sistem RAG belum tersedia. Silakan coba lagi nanti."
+RAG_ERROR_MESSAGE = "Maaf, terjadi kesalahan saat memproses pertanyaan Anda. Silakan coba lagi."
+
+def normalize_query(text):
+    """Kunci cache embedding: Unicode NFC, spasi dirapikan."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class BatchedEmbeddings(Embeddings):
+    def __init__(self, base, max_batch_size=16, max_wait_ms=5):
+        """
+        Gabungkan embed_query dari request yang datang bersamaan menjadi satu batch
+        (satu forward pass IndoBERT dengan padding), hasil dikembalikan ke masing-masing pemanggil.
+        :param base: model Embeddings LangChain yang dibungkus
+        :param max_batch_size: jumlah query maksimal per batch
+        :param max_wait_ms: waktu tunggu maksimal sejak query pertama masuk antrean
+        """
+        self.base = base
+        self.batcher = MicroBatcher(
+            self._embed_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            name="embedding-batcher"
+        )
+
+    def _embed_batch(self, texts):
+        unique = list(dict.fromkeys(texts))
+        if len(unique) == 1:
+            # Tidak ada query lain: jalur embed_query biasa
+            embedding = self.base.embed_query(unique[0])
+            return [embedding] * len(texts)
+        embeddings = dict(zip(unique, self.base.embed_documents(unique)))
+        return [embeddings[text] for text in texts]
+
+    def embed_documents(self, texts):
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.batcher(text)
+
+    def stats(self):
+        batches, items = self.batcher.batches, self.batcher.items
+        return {
+            "batches": batches,
+            "queries": items,
+            "avg_batch_size": items / batches if batches else 0.0,
+        }
+
+    def stop(self):
+        self.batcher.stop()
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, base, model_name, max_entries=4096, db_file=None, flush_interval=1.0,
+                 flush_size=64):
+        """
+        Lapisan cache LRU untuk embed_query (teks yang sama tidak di-encode ulang).
+        :param base: model Embeddings LangChain yang dibungkus (HuggingFaceEmbeddings)
+        :param model_name: nama model, bagian dari kunci di disk agar ganti model tidak memakai vektor lama
+        :param max_entries: jumlah embedding maksimal di memori
+        :param db_file: path SQLite opsional agar cache tetap hangat setelah restart
+        :param flush_interval: detik maksimal embedding baru menunggu sebelum ditulis ke SQLite
+        :param flush_size: jumlah embedding antre yang memicu penulisan lebih awal
+        """
+        self.base = base
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # query -> (blob embedding, waktu), ditulis berkelompok oleh thread latar
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._flushed = 0
+        self._stopped = False
+        self._thread = None
+
+        self.conn = None
+        if db_file:
+            self.conn = configure_connection(sqlite3.connect(db_file, check_same_thread=False))
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS query_embedding_cache (
+                    model TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, query)
+                )
+            ''')
+            self.conn.commit()
+            # Muat entri terbaru ke memori (urut dari yang paling lama dipakai)
+            rows = self.conn.execute(
+                "SELECT query, embedding FROM query_embedding_cache WHERE model = ? "
+                "ORDER BY last_used DESC LIMIT ?",
+                (model_name, max_entries)
+            ).fetchall()
+            for query, blob in reversed(rows):
+                self._cache[query] = np.frombuffer(blob, dtype=np.float32).tolist()
+            self._thread = threading.Thread(target=self._run, name="embedding-cache-writer", daemon=True)
+            self._thread.start()
+
+    def embed_documents(self, texts):
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text):
+        key = normalize_query(text)
+        with self._lock:
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return embedding
+            self.misses += 1
+
+        embedding = self.base.embed_query(key)
+        with self._lock:
+            self._cache[key] = embedding
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        if self.conn is not None:
+            # Penulisan SQLite tidak menambah latensi request: diantre, di-commit per kelompok
+            with self._cond:
+                self._pending[key] = (np.asarray(embedding, dtype=np.float32).tobytes(), time.time())
+                if len(self._pending) >= self.flush_size:
+                    self._cond.notify()
+        return embedding
+
+    def flush(self):
+        """
+        Tulis embedding yang antre dalam satu transaksi (sinkron).
+        :return: jumlah embedding yang ditulis
+        """
+        with self._cond:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        with self._write_lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO query_embedding_cache (model, query, embedding, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                [(self.model_name, query, blob, used) for query, (blob, used) in batch.items()]
+            )
+            self._flushed += len(batch)
+            if self._flushed >= 256:
+                # Batasi ukuran file: simpan hanya entri yang paling baru dipakai
+                self._flushed = 0
+                self.conn.execute(
+                    "DELETE FROM query_embedding_cache WHERE model = ? AND query NOT IN ("
+                    "SELECT query FROM query_embedding_cache WHERE model = ? "
+                    "ORDER BY last_used DESC LIMIT ?)",
+                    (self.model_name, self.model_name, self.max_entries * 4)
+                )
+            self.conn.commit()
+        return len(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopped:
+                    self._cond.wait(self.flush_interval)
+                stopped = self._stopped
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"Error writing query embedding cache: {e}")
+            if stopped:
+                return
+
+    def close(self):
+        """Hentikan thread penulis lalu tulis sisa antrean."""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._thread = None
+        self.conn.close()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
 
 class RAGChatbot:
-    def __init__(self, llm_model, vector_dir):
+    def __init__(self, llm_model, vector_dir, answer_cache=None, embedding_cache_size=4096,
+                 embedding_cache_path=None, hybrid_method="rrf", hybrid_weights=(0.8, 0.2), hybrid_k=None,
+                 vector_backend="chroma", embedding_backend="torch", embedding_onnx_dir=None,
+                 embedding_threads=None, embedding_batch_size=16, embedding_batch_wait_ms=5):
+        """
+        :param llm_model: model chat LangChain (Gemini)
+        :param vector_dir: direktori vector store Chroma (atau VectorIndex jika vector_backend="numpy")
+        :param answer_cache: SemanticAnswerCache opsional untuk pertanyaan yang mirip
+        :param embedding_cache_size: jumlah embedding query di cache LRU (0 = tanpa cache)
+        :param embedding_cache_path: path SQLite opsional untuk cache embedding query
+        :param hybrid_method: penggabungan skor dense + BM25, "rrf" atau "blend"
+        :param hybrid_weights: bobot (dense, BM25)
+        :param hybrid_k: jumlah dokumen konteks; None = semua dokumen unik dari kedua sumber
+        :param vector_backend: "chroma" atau "numpy" (VectorIndex mmap, hasil ekspor module.vector_index)
+        :param embedding_backend: "torch" (HuggingFaceEmbeddings) atau "onnx" (OnnxEmbeddings, ONNX Runtime)
+        :param embedding_onnx_dir: direktori hasil ekspor module.onnx_embeddings (backend "onnx")
+        :param embedding_threads: jumlah thread ONNX Runtime (None = default runtime)
+        :param embedding_batch_size: query maksimal per batch embedding lintas request (<= 1 = tanpa batching)
+        :param embedding_batch_wait_ms: jendela pengumpulan query sebelum batch di-encode
+        """
         self.llm_model = llm_model
         self.vector_dir = vector_dir
+        self.answer_cache = answer_cache
+        self.embedding_cache_size = embedding_cache_size
+        self.embedding_cache_path = embedding_cache_path
+        self.hybrid_method = hybrid_method
+        self.hybrid_weights = hybrid_weights
+        self.hybrid_k = hybrid_k
+        self.vector_backend = vector_backend
+        self.embedding_backend = embedding_backend
+        self.embedding_onnx_dir = embedding_onnx_dir
+        self.embedding_threads = embedding_threads
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_batch_wait_ms = embedding_batch_wait_ms
         self._initialized = False
+        # Inisialisasi (IndoBERT, Chroma, BM25) hanya boleh jalan sekali walau request datang bersamaan
+        self._init_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._warmup_thread = None
+        self._class_contexts = {}
+        self._index_fingerprint = None
+        self._index_checked_at = 0.0
+        self._index_lock = threading.Lock()
         
         # Inisialisasi variabel untuk mencegah error
         self.vector_store = None
-        self.vector_retriever = None
-        self.bm25_retriever = None
+        self.embedding_model = None
+        self.embedding_batcher = None
+        self.bm25_index = None
         self.hybrid_retriever = None
         self.text_prompt_template = None
         self.img_prompt_template = None
     
     def _ensure_initialized(self):
-        """Lazy initialization - hanya load saat dibutuhkan"""
+        """Lazy initialization - hanya load saat dibutuhkan (thread-safe, sekali saja)"""
         if self._initialized:
             return
-        
+        with self._init_lock:
+            if self._initialized:
+                return
+            try:
+                self._initialize()
+            finally:
+                self._initialized = True
+                self._ready.set()
+
+    def _initialize(self):
         EMBEDDING_NAME = "LazarusNLP/all-indobert-base-v2"
         COLLECTION_NAME = "grape_vector_store"
-        BM25_INDEX_PATH = "./bm25_index.pkl"
         
         if not os.path.exists(self.vector_dir):
             print(f"Vector store directory '{self.vector_dir}' not found. RAG chatbot will not be available.")
-            self._initialized = True  # Set true untuk menghindari loop
             return
         
         print(f"Vector store directory '{self.vector_dir}' found.")
         
-        if os.path.exists(BM25_INDEX_PATH):
-            with open(BM25_INDEX_PATH, "rb") as f:
-                self.bm25_retriever = pickle.load(f)
-            print("BM25 index loaded from file.")
-        else:
-            print(f"Warning: BM25 index file not found at {BM25_INDEX_PATH}. BM25 retriever will not be available.")
-            self.bm25_retriever = None
-        
         try:
-            embedding_model = HuggingFaceEmbeddings(
-                model_name=EMBEDDING_NAME,
-                model_kwargs={"device": "cpu"},  # Gunakan "cuda" jika ada GPU
-                encode_kwargs={'normalize_embeddings': True}
-            )
-
-            vector_store = Chroma(
-                persist_directory=self.vector_dir,
-                embedding_function=embedding_model,
-                # collection_name=COLLECTION_NAME
-            )
+            if self.embedding_backend == "onnx":
+                embedding_model = OnnxEmbeddings(self.embedding_onnx_dir, num_threads=self.embedding_threads)
+                embedding_name = embedding_model.model_name
+            else:
+                embedding_model = HuggingFaceEmbeddings(
+                    model_name=EMBEDDING_NAME,
+                    model_kwargs={"device": "cpu"},  # Gunakan "cuda" jika ada GPU
+                    encode_kwargs={'normalize_embeddings': True}
+                )
+                embedding_name = EMBEDDING_NAME
+            if self.embedding_batch_size > 1:
+                # Cache miss dari request yang bersamaan di-encode dalam satu batch
+                embedding_model = self.embedding_batcher = BatchedEmbeddings(
+                    embedding_model,
+                    max_batch_size=self.embedding_batch_size,
+                    max_wait_ms=self.embedding_batch_wait_ms
+                )
+            if self.embedding_cache_size:
+                # Query yang sama (termasuk query tetap gambar) tidak di-encode ulang oleh IndoBERT
+                embedding_model = CachedEmbeddings(
+                    embedding_model,
+                    embedding_name,
+                    max_entries=self.embedding_cache_size,
+                    db_file=self.embedding_cache_path
+                )
 
+            self.embedding_model = embedding_model
+            vector_store, document_count = self._open_vector_store()
             self.vector_store = vector_store
+            self.bm25_index = self._load_bm25()
             print("RAG chatbot initialized successfully.")
-            print(f"Loaded existing vectorstore with {vector_store._collection.count()} documents")
-            
-            # Setup retrievers
-            self.vector_retriever = vector_store.as_retriever(
-                search_kwargs={"k": 5}
-            )
+            print(f"Loaded existing vectorstore ({self.vector_backend}) with {document_count} documents")
             
-            if self.bm25_retriever:
-                self.hybrid_retriever = EnsembleRetriever(
-                    retrievers=[self.vector_retriever, self.bm25_retriever],
-                    weights=[0.8, 0.2]
-                )
-            else:
-                # Fallback hanya ke vector retriever jika BM25 gagal dimuat
-                self.hybrid_retriever = self.vector_retriever
-                print("Warning: Using only vector retriever as fallback.")
+            self.hybrid_retriever = self._build_hybrid_retriever()
             
             # self.hybrid_retriever = EnsembleRetriever(
             #     retrievers=[self.vector_retriever, self.bm25_retriever],
@@ -131,13 +392,228 @@ Gunakan data berikut untuk menjawab:
 Pertanyaan pengguna: Berdasarkan penyakit yang terdeteksi yaitu {class_disease}, berikan informasi dan saran yang relevan.
 Asisten:
 """)
-            
-            self._initialized = True
+
+            # Konteks retrieval per kelas CNN dihitung sekali, bukan di setiap upload
+            try:
+                self._load_class_contexts()
+            except Exception as e:
+                print(f"Warning: class retrieval contexts not precomputed: {e}")
             
         except Exception as e:
             print(f"Error initializing RAG chatbot: {e}")
             self.vector_store = None
-            self._initialized = True  # Set true untuk menghindari loop inisialisasi
+
+    def _open_vector_store(self, reopen=False):
+        """
+        Buka vector store dense (VectorIndex untuk "numpy", Chroma untuk "chroma").
+        :param reopen: True saat file index berubah; client Chroma yang di-cache per proses
+                       dibuang agar index di disk dibaca ulang
+        :return: (vector store, jumlah dokumen)
+        """
+        if self.vector_backend == "numpy":
+            vector_store = VectorIndex(self.vector_dir, embedding_function=self.embedding_model)
+            return vector_store, len(vector_store)
+        if reopen:
+            from chromadb.api.client import SharedSystemClient
+
+            SharedSystemClient.clear_system_cache()
+        vector_store = Chroma(
+            persist_directory=self.vector_dir,
+            embedding_function=self.embedding_model,
+            # collection_name=COLLECTION_NAME
+        )
+        return vector_store, vector_store._collection.count()
+
+    def _load_bm25(self):
+        """
+        Buka index BM25 (mmap). Seharusnya dibangun offline; jika belum ada, dibangun sekali
+        (di bawah file lock, dipindah atomik) dari bm25_index.pkl, atau dari vector store
+        jika pickle tidak ada.
+        """
+        try:
+            if os.path.exists(os.path.join(BM25_INDEX_DIR, "meta.json")):
+                bm25_index = BM25Index(BM25_INDEX_DIR)
+                print(f"BM25 index loaded from {BM25_INDEX_DIR} ({len(bm25_index)} documents, k={bm25_index.k}).")
+                return bm25_index
+            if os.path.exists(BM25_PICKLE_PATH):
+                print(f"BM25 index not found at {BM25_INDEX_DIR}, migrating {BM25_PICKLE_PATH}.")
+                documents, params = read_retriever_pickle(BM25_PICKLE_PATH)
+                return BM25Index.build(BM25_INDEX_DIR, documents, **params)
+            print(f"BM25 index not found at {BM25_INDEX_DIR}, building it from the vector store.")
+            return BM25Index.build(BM25_INDEX_DIR, lambda: documents_from_vector_store(self.vector_store))
+        except Exception as e:
+            print(f"Warning: BM25 index not available: {e}")
+            return None
+
+    def _build_hybrid_retriever(self):
+        # Dense dan BM25 dicari paralel, skor digabung dengan NumPy (pengganti EnsembleRetriever)
+        sparse = self.bm25_index
+        if sparse is None:
+            # Fallback hanya ke vector retriever jika BM25 gagal dimuat
+            print("Warning: Using only vector retriever as fallback.")
+        return ParallelHybridRetriever(
+            ChromaSearcher(self.vector_store),
+            sparse,
+            method=self.hybrid_method,
+            weights=self.hybrid_weights,
+            k=self.hybrid_k,
+            dense_k=5,
+            sparse_k=sparse.k if sparse is not None else 5
+        )
+
+    def _current_fingerprint(self):
+        """Ukuran + mtime file index (vector store dan BM25) + konfigurasi hybrid; berubah jika index dibangun ulang."""
+        files = []
+        if self.vector_backend == "numpy":
+            # write_index() menulis meta.json terakhir (file .tmp yang sedang ditulis diabaikan)
+            files.extend(os.path.join(self.vector_dir, name) for name in ("meta.json", "vectors.npy"))
+        else:
+            for dirpath, _, filenames in os.walk(self.vector_dir):
+                for filename in filenames:
+                    # File shared-memory/lock SQLite berubah walau hanya dibaca
+                    if filename.endswith(("-shm", ".lock")):
+                        continue
+                    files.append(os.path.join(dirpath, filename))
+        bm25_meta = os.path.join(BM25_INDEX_DIR, "meta.json")
+        if os.path.exists(bm25_meta):
+            # meta.json ditulis terakhir setiap kali index dibangun/ditambah
+            files.append(bm25_meta)
+        fingerprint = []
+        for path in sorted(files):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            fingerprint.append([os.path.relpath(path), stat.st_size, stat.st_mtime_ns])
+        # Konfigurasi fusion juga menentukan isi konteks yang disimpan
+        fingerprint.append(["hybrid", self.hybrid_method, list(self.hybrid_weights), self.hybrid_k])
+        return fingerprint
+
+    @staticmethod
+    def _img_query(class_disease):
+        return f"Penyakit yang terdeteksi adalah {class_disease}. Berikan informasi dan saran yang relevan."
+
+    def _load_class_contexts(self):
+        """
+        Isi tabel konteks per kelas CNN dari CLASS_CONTEXT_PATH jika fingerprint index sama,
+        jika tidak jalankan retrieval untuk tiap kelas lalu simpan tabelnya.
+        """
+        fingerprint = self._current_fingerprint()
+        self._index_fingerprint = fingerprint
+        self._index_checked_at = time.monotonic()
+
+        if os.path.exists(CLASS_CONTEXT_PATH):
+            try:
+                with open(CLASS_CONTEXT_PATH, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                if stored.get("fingerprint") == fingerprint and set(stored["contexts"]) >= set(CLASS_NAMES):
+                    self._class_contexts = stored["contexts"]
+                    print("Class retrieval contexts loaded from file.")
+                    return
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: could not read {CLASS_CONTEXT_PATH}: {e}")
+
+        self._class_contexts = {
+            class_name: self._retrieve_context(self._img_query(class_name))
+            for class_name in CLASS_NAMES
+        }
+        try:
+            with open(CLASS_CONTEXT_PATH, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": fingerprint, "contexts": self._class_contexts}, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"Warning: could not write {CLASS_CONTEXT_PATH}: {e}")
+        print(f"Class retrieval contexts computed for {len(self._class_contexts)} classes.")
+
+    def _check_index_changes(self):
+        """Jika file vector store/BM25 berubah: buka ulang vector store dan BM25, hitung ulang tabel konteks."""
+        if time.monotonic() - self._index_checked_at < INDEX_CHECK_INTERVAL:
+            return
+        with self._index_lock:
+            if time.monotonic() - self._index_checked_at < INDEX_CHECK_INTERVAL:
+                return
+            self._index_checked_at = time.monotonic()
+            if self._current_fingerprint() == self._index_fingerprint:
+                return
+            print("Index files changed, rebuilding retrievers and class contexts.")
+            try:
+                self.vector_store, document_count = self._open_vector_store(reopen=True)
+                print(f"Reopened vectorstore ({self.vector_backend}) with {document_count} documents")
+            except Exception as e:
+                print(f"Warning: could not reopen vector store, keeping the old one: {e}")
+            self.bm25_index = self._load_bm25()
+            old_retriever = self.hybrid_retriever
+            self.hybrid_retriever = self._build_hybrid_retriever()
+            if old_retriever is not None:
+                # Tiap retriever punya thread pool sendiri; yang lama tidak dipakai lagi
+                old_retriever.shutdown()
+            self._load_class_contexts()
+
+    def _class_context(self, class_disease):
+        try:
+            self._check_index_changes()
+        except Exception as e:
+            print(f"Error refreshing class contexts: {e}")
+        context = self._class_contexts.get(class_disease)
+        if context is None:
+            # Kelas di luar tabel (mis. class_indices.json berubah): retrieval biasa
+            context = self._retrieve_context(self._img_query(class_disease))
+        return context
+
+    def warm_up(self):
+        """
+        Inisialisasi lalu jalankan satu embedding dan satu query dummy agar
+        alokasi memori/graph model sudah terjadi sebelum request pertama.
+        """
+        self._ensure_initialized()
+        if self.hybrid_retriever is None:
+            return
+        try:
+            self.embedding_model.embed_query("daun anggur")
+            self.hybrid_retriever.invoke("Apa gejala penyakit daun anggur?")
+            print("RAG chatbot warm-up finished.")
+        except Exception as e:
+            print(f"Error during RAG warm-up: {e}")
+
+    def start_warm_up(self):
+        """Jalankan warm_up() di thread latar (dipanggil saat startup)."""
+        if self._warmup_thread is None:
+            self._warmup_thread = threading.Thread(target=self.warm_up, name="rag-warmup", daemon=True)
+            self._warmup_thread.start()
+        return self._warmup_thread
+
+    def is_ready(self):
+        """
+        True jika warm-up latar sudah selesai. Tanpa start_warm_up() (mode lazy)
+        selalu True karena inisialisasi terjadi di request pertama.
+        """
+        if self._warmup_thread is None:
+            return True
+        return self._ready.is_set() and not self._warmup_thread.is_alive()
+
+    def embedding_cache_stats(self):
+        """Statistik cache embedding query, None jika cache tidak aktif/belum dimuat."""
+        if isinstance(self.embedding_model, CachedEmbeddings):
+            return self.embedding_model.stats()
+        return None
+
+    def shutdown(self):
+        """Hentikan batching embedding, thread pool retriever, dan tulis sisa cache embedding ke SQLite."""
+        if self.hybrid_retriever is not None:
+            self.hybrid_retriever.shutdown()
+        if self.embedding_batcher is not None:
+            self.embedding_batcher.stop()
+        if isinstance(self.embedding_model, CachedEmbeddings):
+            self.embedding_model.close()
+
+    def embedding_batch_stats(self):
+        """Statistik batching embedding query, None jika batching tidak aktif/belum dimuat."""
+        if self.embedding_batcher is not None:
+            return self.embedding_batcher.stats()
+        return None
+
+    def is_available(self):
+        """True jika retriever berhasil dimuat (False juga saat belum siap)."""
+        return self._ready.is_set() and self.hybrid_retriever is not None
     
     def generate_response_img(self, class_disease, chat_history):
         """Generate response untuk hasil deteksi gambar"""
@@ -147,27 +623,18 @@ Asisten:
         
         # Cek apakah RAG berhasil diinisialisasi
         if self.hybrid_retriever is None:
-            return "Maaf, sistem RAG belum tersedia. Silakan coba lagi nanti."
+            return RAG_UNAVAILABLE_MESSAGE
         
         try:
-            user_message = f"Penyakit yang terdeteksi adalah {class_disease}. Berikan informasi dan saran yang relevan."
-            docs = self.hybrid_retriever.invoke(user_message)
-            context = "\n\n".join([d.page_content for d in docs])
-
             chain = self.img_prompt_template | self.llm_model
-            response = chain.invoke({
-                "context": context,
-                "question": user_message,
-                "chat_history": chat_history,
-                "class_disease": class_disease
-            })
+            response = chain.invoke(self._img_inputs(class_disease, chat_history))
             ai_response_text = response.content
             
             return ai_response_text
             
         except Exception as e:
             print(f"Error in hybrid search: {e}")
-            return "Maaf, terjadi kesalahan saat memproses pertanyaan Anda. Silakan coba lagi."
+            return RAG_ERROR_MESSAGE
         
 
     def hybrid_search(self, user_message, chat_history,):
@@ -177,22 +644,113 @@ Asisten:
         
         # Cek apakah RAG berhasil diinisialisasi
         if self.hybrid_retriever is None:
-            return "Maaf, sistem RAG belum tersedia. Silakan coba lagi nanti."
+            return RAG_UNAVAILABLE_MESSAGE
         
         try:
-            docs = self.hybrid_retriever.invoke(user_message)
-            context = "\n\n".join([d.page_content for d in docs])
+            cached, embedding = self._cached_answer(user_message, chat_history)
+            if cached is not None:
+                return cached
 
             chain = self.text_prompt_template | self.llm_model
-            response = chain.invoke({
-                "context": context,
-                "question": user_message,
-                "chat_history": chat_history
-            })
+            response = chain.invoke(self._text_inputs(user_message, chat_history))
             ai_response_text = response.content
+            self._remember_answer(user_message, embedding, ai_response_text)
             
             return ai_response_text
             
         except Exception as e:
             print(f"Error in hybrid search: {e}")
-            return "Maaf, terjadi kesalahan saat memproses pertanyaan Anda. Silakan coba lagi."
\ No newline at end of file
+            return RAG_ERROR_MESSAGE
+
+    def _retrieve_context(self, query):
+        docs = self.hybrid_retriever.invoke(query)
+        return "\n\n".join([d.page_content for d in docs])
+
+    def _text_inputs(self, user_message, chat_history):
+        return {
+            "context": self._retrieve_context(user_message),
+            "question": user_message,
+            "chat_history": chat_history
+        }
+
+    def _img_inputs(self, class_disease, chat_history):
+        user_message = self._img_query(class_disease)
+        return {
+            "context": self._class_context(class_disease),
+            "question": user_message,
+            "chat_history": chat_history,
+            "class_disease": class_disease
+        }
+
+    def _stream_chain(self, prompt_template, inputs):
+        chain = prompt_template | self.llm_model
+        try:
+            for chunk in chain.stream(inputs):
+                if chunk.content:
+                    yield chunk.content
+        except Exception as e:
+            print(f"Error in streaming response: {e}")
+            yield RAG_ERROR_MESSAGE
+
+    def _stream(self, prompt_template, build_inputs, *args):
+        # Retrieval dijalankan sekarang (bukan saat iterasi) agar selesai sebelum byte pertama
+        if self.hybrid_retriever is None:
+            return iter([RAG_UNAVAILABLE_MESSAGE])
+        try:
+            inputs = build_inputs(*args)
+        except Exception as e:
+            print(f"Error in hybrid search: {e}")
+            return iter([RAG_ERROR_MESSAGE])
+        return self._stream_chain(prompt_template, inputs)
+
+    def stream_search(self, user_message, chat_history):
+        """
+        Versi streaming hybrid_search.
+        :return: iterator potongan teks jawaban dari LLM
+        """
+        self._ensure_initialized()
+        try:
+            cached, embedding = self._cached_answer(user_message, chat_history)
+        except Exception as e:
+            print(f"Error in semantic cache lookup: {e}")
+            cached, embedding = None, None
+        if cached is not None:
+            return iter([cached])
+        tokens = self._stream(self.text_prompt_template, self._text_inputs, user_message, chat_history)
+        if embedding is None:
+            return tokens
+        return self._remember_stream(tokens, user_message, embedding)
+
+    def _cached_answer(self, user_message, chat_history):
+        """
+        Cari jawaban lama untuk pertanyaan yang mirip (hanya jika riwayat tidak mengubah makna).
+        :return: (jawaban atau None, embedding pertanyaan atau None jika cache tidak dipakai)
+        """
+        if self.answer_cache is None or self.embedding_model is None:
+            return None, None
+        if not is_context_free(user_message, chat_history):
+            self.answer_cache.record_skip()
+            return None, None
+        embedding = self.embedding_model.embed_query(user_message)
+        hit = self.answer_cache.lookup(embedding, disease_topic(user_message))
+        return (hit[0] if hit else None), embedding
+
+    def _remember_answer(self, user_message, embedding, answer):
+        if embedding is None or not answer or RAG_ERROR_MESSAGE in answer or answer == RAG_UNAVAILABLE_MESSAGE:
+            return
+        self.answer_cache.put(user_message, embedding, answer)
+
+    def _remember_stream(self, tokens, user_message, embedding):
+        parts = []
+        for token in tokens:
+            parts.append(token)
+            yield token
+        self._remember_answer(user_message, embedding, "".join(parts))
+
+    def stream_response_img(self, class_disease, chat_history):
+        """
+        Versi streaming generate_response_img.
+        :return: iterator potongan teks jawaban dari LLM
+        """
+        self._ensure_initialized()
+        return self._stream(self.img_prompt_template, self._img_inputs, class_disease, chat_history)
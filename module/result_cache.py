@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import cv2
+
+from module.db import configure_connection
+
+
+def content_hash(data):
+    """Hash SHA-256 dari bytes file gambar (kunci cache exact)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def perceptual_hash(image_bgr):
+    """
+    dHash 64-bit: gambar grayscale 9x8, bit = piksel kiri lebih terang dari kanannya.
+    Foto ulang/recompress dari daun yang sama menghasilkan hash yang berdekatan.
+    :param image_bgr: array uint8 (H, W, 3) format BGR
+    :return: int 64-bit (signed, agar muat di kolom INTEGER SQLite)
+    """
+    gray = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def hamming_distance(a, b):
+    return bin((a ^ b) & ((1 << 64) - 1)).count("1")
+
+
+class ResultCache:
+    def __init__(self, db_file, max_entries=5000, phash_threshold=None, writer=None):
+        """
+        Cache hasil pipeline visi (CNN + YOLO) berdasarkan isi gambar, LRU di SQLite.
+        :param db_file: path file database SQLite
+        :param max_entries: jumlah entri maksimal sebelum entri terlama dibuang
+        :param phash_threshold: jika diisi, gambar dengan jarak dHash <= nilai ini
+                                dianggap sama (mode near-duplicate)
+        :param writer: UploadWriter yang menulis file processed_path di latar; file yang
+                       masih antre ditunggu, bukan dianggap sudah terhapus
+        """
+        self.max_entries = max_entries
+        self.phash_threshold = phash_threshold
+        self.writer = writer
+        self.conn = configure_connection(sqlite3.connect(db_file, check_same_thread=False))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS image_result_cache (
+                content_hash TEXT PRIMARY KEY,
+                phash INTEGER NOT NULL,
+                class_name TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                detections TEXT NOT NULL,
+                processed_path TEXT,
+                last_used REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_image_result_cache_last_used
+            ON image_result_cache (last_used)
+        ''')
+        self.conn.commit()
+
+        # dHash disimpan juga di memori agar pencarian near-duplicate tidak scan tabel
+        self._phashes = dict(self.conn.execute(
+            "SELECT content_hash, phash FROM image_result_cache"
+        ).fetchall())
+
+    def _load(self, key):
+        row = self.conn.execute(
+            "SELECT class_name, confidence, detections, processed_path "
+            "FROM image_result_cache WHERE content_hash = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        class_name, confidence, detections, processed_path = row
+        if processed_path and self.writer is not None:
+            self.writer.wait(processed_path)
+        if processed_path and not os.path.exists(processed_path):
+            # File anotasi sudah terhapus, entri tidak bisa dipakai lagi
+            self._delete(key)
+            return None
+        self.conn.execute(
+            "UPDATE image_result_cache SET last_used = ? WHERE content_hash = ?",
+            (time.time(), key)
+        )
+        self.conn.commit()
+        return {
+            "class_name": class_name,
+            "confidence": confidence,
+            "detections": json.loads(detections),
+            "processed_path": processed_path,
+        }
+
+    def _delete(self, key):
+        self.conn.execute("DELETE FROM image_result_cache WHERE content_hash = ?", (key,))
+        self.conn.commit()
+        self._phashes.pop(key, None)
+
+    def forget_path(self, processed_path):
+        """Buang entri yang merujuk file yang sudah dievict (callback StorageManager)."""
+        with self._lock:
+            keys = self.conn.execute(
+                "SELECT content_hash FROM image_result_cache WHERE processed_path = ?",
+                (processed_path,)
+            ).fetchall()
+            for (key,) in keys:
+                self._delete(key)
+
+    def get(self, key):
+        """
+        Cari hasil untuk gambar yang isinya persis sama.
+        :param key: content_hash() dari bytes gambar
+        :return: dict hasil atau None
+        """
+        with self._lock:
+            result = self._load(key)
+            if result is not None:
+                self.hits += 1
+            return result
+
+    def get_similar(self, phash):
+        """
+        Cari hasil gambar yang hampir sama (mode near-duplicate, jika phash_threshold diisi).
+        :param phash: perceptual_hash() gambar
+        :return: dict hasil atau None
+        """
+        if self.phash_threshold is None:
+            return None
+        with self._lock:
+            best_key, best_distance = None, self.phash_threshold + 1
+            for other_key, other_phash in self._phashes.items():
+                distance = hamming_distance(phash, other_phash)
+                if distance < best_distance:
+                    best_key, best_distance = other_key, distance
+            if best_key is None:
+                return None
+            result = self._load(best_key)
+            if result is not None:
+                self.near_hits += 1
+            return result
+
+    def put(self, key, phash, class_name, confidence, detections=None, processed_path=None):
+        """
+        Simpan hasil pipeline visi untuk gambar ini, buang entri terlama jika penuh.
+        Setiap put dihitung sebagai miss (hasil harus dihitung ulang oleh model).
+        :param detections: list dict box (x1, y1, x2, y2, confidence)
+        """
+        with self._lock:
+            self.misses += 1
+            self.conn.execute('''
+                INSERT OR REPLACE INTO image_result_cache
+                (content_hash, phash, class_name, confidence, detections, processed_path, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (key, phash, class_name, float(confidence), json.dumps(detections or []),
+                  processed_path, time.time()))
+            self._phashes[key] = phash
+
+            overflow = len(self._phashes) - self.max_entries
+            if overflow > 0:
+                evicted = self.conn.execute(
+                    "SELECT content_hash FROM image_result_cache ORDER BY last_used ASC LIMIT ?",
+                    (overflow,)
+                ).fetchall()
+                self.conn.executemany(
+                    "DELETE FROM image_result_cache WHERE content_hash = ?", evicted
+                )
+                for (evicted_key,) in evicted:
+                    self._phashes.pop(evicted_key, None)
+            self.conn.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "entries": len(self._phashes),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
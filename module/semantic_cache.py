@@ -0,0 +1,243 @@
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from module.db import configure_connection
+
+# Kata yang biasanya merujuk ke isi percakapan sebelumnya
+REFERENCE_WORDS = {
+    "itu", "ini", "tersebut", "tadi", "sebelumnya", "tadinya", "dia", "mereka",
+    "lagi", "lalu", "terus", "kalau", "gimana",
+}
+# Topik yang membuat pertanyaan berakhiran -nya tetap jelas tanpa riwayat
+TOPIC_WORDS = {
+    "anggur", "daun", "black", "rot", "brown", "spot", "downy", "mildew", "esca",
+    "leaf", "blight", "powdery", "busuk", "bercak", "embun", "jamur", "penyakit",
+}
+MIN_QUESTION_WORDS = 4
+# Nama penyakit -> kunci topik. Pertanyaan dengan pola sama tetapi penyakit berbeda
+# ("gejala black rot" vs "gejala esca") embedding-nya hampir identik, jadi entri cache
+# hanya boleh dipakai untuk pertanyaan dengan kunci topik yang sama
+DISEASE_TERMS = {
+    "black_rot": ("black rot", "busuk hitam"),
+    "esca": ("esca", "black measles", "campak hitam"),
+    "leaf_blight": ("leaf blight", "isariopsis", "hawar daun"),
+    "downy_mildew": ("downy mildew", "embun bulu", "embun tepung palsu"),
+    "powdery_mildew": ("powdery mildew", "embun tepung"),
+    "brown_spot": ("brown spot", "bercak coklat", "bercak cokelat"),
+    "healthy": ("healthy", "sehat"),
+}
+# Frasa terpanjang dicocokkan dulu ("embun tepung palsu" sebelum "embun tepung")
+_DISEASE_PHRASES = sorted(
+    ((term, key) for key, terms in DISEASE_TERMS.items() for term in terms),
+    key=lambda item: -len(item[0])
+)
+
+
+def _tokens(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def disease_topic(question):
+    """
+    Kunci topik penyakit yang disebut dalam pertanyaan.
+    :return: kunci DISEASE_TERMS terurut dipisah koma, atau "" jika tidak ada penyakit disebut
+    """
+    text = f" {' '.join(_tokens(question))} "
+    keys = set()
+    for term, key in _DISEASE_PHRASES:
+        if f" {term} " in text:
+            keys.add(key)
+            text = text.replace(f" {term} ", "  ")
+    return ",".join(sorted(keys))
+
+
+def is_context_free(question, chat_history):
+    """
+    Tebak apakah jawaban untuk pertanyaan ini tidak bergantung pada riwayat percakapan.
+    Riwayat kosong (selain pertanyaan itu sendiri) selalu lolos; jika ada riwayat,
+    pertanyaan harus cukup panjang, tanpa kata rujukan (itu/tersebut/tadi/...), dan
+    kata berakhiran -nya hanya boleh muncul bersama topik yang disebut eksplisit.
+    :param question: pesan pengguna
+    :param chat_history: string riwayat dari ConversationSummarizer.build_context()
+    """
+    history = (chat_history or "").replace(f"Human: {question}", "").strip()
+    if not history:
+        return True
+
+    words = _tokens(question)
+    if len(words) < MIN_QUESTION_WORDS:
+        return False
+    if any(word in REFERENCE_WORDS for word in words):
+        return False
+    if any(word.endswith("nya") for word in words):
+        return any(word in TOPIC_WORDS for word in words)
+    return True
+
+
+class SemanticAnswerCache:
+    def __init__(self, db_file, threshold=0.92, ttl_seconds=7 * 24 * 3600, max_entries=2000):
+        """
+        Cache jawaban berdasarkan kemiripan embedding pertanyaan (cosine), di SQLite
+        agar bertahan setelah restart; pencarian di memori lewat satu perkalian matriks.
+        Hanya entri dengan topik penyakit yang sama (disease_topic) yang dibandingkan.
+        :param db_file: path file database SQLite
+        :param threshold: cosine minimal agar jawaban lama dipakai
+        :param ttl_seconds: umur maksimal jawaban (None = tidak kedaluwarsa)
+        :param max_entries: jumlah entri maksimal sebelum entri paling lama tidak dipakai dibuang
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.conn = configure_connection(sqlite3.connect(db_file, check_same_thread=False))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS semantic_answer_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                topic TEXT NOT NULL DEFAULT ''
+            )
+        ''')
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(semantic_answer_cache)")]
+        if "topic" not in columns:
+            # Entri lama tanpa topik: hitung ulang dari teks pertanyaannya
+            self.conn.execute("ALTER TABLE semantic_answer_cache ADD COLUMN topic TEXT NOT NULL DEFAULT ''")
+            rows = self.conn.execute("SELECT id, question FROM semantic_answer_cache").fetchall()
+            self.conn.executemany(
+                "UPDATE semantic_answer_cache SET topic = ? WHERE id = ?",
+                [(disease_topic(question), entry_id) for entry_id, question in rows]
+            )
+        self.conn.commit()
+        self._load()
+
+    def _load(self):
+        rows = self.conn.execute(
+            "SELECT id, embedding, created_at, last_used, topic FROM semantic_answer_cache"
+        ).fetchall()
+        self._ids = [row[0] for row in rows]
+        self._topics = [row[4] for row in rows]
+        self._created = {row[0]: row[2] for row in rows}
+        self._last_used = {row[0]: row[3] for row in rows}
+        if rows:
+            self._matrix = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+        else:
+            self._matrix = None
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _expired(self, entry_id, now):
+        return self.ttl_seconds is not None and now - self._created[entry_id] > self.ttl_seconds
+
+    def _remove(self, entry_ids):
+        if not entry_ids:
+            return
+        remove = set(entry_ids)
+        keep = [i for i, entry_id in enumerate(self._ids) if entry_id not in remove]
+        self.conn.executemany(
+            "DELETE FROM semantic_answer_cache WHERE id = ?", [(entry_id,) for entry_id in remove]
+        )
+        self.conn.commit()
+        self._ids = [self._ids[i] for i in keep]
+        self._topics = [self._topics[i] for i in keep]
+        self._matrix = self._matrix[keep] if keep else None
+        for entry_id in remove:
+            self._created.pop(entry_id, None)
+            self._last_used.pop(entry_id, None)
+
+    def lookup(self, embedding, topic=""):
+        """
+        Cari jawaban untuk pertanyaan yang mirip.
+        :param embedding: embedding pertanyaan (IndoBERT)
+        :param topic: disease_topic() pertanyaan; hanya entri dengan topik sama yang dipakai
+        :return: (answer, similarity) atau None
+        """
+        query = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            # Entri kedaluwarsa tidak boleh menang; dibuang sekaligus
+            self._remove([entry_id for entry_id in self._ids if self._expired(entry_id, now)])
+            if self._matrix is None:
+                self.misses += 1
+                return None
+
+            same_topic = np.array([entry_topic == topic for entry_topic in self._topics])
+            if not same_topic.any():
+                self.misses += 1
+                return None
+            scores = np.where(same_topic, self._matrix @ query, -np.inf)
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            entry_id = self._ids[best]
+            answer = self.conn.execute(
+                "SELECT answer FROM semantic_answer_cache WHERE id = ?", (entry_id,)
+            ).fetchone()[0]
+            self._last_used[entry_id] = now
+            self.conn.execute(
+                "UPDATE semantic_answer_cache SET last_used = ? WHERE id = ?", (now, entry_id)
+            )
+            self.conn.commit()
+            self.hits += 1
+            return answer, similarity
+
+    def put(self, question, embedding, answer):
+        """Simpan jawaban baru, buang entri yang paling lama tidak dipakai jika penuh."""
+        vector = self._normalize(embedding)
+        topic = disease_topic(question)
+        now = time.time()
+        with self._lock:
+            cursor = self.conn.execute('''
+                INSERT INTO semantic_answer_cache (question, embedding, answer, created_at, last_used, topic)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (question, vector.tobytes(), answer, now, now, topic))
+            self.conn.commit()
+            entry_id = cursor.lastrowid
+            self._ids.append(entry_id)
+            self._topics.append(topic)
+            self._created[entry_id] = now
+            self._last_used[entry_id] = now
+            row = vector[np.newaxis, :]
+            self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+
+            overflow = len(self._ids) - self.max_entries
+            if overflow > 0:
+                oldest = sorted(self._ids, key=self._last_used.get)[:overflow]
+                self._remove(oldest)
+
+    def record_skip(self):
+        """Hitung pertanyaan yang tidak memakai cache karena bergantung pada riwayat."""
+        with self._lock:
+            self.skipped += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._ids),
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
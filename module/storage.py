@@ -0,0 +1,177 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+class StorageManager:
+    def __init__(self, root, max_bytes=None, low_watermark=0.9, sweep_interval=60,
+                 shard_depth=2, shard_width=2, on_evict=None):
+        """
+        Direktori file dengan subdirektori shard, kuota byte dan eviksi LRU.
+        :param root: direktori akar (mis. uploads/ atau processed/)
+        :param max_bytes: kuota total ukuran file; None = tanpa batas
+        :param low_watermark: sweeper menghapus file terlama sampai total <= max_bytes * low_watermark
+        :param sweep_interval: detik antar sweep latar (sweep juga dipicu saat kuota terlampaui)
+        :param shard_depth: jumlah level subdirektori
+        :param shard_width: jumlah karakter hex per level (2 -> 256 subdirektori per level)
+        :param on_evict: fungsi(path) yang dipanggil setelah file dihapus sweeper, untuk membuang
+                         metadata yang merujuk file itu (boleh diisi setelah konstruksi)
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.low_watermark = low_watermark
+        self.shard_depth = shard_depth
+        self.shard_width = shard_width
+        os.makedirs(self.root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # path -> ukuran, urut dari yang paling lama tidak dipakai
+        self._files = OrderedDict()
+        self.total_bytes = 0
+        self.evictions = 0
+        self.on_evict = on_evict
+        self._scan()
+
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._sweep_interval = sweep_interval
+        self._thread = None
+        if max_bytes is not None:
+            self._thread = threading.Thread(target=self._run, name=f"storage-sweeper-{os.path.basename(root)}", daemon=True)
+            self._thread.start()
+
+    def _scan(self):
+        # Bangun indeks LRU dari disk (mtime = waktu terakhir dipakai), termasuk file lama non-shard
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._files[path] = size
+            self.total_bytes += size
+
+    def path_for(self, name):
+        """
+        Path shard untuk sebuah nama file (tidak membuat file).
+        Nama yang sama selalu menghasilkan path yang sama.
+        """
+        digest = hashlib.sha256(name.encode("utf-8")).hexdigest()
+        shards = [
+            digest[i * self.shard_width:(i + 1) * self.shard_width]
+            for i in range(self.shard_depth)
+        ]
+        return os.path.join(self.root, *shards, name)
+
+    def write(self, name, data):
+        """
+        Simpan bytes secara atomik (file sementara + rename).
+        :return: path file
+        """
+        path = self.path_for(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.record(path)
+        return path
+
+    def record(self, path):
+        """Daftarkan file yang baru ditulis ke indeks kuota."""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with self._lock:
+            self.total_bytes += size - self._files.pop(path, 0)
+            self._files[path] = size
+            over_quota = self.max_bytes is not None and self.total_bytes > self.max_bytes
+        if over_quota:
+            self._wakeup.set()
+
+    def lookup(self, name):
+        """
+        Path file jika masih ada (dan tandai baru dipakai), None jika belum ada atau sudah dievict.
+        """
+        path = self.path_for(name)
+        if not os.path.exists(path):
+            return None
+        self.touch(path)
+        return path
+
+    def touch(self, path):
+        with self._lock:
+            if path in self._files:
+                self._files.move_to_end(path)
+        try:
+            # mtime dipakai sebagai urutan LRU saat indeks dibangun ulang setelah restart
+            os.utime(path)
+        except OSError:
+            pass
+
+    def sweep(self):
+        """
+        Hapus file yang paling lama tidak dipakai sampai total <= kuota * low_watermark.
+        :return: jumlah file yang dihapus
+        """
+        if self.max_bytes is None:
+            return 0
+        target = self.max_bytes * self.low_watermark
+        evicted = 0
+        while True:
+            with self._lock:
+                # File terbaru tidak pernah dihapus (bisa jadi sedang dikirim ke client)
+                if self.total_bytes <= target or len(self._files) <= 1:
+                    break
+                path, size = self._files.popitem(last=False)
+                self.total_bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error evicting {path}: {e}")
+                continue
+            evicted += 1
+            if self.on_evict is not None:
+                try:
+                    self.on_evict(path)
+                except Exception as e:
+                    print(f"Error in eviction callback for {path}: {e}")
+        with self._lock:
+            self.evictions += evicted
+        return evicted
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self._sweep_interval)
+            self._wakeup.clear()
+            if self._stopped:
+                return
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error in storage sweeper for {self.root}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -0,0 +1,154 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from module.db import estimate_tokens
+
+SUMMARY_PROMPT = """
+Anda meringkas percakapan antara pengguna dan AI asisten tanaman anggur.
+Perbarui ringkasan lama dengan pesan-pesan baru di bawah ini. Pertahankan fakta penting
+(penyakit yang terdeteksi, gejala, tanaman, saran yang sudah diberikan, pertanyaan yang belum terjawab).
+Tulis dalam bahasa Indonesia, maksimal {max_words} kata, tanpa pembuka atau penutup.
+
+=== RINGKASAN LAMA ===
+{summary}
+
+=== PESAN BARU ===
+{messages}
+
+Ringkasan baru:
+"""
+
+
+def format_line(role, msg):
+    """
+    Ubah satu pesan menjadi baris Human:/Assistant:.
+    :return: baris riwayat, None untuk role lain
+    """
+    if role == 'user':
+        return f"Human: {msg}"
+    elif role == 'ai':
+        return f"Assistant: {msg}"
+    return None
+
+
+def format_messages(history):
+    """
+    Ubah riwayat (role, message) menjadi baris Human:/Assistant:.
+    :param history: list (role, message)
+    :return: string riwayat percakapan
+    """
+    lines = [format_line(role, msg) for role, msg in history]
+    return "\n".join(line for line in lines if line is not None)
+
+
+def select_tail(history, tail_tokens):
+    """
+    Ambil pesan terakhir yang muat dalam anggaran token (minimal satu pesan).
+    :param history: list (role, message) urut dari yang paling lama
+    :param tail_tokens: anggaran token, None = semua pesan
+    :return: akhiran dari history
+    """
+    if tail_tokens is None:
+        return history
+    used_tokens = 0
+    keep = 0
+    for _, message in reversed(history):
+        cost = estimate_tokens(message)
+        if keep and used_tokens + cost > tail_tokens:
+            break
+        used_tokens += cost
+        keep += 1
+    return history[len(history) - keep:]
+
+
+class ConversationSummarizer:
+    def __init__(self, llm_model, db_pool, tail_tokens=1500, min_chunk_tokens=400, max_words=200,
+                 history_cache=None):
+        """
+        Ringkasan bergulir per (session_id, room_id) yang diperbarui di thread latar.
+        Prompt berisi ringkasan + pesan yang belum diringkas, dibatasi tail_tokens terakhir;
+        pesan di luar tail dilipat ke ringkasan di latar.
+        :param llm_model: model LLM (ChatGoogleGenerativeAI) untuk membuat ringkasan
+        :param db_pool: ConnectionPool untuk membaca riwayat dan menyimpan ringkasan
+        :param tail_tokens: anggaran token pesan terakhir yang tidak ikut diringkas
+        :param min_chunk_tokens: minimal token pesan lama sebelum ringkasan diperbarui
+        :param max_words: panjang maksimal ringkasan
+        :param history_cache: HistoryCache opsional agar riwayat tidak dibangun ulang tiap request
+        """
+        self.llm_model = llm_model
+        self.db_pool = db_pool
+        self.tail_tokens = tail_tokens
+        self.min_chunk_tokens = min_chunk_tokens
+        self.max_words = max_words
+        self.history_cache = history_cache
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+        self._scheduled = set()
+        self._lock = threading.Lock()
+
+    def build_context(self, db, session_id, room_id):
+        """
+        Susun {chat_history} untuk prompt: ringkasan + pesan setelah last_message_id ringkasan
+        (tanpa dobel dengan ringkasan), dipotong ke tail_tokens terakhir agar prompt tetap
+        terbatas walau flush tertunda atau pembaruan ringkasan gagal.
+        :param db: instance Database milik request saat ini
+        :return: string riwayat percakapan
+        """
+        if self.history_cache is not None:
+            summary, recent = self.history_cache.get_context(db, session_id, room_id, self.tail_tokens)
+        else:
+            summary, last_id = db.get_summary(session_id, room_id)
+            history = db.get_history(session_id, room_id, after_id=last_id)
+            recent = format_messages(select_tail(history, self.tail_tokens))
+        if not summary:
+            return recent
+        return f"Ringkasan percakapan sebelumnya: {summary}\n\n{recent}"
+
+    def schedule(self, session_id, room_id):
+        """Jadwalkan pembaruan ringkasan di latar (satu antrean per room)."""
+        key = (session_id, room_id)
+        with self._lock:
+            if key in self._scheduled:
+                return
+            self._scheduled.add(key)
+        self._executor.submit(self._update, session_id, room_id)
+
+    def _update(self, session_id, room_id):
+        with self._lock:
+            self._scheduled.discard((session_id, room_id))
+
+        db = self.db_pool.acquire()
+        try:
+            summary, last_id = db.get_summary(session_id, room_id)
+
+            # Pesan yang belum masuk ringkasan
+            rows = []
+            while True:
+                # Hanya pesan yang sudah di-commit (punya id); antrean write-behind tidak di-flush
+                page = db.get_history_page(session_id, room_id, after_id=last_id, limit=200,
+                                           include_pending=False)
+                if not page:
+                    break
+                rows.extend(page)
+                last_id = page[-1][0]
+
+            # Pesan yang masih muat di tail tidak perlu diringkas
+            keep = len(select_tail([(role, message) for _, role, message in rows], self.tail_tokens))
+            old_rows = rows[:len(rows) - keep]
+            if sum(estimate_tokens(message) for _, _, message in old_rows) < self.min_chunk_tokens:
+                return
+
+            prompt = SUMMARY_PROMPT.format(
+                max_words=self.max_words,
+                summary=summary or "(belum ada)",
+                messages=format_messages([(role, message) for _, role, message in old_rows])
+            )
+            response = self.llm_model.invoke(prompt)
+            db.save_summary(session_id, room_id, response.content.strip(), old_rows[-1][0])
+        except Exception as e:
+            print(f"Error updating conversation summary: {e}")
+        finally:
+            self.db_pool.release(db)
+
+    def shutdown(self):
+        """Tunggu pembaruan ringkasan yang sedang berjalan lalu hentikan executor."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,72 @@
+import numpy as np
+
+
+def tile_grid(height, width, tile_size=640, overlap=0.2):
+    """
+    Posisi tile persegi yang saling tumpang tindih dan menutupi seluruh gambar.
+    Tile terakhir di tiap sumbu digeser agar pas dengan tepi gambar.
+    :param tile_size: sisi tile (piksel)
+    :param overlap: fraksi tumpang tindih antar tile (0 - <1)
+    :return: list (x0, y0, x1, y1)
+    """
+    if not 0 <= overlap < 1:
+        raise ValueError("overlap must be in [0, 1)")
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, stride))
+        positions.append(length - tile_size)
+        return positions
+
+    return [
+        (x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height))
+        for y0 in starts(height)
+        for x0 in starts(width)
+    ]
+
+
+def box_iou(box, boxes):
+    """IoU satu box (4,) terhadap banyak box (N, 4) format x1, y1, x2, y2."""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+
+def nms(boxes, scores, iou_threshold=0.5):
+    """
+    Non-maximum suppression greedy.
+    :param boxes: array (N, 4) x1, y1, x2, y2
+    :param scores: array (N,)
+    :return: indeks box yang dipertahankan, urut dari skor tertinggi
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    order = np.argsort(-np.asarray(scores, dtype=np.float64))
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(int(best))
+        rest = order[1:]
+        order = rest[box_iou(boxes[best], boxes[rest]) <= iou_threshold]
+    return keep
+
+
+def merge_tile_detections(tile_detections, iou_threshold=0.5):
+    """
+    Gabungkan deteksi semua tile (koordinat sudah dalam ruang gambar penuh)
+    dan buang duplikat di area tumpang tindih dengan NMS lintas tile.
+    :param tile_detections: list of list dict box (x1, y1, x2, y2, confidence)
+    :return: list dict box
+    """
+    detections = [d for tile in tile_detections for d in tile]
+    if not detections:
+        return []
+    boxes = [(d["x1"], d["y1"], d["x2"], d["y2"]) for d in detections]
+    scores = [d["confidence"] for d in detections]
+    return [detections[i] for i in nms(boxes, scores, iou_threshold)]
@@ -0,0 +1,261 @@
+"""
+Vector store dense in-process (alternatif Chroma): embedding ternormalisasi disimpan
+sebagai array float16/int8 yang di-memory-map, isi + metadata dokumen di file sidecar.
+Top-k exact lewat satu perkalian matriks-vektor; HNSW (hnswlib, opsional) dipakai
+untuk kandidat jika jumlah dokumen >= ambang, lalu di-rerank exact.
+
+Struktur direktori:
+    meta.json          dimensi, jumlah, dtype, metric, model embedding
+    vectors.npy        (N, D) float32/float16/int8, baris ternormalisasi
+    scales.npy         (N,) skala per baris untuk int8
+    norms.npy          (N,) norma embedding asli (untuk metric l2 seperti Chroma)
+    documents.jsonl    isi + metadata dokumen, satu JSON per baris
+    hnsw.bin           index hnswlib (opsional)
+
+Ekspor dari direktori Chroma (dari root project):
+    python -m module.vector_index --chroma-dir rag-final/chroma_db1 --output vectorstore_numpy_db1
+    python -m module.vector_index --chroma-dir rag-final/chroma_db2 --output vectorstore_numpy_db2 --dtype int8
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+from langchain_core.documents import Document
+
+FORMAT_VERSION = 1
+DTYPES = ("float32", "float16", "int8")
+METRICS = ("l2", "cosine")
+HNSW_THRESHOLD = 50_000
+# Matriks float32 hasil decode disimpan di memori jika ukurannya <= batas ini
+RESIDENT_MAX_BYTES = 256 * 1024 * 1024
+# Di atas batas: baris dikonversi ke float32 per blok agar memori sementara tetap kecil
+SCORE_BLOCK_ROWS = 16384
+
+
+def _save_array(path, array):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def write_index(root, embeddings, documents, dtype="float16", metric="l2", model_name=None,
+                hnsw_threshold=HNSW_THRESHOLD):
+    """
+    Tulis index baru.
+    :param embeddings: array (N, D) embedding dokumen (boleh belum ternormalisasi)
+    :param documents: list Document LangChain, urutan sama dengan embeddings
+    :param dtype: "float32", "float16" atau "int8" (skala per baris)
+    :param metric: "l2" (jarak kuadrat, default Chroma) atau "cosine"
+    :param hnsw_threshold: bangun hnsw.bin jika N >= ambang (butuh hnswlib); None = tidak pernah
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype '{dtype}', expected one of {DTYPES}")
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {METRICS}")
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim != 2 or len(embeddings) != len(documents):
+        raise ValueError("embeddings must be (N, D) with one row per document")
+
+    os.makedirs(root, exist_ok=True)
+    norms = np.linalg.norm(embeddings, axis=1).astype(np.float32)
+    unit = embeddings / np.maximum(norms, 1e-12)[:, None]
+    if dtype == "int8":
+        scales = (np.abs(unit).max(axis=1) / 127).astype(np.float32)
+        vectors = np.round(unit / np.maximum(scales, 1e-12)[:, None]).astype(np.int8)
+        _save_array(os.path.join(root, "scales.npy"), scales)
+    else:
+        vectors = unit.astype(dtype)
+    _save_array(os.path.join(root, "vectors.npy"), vectors)
+    _save_array(os.path.join(root, "norms.npy"), norms)
+
+    tmp_path = os.path.join(root, "documents.jsonl.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for doc in documents:
+            f.write(json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, os.path.join(root, "documents.jsonl"))
+
+    hnsw = hnsw_threshold is not None and len(unit) >= hnsw_threshold
+    if hnsw:
+        import hnswlib
+
+        index = hnswlib.Index(space="ip", dim=unit.shape[1])
+        index.init_index(max_elements=len(unit), ef_construction=200, M=16)
+        index.add_items(unit, np.arange(len(unit)))
+        index.save_index(os.path.join(root, "hnsw.bin"))
+
+    tmp_path = os.path.join(root, "meta.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": FORMAT_VERSION,
+            "count": len(unit),
+            "dim": int(unit.shape[1]) if len(unit) else 0,
+            "dtype": dtype,
+            "metric": metric,
+            "model": model_name,
+            "hnsw": hnsw,
+        }, f)
+    os.replace(tmp_path, os.path.join(root, "meta.json"))
+
+
+class VectorIndex:
+    def __init__(self, root, embedding_function=None, use_hnsw=True, hnsw_ef=64, hnsw_oversample=4,
+                 resident_max_bytes=RESIDENT_MAX_BYTES):
+        """
+        Buka index (vectors.npy di-memory-map).
+        :param root: direktori index hasil write_index()/ekspor Chroma
+        :param embedding_function: Embeddings LangChain untuk query teks (IndoBERT, normalize)
+        :param use_hnsw: pakai hnsw.bin jika ada dan hnswlib terpasang
+        :param hnsw_ef: parameter ef pencarian HNSW
+        :param hnsw_oversample: kandidat HNSW = k * oversample, lalu di-rerank exact
+        :param resident_max_bytes: decode float16/int8 ke float32 sekali saat dibuka jika muat
+            (matvec BLAS langsung); di atas batas, decode per blok di setiap query
+        """
+        self.root = root
+        self.embedding_function = embedding_function
+        with open(os.path.join(root, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector index version {self.meta.get('version')} in {root}")
+        self.metric = self.meta["metric"]
+        self.vectors = np.load(os.path.join(root, "vectors.npy"), mmap_mode="r", allow_pickle=False)
+        self.norms = np.load(os.path.join(root, "norms.npy"), allow_pickle=False)
+        self.scales = None
+        if self.meta["dtype"] == "int8":
+            self.scales = np.load(os.path.join(root, "scales.npy"), allow_pickle=False)
+        with open(os.path.join(root, "documents.jsonl"), "r", encoding="utf-8") as f:
+            self._documents = [json.loads(line) for line in f]
+
+        self._resident = None
+        if self.vectors.dtype != np.float32 and self.vectors.size * 4 <= resident_max_bytes:
+            self._resident = self.vectors.astype(np.float32)
+            if self.scales is not None:
+                self._resident *= self.scales[:, None]
+
+        self.hnsw_oversample = hnsw_oversample
+        self._hnsw = None
+        if use_hnsw and self.meta.get("hnsw"):
+            try:
+                import hnswlib
+
+                self._hnsw = hnswlib.Index(space="ip", dim=self.meta["dim"])
+                self._hnsw.load_index(os.path.join(root, "hnsw.bin"), max_elements=self.meta["count"])
+                self._hnsw.set_ef(hnsw_ef)
+            except ImportError:
+                print("Warning: hnswlib not installed, using exact search.")
+                self._hnsw = None
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def _document(self, row):
+        data = self._documents[row]
+        return Document(page_content=data["page_content"], metadata=data["metadata"])
+
+    def _dot(self, query, rows=None):
+        """Cosine query terhadap baris (semua baris jika rows None)."""
+        if self._resident is not None:
+            return self._resident @ query if rows is None else self._resident[rows] @ query
+        if rows is not None:
+            vectors = np.asarray(self.vectors[rows], dtype=np.float32)
+            scores = vectors @ query
+            return scores * self.scales[rows] if self.scales is not None else scores
+        if self.vectors.dtype == np.float32:
+            scores = self.vectors @ query
+        else:
+            # float16/int8 tidak punya BLAS: konversi per blok, lalu matvec float32
+            scores = np.empty(len(self.vectors), dtype=np.float32)
+            for start in range(0, len(self.vectors), SCORE_BLOCK_ROWS):
+                block = self.vectors[start:start + SCORE_BLOCK_ROWS]
+                scores[start:start + len(block)] = block.astype(np.float32) @ query
+        return scores * self.scales if self.scales is not None else scores
+
+    def _distances(self, cosine, rows):
+        # Sama dengan definisi Chroma: l2 = jarak kuadrat, cosine = 1 - cos
+        if self.metric == "cosine":
+            return 1.0 - cosine
+        norms = self.norms[rows]
+        return 1.0 + norms * norms - 2.0 * norms * cosine
+
+    def search_by_vector(self, embedding, k):
+        """
+        :return: (array indeks baris, array jarak) urut dari yang paling dekat
+        """
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        k = min(k, len(self))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if self._hnsw is not None:
+            labels, _ = self._hnsw.knn_query(query, k=min(len(self), k * self.hnsw_oversample))
+            rows = np.sort(labels[0].astype(np.int64))
+        else:
+            rows = np.arange(len(self))
+        distances = self._distances(self._dot(query, rows if self._hnsw is not None else None), rows)
+
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+        return rows[top], distances[top]
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4):
+        rows, distances = self.search_by_vector(embedding, k)
+        return [(self._document(int(row)), float(distance)) for row, distance in zip(rows, distances)]
+
+    def similarity_search_with_score(self, query, k=4):
+        """Sama seperti Chroma: list (Document, jarak), jarak lebih kecil = lebih dekat."""
+        return self.similarity_search_by_vector_with_score(self.embedding_function.embed_query(query), k)
+
+    def similarity_search(self, query, k=4):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def get(self, include=("documents", "metadatas")):
+        """Subset dari Chroma.get(): semua dokumen dan metadata."""
+        return {
+            "documents": [data["page_content"] for data in self._documents],
+            "metadatas": [data["metadata"] for data in self._documents],
+        }
+
+
+def export_chroma(chroma_dir, output_dir, dtype="float16", model_name=None, hnsw_threshold=HNSW_THRESHOLD):
+    """
+    Salin embedding, isi dan metadata dari direktori Chroma tanpa meng-encode ulang.
+    Metric mengikuti koleksi Chroma (hnsw:space, default l2).
+    :return: jumlah dokumen
+    """
+    import chromadb
+
+    client = chromadb.PersistentClient(path=chroma_dir)
+    collection = client.get_collection(client.list_collections()[0].name)
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+    metric = (collection.metadata or {}).get("hnsw:space", "l2")
+    if metric == "ip":
+        # Untuk embedding ternormalisasi, urutan ip sama dengan cosine
+        metric = "cosine"
+    documents = [
+        Document(page_content=text, metadata=metadata or {})
+        for text, metadata in zip(data["documents"], data["metadatas"])
+    ]
+    write_index(output_dir, np.asarray(data["embeddings"]), documents, dtype=dtype, metric=metric,
+                model_name=model_name, hnsw_threshold=hnsw_threshold)
+    return len(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chroma-dir", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--dtype", choices=DTYPES, default="float16")
+    parser.add_argument("--model", default="LazarusNLP/all-indobert-base-v2")
+    parser.add_argument("--hnsw-threshold", type=int, default=HNSW_THRESHOLD)
+    args = parser.parse_args()
+
+    count = export_chroma(args.chroma_dir, args.output, args.dtype, args.model, args.hnsw_threshold)
+    size = sum(os.path.getsize(os.path.join(args.output, name)) for name in os.listdir(args.output))
+    print(f"Exported {count} documents from {args.chroma_dir} to {args.output} ({size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
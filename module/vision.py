@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+
+CNN_CONFIDENCE_THRESHOLD = 0.45
+
+
+class VisionPipeline:
+    def __init__(self, cnn_detector, yolo_detector, threshold=CNN_CONFIDENCE_THRESHOLD,
+                 speculative=True, yolo_workers=1):
+        """
+        Pipeline CNN (gate penyakit) + YOLO (lokalisasi) untuk satu gambar upload.
+        Jika speculative, prediksi YOLO dimulai bersamaan dengan CNN di thread pool
+        sehingga latensi ~max(CNN, YOLO), bukan CNN + YOLO.
+        :param cnn_detector: CNNDetector
+        :param yolo_detector: YOLODetector
+        :param threshold: confidence CNN minimal agar hasil YOLO dipakai
+        :param speculative: False untuk urutan lama (YOLO hanya setelah CNN lolos)
+        :param yolo_workers: jumlah thread YOLO; default 1 karena model ultralytics
+                             tidak aman dipanggil paralel dari beberapa thread (dipakai
+                             juga saat speculative=False)
+        """
+        self.cnn_detector = cnn_detector
+        self.yolo_detector = yolo_detector
+        self.threshold = threshold
+        self.speculative = speculative
+        self._executor = ThreadPoolExecutor(max_workers=yolo_workers, thread_name_prefix="yolo")
+        self.cancelled = 0
+        self.discarded = 0
+
+    def run(self, image):
+        """
+        Klasifikasi gambar lalu (jika lolos gate) ambil box YOLO.
+        Gambar anotasi tidak dibuat di sini, lihat module/annotations.py.
+        :param image: array BGR hasil load_working_image()
+        :return: (class_name, confidence, detections); detections [] jika gambar ditolak CNN
+        """
+        yolo_future = None
+        if self.speculative:
+            yolo_future = self._executor.submit(self.yolo_detector.detect, image)
+
+        try:
+            class_name, confidence = self.cnn_detector.detect_objects(image)
+        except Exception:
+            if yolo_future is not None:
+                yolo_future.cancel()
+            raise
+
+        if confidence <= self.threshold:
+            if yolo_future is not None:
+                # Belum jalan: batalkan; sudah jalan: hasilnya dibuang saat selesai
+                if yolo_future.cancel():
+                    self.cancelled += 1
+                else:
+                    self.discarded += 1
+            return class_name, confidence, []
+
+        if yolo_future is None:
+            # Tetap lewat executor: thread request tidak boleh memanggil model YOLO langsung
+            yolo_future = self._executor.submit(self.yolo_detector.detect, image)
+        return class_name, confidence, yolo_future.result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
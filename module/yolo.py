@@ -51,34 +51,115 @@
 
 
 import os
-import cv2
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 from ultralytics import YOLO
 
+from module.tiling import tile_grid, merge_tile_detections
+
+# Model YOLO milik proses worker tiling (dimuat sekali per proses)
+_worker_model = None
+
+
+def result_to_detections(result):
+    """Ubah result.boxes menjadi list dict yang bisa diserialisasi JSON."""
+    detections = []
+    for xyxy, conf in zip(result.boxes.xyxy.tolist(), result.boxes.conf.tolist()):
+        x1, y1, x2, y2 = xyxy
+        detections.append({"x1": x1, "y1": y1, "x2": x2, "y2": y2, "confidence": conf})
+    return detections
+
+
+def _predict_batch(model, images):
+    results = model.predict(
+        source=images,
+        conf=0.25,
+        device='cpu',
+        save=False,
+        verbose=False
+    )
+    return [result_to_detections(result) for result in results]
+
+
+def _init_tile_worker(model_path):
+    global _worker_model
+    _worker_model = YOLO(model_path)
+    _worker_model.to('cpu')
+
+
+def _noop():
+    return None
+
+
+def _predict_tiles_worker(tiles):
+    return _predict_batch(_worker_model, tiles)
+
+
+def create_tile_pool(model_path, workers):
+    """
+    Pool proses worker tiling (fork; spawn/forkserver menjalankan ulang app.py di tiap worker).
+    Buat sebelum proses memuat model lain atau menjalankan thread (sweeper storage, CNN,
+    MicroBatcher): fork hanya menyalin thread pemanggil, lock yang sedang dipegang thread
+    lain ikut tersalin dalam keadaan terkunci. Worker langsung dijalankan di sini.
+    :param model_path: path model YOLO yang dimuat tiap worker
+    :param workers: jumlah proses worker
+    :return: ProcessPoolExecutor untuk YOLODetector(tile_pool=...)
+    """
+    if threading.active_count() > 1:
+        print(f"Warning: forking YOLO tile workers with {threading.active_count()} threads running; "
+              "create the pool before starting other threads.")
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_tile_worker,
+        initargs=(model_path,)
+    )
+    pool.submit(_noop).result()
+    return pool
+
+
 class YOLODetector:
-    def __init__(self, model_path="yolo.pt", output_dir="processed"):
+    def __init__(self, model_path="yolo.pt", output_dir="processed", tile_size=None,
+                 tile_overlap=0.2, tile_iou=0.5, tile_workers=0, tile_include_full=True,
+                 tile_pool=None):
         """
         Inisialisasi YOLODetector.
         :param model_path: path ke file model YOLO
         :param output_dir: direktori untuk menyimpan hasil deteksi
+        :param tile_size: jika diisi, gambar yang sisi terpanjangnya > tile_size dideteksi
+                          per tile (resolusi asli) agar lesi kecil tidak hilang saat downsample
+        :param tile_overlap: fraksi tumpang tindih antar tile
+        :param tile_iou: ambang IoU NMS lintas tile
+        :param tile_workers: > 0 untuk membagi batch tile ke beberapa proses
+                             (masing-masing memuat model sendiri)
+        :param tile_include_full: tambahkan juga prediksi gambar penuh (objek besar
+                                  yang terpotong batas tile tetap terdeteksi utuh)
+        :param tile_pool: pool hasil create_tile_pool() dengan tile_workers proses, dibuat
+                          di awal startup; jika None dan tile_workers > 0, pool dibuat di sini
         """
         self.model = YOLO(model_path)
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
         self.model.to('cpu')
 
-    def detect_objects(self, img_path, filename_prefix="processed", use_heatmap=False, 
-                      sigma=50, alpha=0.6):
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_iou = tile_iou
+        self.tile_workers = tile_workers
+        self.tile_include_full = tile_include_full
+        self._tile_pool = tile_pool
+        if tile_pool is None and tile_size and tile_workers > 0:
+            self._tile_pool = create_tile_pool(model_path, tile_workers)
+
+    def predict(self, img_path):
         """
-        Jalankan deteksi objek dan simpan hasil ke direktori output.
-        :param img_path: path gambar input
-        :param filename_prefix: prefix nama file hasil deteksi
-        :param use_heatmap: jika True gunakan heatmap, jika False gunakan bounding box
-        :param sigma: ukuran gaussian blur untuk heatmap (default: 50)
-        :param alpha: transparansi overlay heatmap (default: 0.6)
-        :return: path gambar hasil proses YOLO
+        Jalankan prediksi YOLO saja (tanpa anotasi/penyimpanan file).
+        :param img_path: path gambar input atau array BGR yang sudah di-decode
+        :return: hasil deteksi YOLO untuk gambar ini
         """
-        # Jalankan prediksi
         results = self.model.predict(
             source=img_path,
             conf=0.25,
@@ -86,109 +167,56 @@ class YOLODetector:
             save=False,
             verbose=False
         )
-        result = results[0]
-
-        # Baca gambar
-        image = cv2.imread(img_path)
-
-        if use_heatmap:
-            # Gunakan heatmap
-            image = self._create_heatmap(image, result, sigma, alpha)
-        else:
-            # Gambar bounding box di atas gambar
-            for box in result.boxes.xyxy:
-                x1, y1, x2, y2 = map(int, box)
-                cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        return results[0]
 
-        # Buat nama file hasil deteksi
-        base_name = os.path.basename(img_path)
-        mode = "heatmap" if use_heatmap else "bbox"
-        processed_filename = f"{filename_prefix}_{mode}_{base_name}"
-        processed_path = os.path.join(self.output_dir, processed_filename)
+    def boxes_to_list(self, result):
+        """Ubah result.boxes menjadi list dict yang bisa diserialisasi JSON."""
+        return result_to_detections(result)
 
-        # Simpan hasil anotasi
-        cv2.imwrite(processed_path, image)
-
-        return processed_path
+    def detect(self, image):
+        """
+        Deteksi box tanpa menggambar apa pun. Memakai mode tiling jika tile_size
+        diisi dan gambar lebih besar dari satu tile.
+        :param image: array BGR yang sudah di-decode
+        :return: list dict box (x1, y1, x2, y2, confidence)
+        """
+        if self.tile_size and max(image.shape[:2]) > self.tile_size:
+            return self.predict_tiled(image)
+        return self.boxes_to_list(self.predict(image))
 
-    def _create_heatmap(self, image, result, sigma=50, alpha=0.6):
+    def predict_tiled(self, image):
         """
-        Membuat heatmap dari hasil deteksi YOLO.
-        :param image: gambar input (BGR format)
-        :param result: hasil deteksi dari YOLO
-        :param sigma: ukuran gaussian blur
-        :param alpha: transparansi overlay
-        :return: gambar dengan heatmap overlay
+        Deteksi per tile resolusi asli, tile dijalankan sebagai satu batch
+        (atau dibagi ke proses worker), lalu digabung dengan NMS lintas tile.
+        :param image: array BGR yang sudah di-decode
+        :return: list dict box dalam koordinat gambar penuh
         """
         h, w = image.shape[:2]
-        heatmap = np.zeros((h, w), dtype=np.float32)
-        
-        # Ekstrak bounding boxes dan confidence scores
-        boxes = result.boxes
-        for box in boxes:
-            # Dapatkan koordinat box
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            conf = float(box.conf[0])
-            
-            # Hitung center dan ukuran
-            cx = (x1 + x2) // 2
-            cy = (y1 + y2) // 2
-            box_w = x2 - x1
-            box_h = y2 - y1
-            
-            # Buat mask gaussian untuk setiap deteksi
-            y_coords, x_coords = np.ogrid[:h, :w]
-            
-            # Gaussian 2D dengan ukuran berdasarkan bounding box
-            sigma_x = box_w / 4
-            sigma_y = box_h / 4
-            
-            gaussian = np.exp(-(
-                ((x_coords - cx) ** 2) / (2 * sigma_x ** 2) +
-                ((y_coords - cy) ** 2) / (2 * sigma_y ** 2)
-            ))
-            
-            # Akumulasi heatmap dengan weight berdasarkan confidence
-            heatmap += gaussian * conf
-        
-        # Normalisasi heatmap ke range 0-1
-        if heatmap.max() > 0:
-            heatmap = heatmap / heatmap.max()
-        
-        # Smooth heatmap
-        heatmap = cv2.GaussianBlur(heatmap, (sigma*2+1, sigma*2+1), 0)
-        
-        # Convert heatmap ke colormap
-        heatmap_colored = cv2.applyColorMap(
-            (heatmap * 255).astype(np.uint8), 
-            cv2.COLORMAP_JET
-        )
-        
-        # Overlay heatmap pada gambar asli
-        output = cv2.addWeighted(image, 1-alpha, heatmap_colored, alpha, 0)
-        
-        return output
-
-
-# Contoh penggunaan
-if __name__ == "__main__":
-    # Inisialisasi detector
-    detector = YOLODetector(model_path="yolo.pt", output_dir="processed")
-    
-    # Pilihan 1: Deteksi dengan bounding box (default)
-    result_bbox = detector.detect_objects(
-        img_path="path/to/image.jpg",
-        filename_prefix="processed",
-        use_heatmap=False
-    )
-    print(f"Hasil bounding box disimpan di: {result_bbox}")
-    
-    # Pilihan 2: Deteksi dengan heatmap
-    result_heatmap = detector.detect_objects(
-        img_path="path/to/image.jpg",
-        filename_prefix="processed",
-        use_heatmap=True,
-        sigma=50,
-        alpha=0.6
-    )
-    print(f"Hasil heatmap disimpan di: {result_heatmap}")
\ No newline at end of file
+        grid = tile_grid(h, w, self.tile_size, self.tile_overlap)
+        tiles = [np.ascontiguousarray(image[y0:y1, x0:x1]) for x0, y0, x1, y1 in grid]
+
+        if self._tile_pool is not None:
+            chunk = -(-len(tiles) // self.tile_workers)
+            futures = [
+                self._tile_pool.submit(_predict_tiles_worker, tiles[i:i + chunk])
+                for i in range(0, len(tiles), chunk)
+            ]
+            per_tile = [detections for future in futures for detections in future.result()]
+        else:
+            per_tile = _predict_batch(self.model, tiles)
+
+        # Geser koordinat tile ke ruang gambar penuh
+        merged = [
+            [
+                {**d, "x1": d["x1"] + x0, "y1": d["y1"] + y0, "x2": d["x2"] + x0, "y2": d["y2"] + y0}
+                for d in detections
+            ]
+            for (x0, y0, _, _), detections in zip(grid, per_tile)
+        ]
+        if self.tile_include_full:
+            merged.append(self.boxes_to_list(self.predict(image)))
+        return merge_tile_detections(merged, self.tile_iou)
+
+    def shutdown(self):
+        if self._tile_pool is not None:
+            self._tile_pool.shutdown(wait=False, cancel_futures=True)
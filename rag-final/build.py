@@ -1,6 +1,8 @@
 import os
+import sys
 import json
 import uuid
+import argparse
 from glob import glob
 
 from langchain.schema import Document
@@ -8,10 +10,24 @@ from langchain.schema import Document
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import HuggingFaceEmbeddings
 
-embedding_model = HuggingFaceEmbeddings(
-    model_name="LazarusNLP/all-indobert-base-v2",
-    model_kwargs={"device": "cuda"}   # ubah ke "cuda" jika pakai GPU
-)
+parser = argparse.ArgumentParser(description="Bangun ChromaDB dari file KB JSON")
+parser.add_argument("--embedding-backend", choices=("torch", "onnx"), default="torch",
+                    help="onnx: IndoBERT di ONNX Runtime (hasil python -m module.onnx_embeddings)")
+parser.add_argument("--onnx-dir", default="../model/indobert_onnx_int8")
+args = parser.parse_args()
+
+if args.embedding_backend == "onnx":
+    # module/ ada di root project (skrip ini dijalankan dari rag-final/)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from module.onnx_embeddings import OnnxEmbeddings
+
+    # Tanpa normalisasi, sama dengan build PyTorch di bawah
+    embedding_model = OnnxEmbeddings(args.onnx_dir, normalize=False)
+else:
+    embedding_model = HuggingFaceEmbeddings(
+        model_name="LazarusNLP/all-indobert-base-v2",
+        model_kwargs={"device": "cuda"}   # ubah ke "cuda" jika pakai GPU
+    )
 
 def save_to_chroma(documents, persist_dir="./chroma_db"):
 
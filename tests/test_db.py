@@ -0,0 +1,29 @@
+import sqlite3
+import time
+
+from module.db import ConnectionPool
+
+
+def count_messages(db_file):
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM chat_history").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_write_behind_flushes_after_max_delay(tmp_path):
+    db_file = str(tmp_path / "chat.db")
+    pool = ConnectionPool(db_file, write_behind=True, batch_size=64, max_delay=0.05)
+    try:
+        db = pool.acquire()
+        db.save_message("session", 1, "user", "Apa gejala black rot?")
+        pool.release(db)
+
+        deadline = time.monotonic() + 1.0
+        while count_messages(db_file) == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert count_messages(db_file) == 1
+        assert not pool.writer.has_pending("session", 1)
+    finally:
+        pool.close_all()
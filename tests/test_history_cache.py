@@ -0,0 +1,59 @@
+import time
+
+from module.db import ConnectionPool
+from module.history_cache import HistoryCache
+from module.summary import format_messages, select_tail
+
+
+def get_context(pool, cache, tail_tokens=None):
+    db = pool.acquire()
+    try:
+        return cache.get_context(db, "session", 1, tail_tokens)
+    finally:
+        pool.release(db)
+
+
+def test_history_written_by_one_worker_is_visible_to_another(tmp_path):
+    db_file = str(tmp_path / "chat.db")
+    max_delay = 0.05
+    writer_pool = ConnectionPool(db_file, write_behind=True, max_delay=max_delay)
+    reader_pool = ConnectionPool(db_file, write_behind=True, max_delay=max_delay)
+    writer_cache, reader_cache = HistoryCache(), HistoryCache()
+    try:
+        assert get_context(reader_pool, reader_cache) == ("", "")
+
+        db = writer_pool.acquire()
+        db.save_message("session", 1, "user", "Apa gejala black rot?")
+        db.save_message("session", 1, "ai", "Bercak coklat pada daun.")
+        writer_pool.release(db)
+        expected = "Human: Apa gejala black rot?\nAssistant: Bercak coklat pada daun."
+        # Proses penulis langsung melihat pesan yang masih antre
+        assert get_context(writer_pool, writer_cache) == ("", expected)
+
+        deadline = time.monotonic() + 20 * max_delay
+        while get_context(reader_pool, reader_cache)[1] != expected and time.monotonic() < deadline:
+            time.sleep(max_delay / 5)
+        assert get_context(reader_pool, reader_cache) == ("", expected)
+    finally:
+        writer_pool.close_all()
+        reader_pool.close_all()
+
+
+def test_tail_matches_select_tail_with_pending_messages(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "chat.db"), write_behind=True, max_delay=60)
+    cache = HistoryCache()
+    try:
+        history = [("user" if i % 2 == 0 else "ai", f"pesan nomor {i} " * (i % 5 + 1)) for i in range(30)]
+        db = pool.acquire()
+        for role, message in history[:20]:
+            db.save_message("session", 1, role, message)
+        pool.writer.flush()
+        for role, message in history[20:]:
+            db.save_message("session", 1, role, message)
+        pool.release(db)
+
+        for tail_tokens in (None, 1, 40, 200):
+            expected = format_messages(select_tail(history, tail_tokens))
+            assert get_context(pool, cache, tail_tokens) == ("", expected)
+    finally:
+        pool.close_all()